@@ -1,3 +1,120 @@
+import datetime
+
+from django import forms
 from django.contrib import admin
+from django.db import transaction
+
+from .agenda import consulta_em_conflito
+from .cache import invalidar
+from .exclusao import excluir_definitivamente
+from .models import Profissional, Contato, Consulta, HorarioAtendimento
+from .serializers import MSG_SOBREPOSICAO
+from .versioning import incrementar_versao, touch
+
+
+# Registros do admin. As listagens de contatos, consultas e horários trazem o profissional
+# no mesmo SELECT (list_select_related), sem uma consulta por linha.
+#
+# As escritas pelo admin seguem as regras da API: cada uma incrementa a versão do
+# profissional afetado e descarta o cache dele na mesma transação (ver versioning.touch),
+# para que ETag, cache e /api/changes não divirjam.
+
+@admin.register(Profissional)
+class ProfissionalAdmin(admin.ModelAdmin):
+    list_display = ('id_profissional', 'nome_completo', 'nome_social', 'profissao')
+    list_filter = ('profissao',)
+    search_fields = ('nome_completo', 'nome_social')
+    readonly_fields = ('versao', 'atualizado_em')
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                # Como no PUT: a versão sobe no mesmo UPDATE dos dados
+                incrementar_versao(obj)
+            super().save_model(request, obj, form, change)
+            if change:
+                # Troca a expressão F pelos valores gravados
+                obj.refresh_from_db(fields=['versao', 'atualizado_em'])
+                invalidar(obj.id_profissional)
+
+    def save_related(self, request, form, formsets, change):
+        with transaction.atomic():
+            super().save_related(request, form, formsets, change)
+            if any(formset.has_changed() for formset in formsets):
+                touch(form.instance.id_profissional)
+
+    # Exclusões definitivas, como o DELETE ?hard=true: um DELETE por tabela dependente
+    def delete_model(self, request, obj):
+        excluir_definitivamente([obj.id_profissional])
+
+    def delete_queryset(self, request, queryset):
+        excluir_definitivamente(queryset.values_list('id_profissional', flat=True))
+
+
+class VinculadoAdmin(admin.ModelAdmin):
+    """Admin de um modelo ligado a um profissional (contatos, consultas, horários)."""
+    list_select_related = ('profissional',)
+    raw_id_fields = ('profissional',)
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            # Trocar o profissional altera os dados do anterior e do novo
+            anterior = form.initial.get('profissional') if change else None
+            super().save_model(request, obj, form, change)
+            touch(anterior, obj.profissional_id)
+
+    def save_related(self, request, form, formsets, change):
+        with transaction.atomic():
+            super().save_related(request, form, formsets, change)
+            if any(formset.has_changed() for formset in formsets):
+                touch(form.instance.profissional_id)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            touch(obj.profissional_id)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            ids = set(queryset.values_list('profissional_id', flat=True))
+            super().delete_queryset(request, queryset)
+            touch(*ids)
+
+
+class ConsultaAdminForm(forms.ModelForm):
+    """
+    Recusa consultas sobrepostas, como o POST/PUT (views.conflito_consulta). O admin valida
+    o formulário dentro da transação da gravação: com `transaction_mode="IMMEDIATE"` no
+    SQLite ela já começa com o lock de escrita, e duas gravações não passam juntas pela
+    verificação.
+    """
+    class Meta:
+        model = Consulta
+        fields = '__all__'
+
+    def clean(self):
+        dados = super().clean()
+        profissional, inicio, duracao = (dados.get(campo) for campo in ('profissional', 'data_consulta', 'duracao'))
+        if profissional is not None and inicio is not None and duracao is not None:
+            fim = inicio + datetime.timedelta(minutes=duracao)
+            conflito = consulta_em_conflito(profissional.pk, inicio, fim, excluir=self.instance.pk)
+            if conflito is not None:
+                raise forms.ValidationError(MSG_SOBREPOSICAO.format(id_consulta=conflito))
+        return dados
+
+
+@admin.register(Contato)
+class ContatoAdmin(VinculadoAdmin):
+    list_display = ('id_contato', 'profissional', 'tipo', 'contato')
+
+
+@admin.register(Consulta)
+class ConsultaAdmin(VinculadoAdmin):
+    form = ConsultaAdminForm
+    list_display = ('id_consulta', 'profissional', 'data_consulta')
+    date_hierarchy = 'data_consulta'
+
 
-# Register your models here.
+@admin.register(HorarioAtendimento)
+class HorarioAtendimentoAdmin(VinculadoAdmin):
+    list_display = ('id_horario', 'profissional', 'dia_semana', 'hora_inicio', 'hora_fim')
@@ -0,0 +1,147 @@
+import bisect
+import datetime
+import functools
+import operator
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+from .arquivo import pode_ter_arquivadas
+from .models import Consulta, ConsultaArquivada
+
+
+# Maior duração aceita para uma consulta, em minutos. Também limita a janela das buscas
+# por sobreposição: uma consulta que termina depois de `inicio` começou no máximo
+# DURACAO_MAXIMA antes dele.
+DURACAO_MINIMA = getattr(settings, 'LACREI_DURACAO_MINIMA', 5)
+DURACAO_MAXIMA = getattr(settings, 'LACREI_DURACAO_MAXIMA', 480)
+
+_JANELA = datetime.timedelta(minutes=DURACAO_MAXIMA)
+
+# Janelas unidas por OR em cada consulta de conflitos_com_o_banco. Com o padrão, um bloco
+# da inserção em lote (LACREI_BULK_CHUNK_SIZE, 500) usa uma consulta por tabela
+JANELAS_POR_CONSULTA = getattr(settings, 'LACREI_JANELAS_POR_CONSULTA', 500)
+
+
+def consultas_no_intervalo(profissionais_ids, inicio, fim, model=Consulta):
+    """
+    Consultas dos profissionais que ocupam algum instante de [inicio, fim). O filtro em
+    data_consulta percorre o índice (profissional, data_consulta) só na janela
+    (inicio - DURACAO_MAXIMA, fim); data_fim descarta as que já terminaram.
+    `model=ConsultaArquivada` faz a mesma busca no arquivo.
+    """
+    return model.objects.filter(
+        profissional_id__in=profissionais_ids,
+        data_consulta__gt=inicio - _JANELA,
+        data_consulta__lt=fim,
+        data_fim__gt=inicio,
+    )
+
+
+def consulta_em_conflito(profissional_id, inicio, fim, excluir=None):
+    """Retorna o id de uma consulta do profissional que se sobrepõe a [inicio, fim), ou None."""
+    consultas = consultas_no_intervalo([profissional_id], inicio, fim)
+    if excluir is not None:
+        consultas = consultas.exclude(id_consulta=excluir)
+    # Sem order_by: qualquer conflito serve e a busca fica restrita ao índice
+    conflito = next(iter(consultas.values_list('id_consulta', flat=True)[:1]), None)
+    if conflito is None and arquivo_no_intervalo(inicio):
+        arquivadas = consultas_no_intervalo([profissional_id], inicio, fim, model=ConsultaArquivada)
+        conflito = next(iter(arquivadas.values_list('id_consulta', flat=True)[:1]), None)
+    return conflito
+
+
+def arquivo_no_intervalo(inicio):
+    """A janela de sobreposição de um intervalo que começa em `inicio` pode ter consultas arquivadas?"""
+    return pode_ter_arquivadas(inicio - _JANELA)
+
+
+def sobreposicoes_no_lote(lote):
+    """
+    Ordena os itens de cada profissional pelo início e percorre a lista uma vez,
+    guardando o item aceito que termina mais tarde. Retorna {indice: indice_conflitante}
+    dos itens que se sobrepõem a um item anterior do próprio lote.
+    """
+    por_profissional = defaultdict(list)
+    for indice, dados in lote:
+        por_profissional[dados['profissional_id']].append((dados['data_consulta'], dados['data_fim'], indice))
+
+    conflitos = {}
+    for intervalos in por_profissional.values():
+        intervalos.sort()
+        maior_fim, dono = None, None
+        for inicio, fim, indice in intervalos:
+            if maior_fim is not None and inicio < maior_fim:
+                conflitos[indice] = dono
+                continue
+            if maior_fim is None or fim > maior_fim:
+                maior_fim, dono = fim, indice
+    return conflitos
+
+
+def _janelas(lote):
+    """
+    Janelas de busca dos itens do lote, por profissional: (profissional_id, de, ate,
+    menor_inicio), com `de` = início - DURACAO_MAXIMA e `ate` = fim de cada item. Janelas
+    do mesmo profissional que se tocam viram uma só, e nenhuma consulta gravada é lida duas
+    vezes. Itens distantes no tempo ficam em janelas separadas: o custo acompanha o
+    tamanho do lote, e não o período que ele cobre.
+    """
+    itens = sorted((dados['profissional_id'], dados['data_consulta'], dados['data_fim']) for _, dados in lote)
+    janelas = []
+    for profissional_id, inicio, fim in itens:
+        anterior = janelas[-1] if janelas else None
+        if anterior and anterior[0] == profissional_id and inicio - _JANELA < anterior[2]:
+            janelas[-1] = (profissional_id, anterior[1], max(anterior[2], fim), anterior[3])
+        else:
+            janelas.append((profissional_id, inicio - _JANELA, fim, inicio))
+    return janelas
+
+
+def _consultas_nas_janelas(janelas, model):
+    """Consultas de `model` em qualquer uma das janelas, em uma consulta a cada JANELAS_POR_CONSULTA."""
+    for posicao in range(0, len(janelas), JANELAS_POR_CONSULTA):
+        filtro = functools.reduce(operator.or_, (
+            Q(profissional_id=profissional_id, data_consulta__gt=de, data_consulta__lt=ate, data_fim__gt=menor_inicio)
+            for profissional_id, de, ate, menor_inicio in janelas[posicao:posicao + JANELAS_POR_CONSULTA]
+        ))
+        yield from model.objects.filter(filtro).values_list('profissional_id', 'data_consulta', 'data_fim', 'id_consulta')
+
+
+def conflitos_com_o_banco(lote):
+    """
+    Confere o lote contra as consultas já gravadas. Cada item é buscado só na própria
+    janela (início - DURACAO_MAXIMA, fim), pelo índice (profissional, data_consulta), com
+    as janelas do lote unidas por OR em uma consulta (mais uma no arquivo, para as janelas
+    que podem ter consultas arquivadas). A linha com a mesma (profissional, data_consulta)
+    de um item é a que o upsert vai atualizar e não conta como conflito; a arquivada, que
+    não pode ser atualizada, conta. Retorna {indice: id_consulta_conflitante}.
+    """
+    if not lote:
+        return {}
+    janelas = _janelas(lote)
+    existentes = defaultdict(list)
+    for profissional_id, data_consulta, data_fim, id_consulta in _consultas_nas_janelas(janelas, Consulta):
+        existentes[profissional_id].append((data_consulta, data_fim, id_consulta, False))
+    no_arquivo = [janela for janela in janelas if arquivo_no_intervalo(janela[3])]
+    for profissional_id, data_consulta, data_fim, id_consulta in _consultas_nas_janelas(no_arquivo, ConsultaArquivada):
+        existentes[profissional_id].append((data_consulta, data_fim, id_consulta, True))
+    for gravadas in existentes.values():
+        gravadas.sort()
+    inicios_por_profissional = {pid: [gravada[0] for gravada in gravadas] for pid, gravadas in existentes.items()}
+
+    conflitos = {}
+    for indice, dados in lote:
+        gravadas = existentes.get(dados['profissional_id'])
+        if not gravadas:
+            continue
+        inicios = inicios_por_profissional[dados['profissional_id']]
+        # Só as consultas que começam na janela (inicio - DURACAO_MAXIMA, fim) podem sobrepor
+        primeira = bisect.bisect_right(inicios, dados['data_consulta'] - _JANELA)
+        ultima = bisect.bisect_left(inicios, dados['data_fim'])
+        for data_consulta, data_fim, id_consulta, arquivada in gravadas[primeira:ultima]:
+            if data_fim > dados['data_consulta'] and (arquivada or data_consulta != dados['data_consulta']):
+                conflitos[indice] = id_consulta
+                break
+    return conflitos
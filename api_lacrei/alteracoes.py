@@ -0,0 +1,149 @@
+import datetime
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, router
+from django.db.models import Exists, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from .models import Alteracao, Compactacao, Profissional, Contato, Consulta, ConsultaArquivada
+from .serializers import CONSULTA_LEVE, CONTATO_LEVE, PROFISSIONAL_LEVE
+
+
+# Alterações por página do feed (o máximo é o de qualquer listagem, LACREI_MAX_PAGE_SIZE)
+ALTERACOES_LIMITE = getattr(settings, 'LACREI_ALTERACOES_LIMITE', 500)
+
+# Por quanto tempo as alterações ficam no feed. Um cliente parado por mais tempo que isso
+# recebe 410 e refaz a sincronização completa pela exportação
+ALTERACOES_RETENCAO = datetime.timedelta(days=getattr(settings, 'LACREI_ALTERACOES_RETENCAO_DIAS', 30))
+
+# Linhas do feed examinadas por DELETE na compactação
+COMPACTACAO_LOTE = getattr(settings, 'LACREI_COMPACTACAO_LOTE', 5000)
+
+# Modelo e representação de cada tipo de objeto do feed. Contatos e consultas de um
+# profissional excluído contam como excluídos, como nas demais leituras da API
+FEED = {
+    'profissionais': (Profissional.objects, PROFISSIONAL_LEVE),
+    'contatos': (Contato.objects.filter(profissional__excluido_em__isnull=True), CONTATO_LEVE),
+    'consultas': (Consulta.objects.filter(profissional__excluido_em__isnull=True), CONSULTA_LEVE),
+}
+
+# Onde procurar os objetos que saíram da tabela principal sem serem excluídos: o
+# arquivamento não registra a saída da consulta no feed, que continua a entregar seus dados
+FEED_ARQUIVO = {
+    'consultas': ConsultaArquivada.objects.filter(profissional__excluido_em__isnull=True),
+}
+
+
+class CursorExpirado(Exception):
+    pass
+
+
+def cursor_atual():
+    """Posição mais recente do feed: o ponto de partida de quem acabou de exportar tudo."""
+    # Com o feed vazio depois de uma compactação, a posição é a do horizonte
+    ultimo = Alteracao.objects.aggregate(ultimo=Max('id_alteracao'))['ultimo']
+    return ultimo if ultimo is not None else horizonte()
+
+
+def horizonte():
+    """Cursores abaixo deste valor perderiam alterações descartadas na compactação."""
+    return Compactacao.objects.aggregate(ate=Max('ate'))['ate'] or 0
+
+
+def listar_alteracoes(desde, limite=ALTERACOES_LIMITE):
+    """
+    Alterações depois do cursor `desde`, em ordem. Cada objeto aparece uma vez por página,
+    com o estado atual (`data`) ou, se foi excluído, como `deleted` sem dados: aplicar a
+    página é idempotente. Retorna (resultados, proximo_cursor, ha_mais).
+    """
+    if desde < horizonte():
+        raise CursorExpirado('Cursor anterior à última compactação: refaça a sincronização completa pela exportação')
+
+    linhas = list(
+        Alteracao.objects.filter(id_alteracao__gt=desde).order_by('id_alteracao')
+        .values_list('id_alteracao', 'modelo', 'id_objeto', 'operacao')[:limite + 1]
+    )
+    ha_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+    proximo = linhas[-1][0] if linhas else desde
+
+    # A última alteração de cada objeto na página basta: os dados são lidos agora
+    ultimas = {(modelo, id_objeto): (seq, operacao) for seq, modelo, id_objeto, operacao in linhas}
+    dados = {}
+    for modelo, (queryset, leve) in FEED.items():
+        ids = [id_objeto for (tipo, id_objeto), (_, operacao) in ultimas.items() if tipo == modelo and operacao != 'deleted']
+        if ids:
+            posicao = leve.posicao(queryset.model._meta.pk.attname)
+            linhas_atuais = list(leve.linhas(queryset.filter(pk__in=ids)))
+            faltando = set(ids).difference(linha[posicao] for linha in linhas_atuais)
+            if faltando and modelo in FEED_ARQUIVO:
+                linhas_atuais += leve.linhas(FEED_ARQUIVO[modelo].filter(pk__in=faltando))
+            dados[modelo] = dict(zip((linha[posicao] for linha in linhas_atuais), leve.representar(linhas_atuais)))
+
+    resultados = []
+    for (modelo, id_objeto), (seq, operacao) in sorted(ultimas.items(), key=lambda item: item[1][0]):
+        atual = dados.get(modelo, {}).get(id_objeto)
+        if atual is None:
+            # Excluído depois desta alteração (o registro da exclusão vem mais adiante)
+            operacao = 'deleted'
+        resultados.append({'seq': seq, 'model': modelo, 'id': id_objeto, 'op': operacao, 'data': atual})
+    return resultados, proximo, ha_mais
+
+
+def compactar(retencao=ALTERACOES_RETENCAO, lote=COMPACTACAO_LOTE, pausa=0.0):
+    """
+    Mantém o feed limitado às alterações recentes, uma por objeto:
+    - descarta as alterações mais velhas que `retencao`. O novo horizonte é gravado antes,
+      então um cliente com um cursor anterior recebe 410 em vez de perder alterações;
+    - remove as alterações de um objeto que já tem outra mais nova (o feed entrega o estado
+      atual, então a mais nova basta para qualquer cursor).
+    Cada DELETE cobre no máximo `lote` posições do feed. Produz quantas linhas cada
+    DELETE removeu.
+    """
+    ate = Alteracao.objects.filter(criado_em__lt=timezone.now() - retencao).aggregate(ate=Max('id_alteracao'))['ate']
+    if ate is not None:
+        Compactacao.objects.create(ate=ate)
+
+    mais_nova = Alteracao.objects.filter(
+        modelo=OuterRef('modelo'), id_objeto=OuterRef('id_objeto'), id_alteracao__gt=OuterRef('id_alteracao'),
+    )
+    condicao = Exists(mais_nova)
+    if ate is not None:
+        condicao |= Q(id_alteracao__lte=ate)
+
+    faixa = Alteracao.objects.aggregate(inicio=Min('id_alteracao'), ultimo=Max('id_alteracao'))
+    if faixa['inicio'] is None:
+        return
+    inicio, ultimo = faixa['inicio'] - 1, faixa['ultimo']
+    while inicio < ultimo:
+        superadas = Alteracao.objects.filter(condicao, id_alteracao__gt=inicio, id_alteracao__lte=inicio + lote)
+        removidas = superadas._raw_delete(router.db_for_write(Alteracao))
+        if removidas:
+            yield removidas
+            if pausa:
+                time.sleep(pausa)
+        inicio += lote
+
+
+@contextmanager
+def registro_suspenso():
+    """
+    Para cargas sintéticas: remove os gatilhos do feed durante o bloco e os recria no fim
+    com o SQL que estava no banco. As linhas gravadas no bloco não entram no feed.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", ['%_alteracao_%'])
+        gatilhos = cursor.fetchall()
+        for nome, _ in gatilhos:
+            cursor.execute(f'DROP TRIGGER {nome}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in gatilhos:
+                cursor.execute(sql)
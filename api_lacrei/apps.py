@@ -1,6 +1,33 @@
+import logging
+
 from django.apps import AppConfig
 
 
+logger = logging.getLogger(__name__)
+
+
 class ApiLacreiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_lacrei'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import instalar_sql_wrapper
+        from .sqlite import aplicar_pragmas
+
+        # Conta o SQL de cada requisição em todas as conexões (Server-Timing, /metrics e
+        # orçamento de consultas). Sem coletor ativo, o custo é uma leitura de contextvar.
+        connection_created.connect(instalar_sql_wrapper, dispatch_uid='lacrei_sql_wrapper')
+
+        # PRAGMAs do SQLite de LACREI_SQLITE_PRAGMAS (perfil de produção em settings_producao.py)
+        connection_created.connect(aplicar_pragmas, dispatch_uid='lacrei_sqlite_pragmas')
+
+        # orjson e brotli estão no requirements.txt; sem eles a API funciona, com o JSON do
+        # DRF (mais lento) ou só com gzip. Avisa uma vez, na inicialização
+        from .compressao import brotli
+        from .renderers import orjson
+
+        for nome, modulo, alternativa in (('orjson', orjson, 'JSON do DRF'), ('brotli', brotli, 'compressão só com gzip')):
+            if modulo is None:
+                logger.warning('%s não está instalado: usando %s (ver requirements.txt)', nome, alternativa)
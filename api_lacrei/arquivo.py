@@ -0,0 +1,85 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Consulta, ConsultaArquivada
+from .pagination import decode_cursor, parse_instante
+
+
+# Consultas que começaram há mais que isso saem da tabela de consultas para o arquivo
+ARQUIVO_HORIZONTE = datetime.timedelta(days=getattr(settings, 'LACREI_ARQUIVO_HORIZONTE_DIAS', 180))
+
+# Menor horizonte aceito. Toda consulta arquivada começou pelo menos esse tempo antes de
+# agora, então as leituras e agendamentos a partir de ontem nunca precisam do arquivo
+ARQUIVO_HORIZONTE_MINIMO = datetime.timedelta(days=1)
+
+# Consultas movidas por transação: cada lote segura o lock de escrita do banco por pouco tempo
+ARQUIVO_LOTE = getattr(settings, 'LACREI_ARQUIVO_LOTE', 1000)
+
+COLUNAS = tuple(field.attname for field in ConsultaArquivada._meta.concrete_fields)
+
+
+def pode_ter_arquivadas(inicio):
+    """
+    Um período que começa em `inicio` (None: desde sempre) pode incluir consultas
+    arquivadas? Sem consultar o banco: toda consulta arquivada começou mais de
+    ARQUIVO_HORIZONTE_MINIMO antes do arquivamento, isto é, antes de agora.
+    """
+    return inicio is None or inicio < timezone.now() - ARQUIVO_HORIZONTE_MINIMO
+
+
+def pagina_pode_ter_arquivadas(params):
+    """`pode_ter_arquivadas` para o início efetivo de uma página (from ou cursor, o que vier depois)."""
+    inicio = parse_instante(params.get('from'))
+    cursor = params.get('cursor')
+    if cursor:
+        data_consulta = decode_cursor(cursor)[0]
+        inicio = data_consulta if inicio is None else max(inicio, data_consulta)
+    return pode_ter_arquivadas(inicio)
+
+
+def _copiar(consultas, using):
+    """INSERT ... SELECT: as linhas são copiadas dentro do banco, sem passar pelo Python."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    select, params = consultas.values_list(*COLUNAS).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(ConsultaArquivada._meta.db_table)} ({", ".join(map(quote, COLUNAS))}) {select}', params
+        )
+
+
+def arquivar(horizonte=ARQUIVO_HORIZONTE, lote=ARQUIVO_LOTE, pausa=0.0):
+    """
+    Move para ConsultaArquivada as consultas que começaram antes de agora - `horizonte`,
+    no máximo `lote` por transação (cópia e DELETE juntos: a consulta nunca fica nas duas
+    tabelas nem em nenhuma). As consultas são percorridas uma vez, pela chave primária.
+    `pausa` (segundos) entre os lotes deixa o banco livre para as demais escritas.
+    Produz quantas consultas cada transação moveu.
+    """
+    if horizonte < ARQUIVO_HORIZONTE_MINIMO:
+        raise ValueError(f'O horizonte do arquivamento é de pelo menos {ARQUIVO_HORIZONTE_MINIMO.days} dia')
+    limite = timezone.now() - horizonte
+    using = router.db_for_write(Consulta)
+    ultimo = 0
+    while True:
+        with transaction.atomic(using=using):
+            antigas = Consulta.objects.using(using).filter(id_consulta__gt=ultimo, data_consulta__lt=limite)
+            # Id da lote-ésima consulta antiga (ou da última, no fim da tabela)
+            ate = next(iter(antigas.order_by('id_consulta').values_list('id_consulta', flat=True)[lote - 1:lote]), None)
+            if ate is None:
+                ate = antigas.aggregate(ate=Max('id_consulta'))['ate']
+                if ate is None:
+                    return
+            # O mesmo filtro na cópia e no DELETE, dentro da transação
+            lote_atual = antigas.filter(id_consulta__lte=ate)
+            _copiar(lote_atual, using)
+            movidas = lote_atual._raw_delete(using)
+        ultimo = ate
+        yield movidas
+        if pausa:
+            time.sleep(pausa)
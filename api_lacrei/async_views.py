@@ -0,0 +1,329 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import views
+from .arquivo import pagina_pode_ter_arquivadas
+from .bulk import BULK_MAX_ITEMS, bulk_upsert
+from .cache import acached_payload, ainvalidar
+from .exclusao import excluir_definitivamente, excluir_profissional
+from .models import Profissional, Contato, Consulta, ConsultaArquivada
+from .pagination import chave_cursor, fechar_pagina, intercalar, preparar_pagina
+from .parsers import NDJSONParser
+from .projecao import POR_IDS, abuscar_por_ids, parse_campos, parse_ids
+from .renderers import JSONRenderer
+from .serializers import (
+    ProfissionalSerializer, ConsultaSerializer, ContatoSerializer,
+    ProfissionalBulkSerializer, ConsultaBulkSerializer, ContatoBulkSerializer,
+    CONSULTA_LEVE, CONTATO_LEVE, PROFISSIONAL_LEVE, profissional_duplicado,
+)
+from .utils import CAMPOS_PROFISSIONAL, CAMPOS_CONTATO, sanitizar
+from .versioning import atouch, aversao_atual, incrementar_versao, not_modified, set_validadores, validadores
+
+
+# Versão assíncrona (ASGI) de handle_request e dos CRUDs de Profissionais, Contatos e Consultas.
+# Usa o ORM assíncrono do Django (aget, acreate, asave, adelete, iteração com `async for`)
+# e responde com o mesmo corpo JSON das views síncronas do DRF.
+#
+# A validação usa os serializers de escrita, que não consultam o banco, e as escritas fazem
+# as mesmas idas ao banco das views síncronas (ver query_budget.py). POST/PUT de Contato e
+# Consulta precisam de transação e usam as funções síncronas em uma thread (_gravar).
+
+
+# Parsers aceitos no corpo, como no @parser_classes de views.handle_request
+PARSERS = api_settings.DEFAULT_PARSER_CLASSES + [NDJSONParser]
+
+
+def _response(data, status_code):
+    # Mesmo corpo que o JSONRenderer gera nas views síncronas
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def _parse_body(request):
+    # Mesmos parsers de handle_request (JSON, formulário, multipart e NDJSON), pelo
+    # Request do DRF: levanta UnsupportedMediaType (415) ou ParseError (400)
+    return Request(request, parsers=[parser() for parser in PARSERS]).data
+
+
+async def _bulk_response(model_name, itens):
+    if len(itens) > BULK_MAX_ITEMS:
+        return _response({'error': f'O lote aceita no máximo {BULK_MAX_ITEMS} itens'}, status.HTTP_400_BAD_REQUEST)
+
+    # O lote usa transações, que o ORM assíncrono não oferece: roda em uma thread
+    relatorio = await sync_to_async(bulk_upsert)(model_name, itens)
+    status_code = status.HTTP_200_OK if not relatorio['failed'] else status.HTTP_207_MULTI_STATUS
+    return _response(relatorio, status_code)
+
+
+def _id_profissional(request):
+    try:
+        return int(request.GET.get('id_profissional'))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _resposta_por_ids(model_name, params):
+    # Como views.resposta_por_ids
+    try:
+        ids = parse_ids(params.get('ids'))
+        leve = parse_campos(params.get('fields'), POR_IDS[model_name][0])
+    except ValueError as e:
+        return _response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+    resultados, ausentes = await abuscar_por_ids(model_name, ids, leve)
+    return _response({'results': resultados, 'missing': ausentes}, status.HTTP_200_OK)
+
+
+# Função central assíncrona: mesmo roteamento de handle_request
+@csrf_exempt
+async def handle_request_async(request, model_name):
+    crud = ASYNC_CRUDS.get(model_name)
+    if crud is None:
+        # Modelos sem versão assíncrona seguem pela view síncrona, em uma thread
+        return await sync_to_async(views.handle_request)(request, model_name)
+
+    if request.method not in ('GET', 'POST', 'PUT', 'DELETE'):
+        return _response({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    try:
+        data = _parse_body(request)
+    except APIException as e:
+        return _response({'detail': str(e.detail)}, e.status_code)
+    if not isinstance(data, (dict, list)) or (isinstance(data, list) and request.method != 'POST'):
+        return _response({'error': 'Corpo da requisição inválido'}, status.HTTP_400_BAD_REQUEST)
+
+    return await crud(request, data)
+
+
+# CRUD assíncrono - Profissionais
+async def profissional_crud_async(request, data):
+    # Inserir novo Profissional (POST)
+    if request.method == 'POST':
+        if isinstance(data, list):
+            return await _bulk_response('profissionais', data)
+
+        serializer = ProfissionalBulkSerializer(data=sanitizar(data, CAMPOS_PROFISSIONAL))
+        if not serializer.is_valid():
+            return _response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            profissional = await Profissional.objects.acreate(**serializer.validated_data)
+        except IntegrityError:
+            return _response(profissional_duplicado(), status.HTTP_400_BAD_REQUEST)
+        return _response(ProfissionalSerializer(profissional).data, status.HTTP_201_CREATED)
+
+    # Atualizar dados de um Profissional (PUT)
+    elif request.method == 'PUT':
+        id_profissional = data.get('id_profissional')
+        if not id_profissional:
+            return _response({'error': 'ID do profissional é necessário'}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            profissional = await Profissional.objects.aget(id_profissional=id_profissional)
+        except (Profissional.DoesNotExist, ValueError):
+            return _response({'error': 'Profissional não encontrado'}, status.HTTP_404_NOT_FOUND)
+
+        serializer = ProfissionalBulkSerializer(profissional, data=sanitizar(data, CAMPOS_PROFISSIONAL), partial=True)
+        if not serializer.is_valid():
+            return _response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        for campo, valor in serializer.validated_data.items():
+            setattr(profissional, campo, valor)
+        incrementar_versao(profissional)
+        await profissional.asave()
+        await ainvalidar(profissional.id_profissional)
+        return _response(ProfissionalSerializer(profissional).data, status.HTTP_200_OK)
+
+    # Deletar Profissional (DELETE): exclusão lógica ou, com ?hard=true, definitiva (ver exclusao.py)
+    elif request.method == 'DELETE':
+        id_profissional = data.get('id_profissional')
+        try:
+            if request.GET.get('hard', '').lower() in ('1', 'true'):
+                excluido = await sync_to_async(excluir_definitivamente)([id_profissional]) > 0
+            else:
+                excluido = await sync_to_async(excluir_profissional)(id_profissional)
+        except ValueError:
+            excluido = False
+        if not excluido:
+            return _response({'error': 'Profissional não encontrado'}, status.HTTP_404_NOT_FOUND)
+        return _response({'message': 'Profissional deletado com sucesso'}, status.HTTP_204_NO_CONTENT)
+
+    # Dados de um Profissional (GET), ou de vários com ?ids=
+    else:
+        if 'ids' in request.GET:
+            return await _resposta_por_ids('profissionais', request.GET)
+        id_profissional = _id_profissional(request)
+        if id_profissional is None:
+            return _response({'error': 'ID do profissional é necessário'}, status.HTTP_400_BAD_REQUEST)
+        try:
+            leve = parse_campos(request.GET.get('fields'), PROFISSIONAL_LEVE)
+        except ValueError as e:
+            return _response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        versao = await aversao_atual(id_profissional)
+        if versao is None:
+            return _response({'error': 'Profissional não encontrado'}, status.HTTP_404_NOT_FOUND)
+        etag, last_modified = validadores(id_profissional, *versao)
+        resposta_304 = not_modified(request, etag, last_modified)
+        if resposta_304 is not None:
+            return resposta_304
+
+        async def serializar():
+            linhas = [linha async for linha in leve.linhas(Profissional.objects.filter(id_profissional=id_profissional))]
+            return leve.representar(linhas)[0] if linhas else None
+
+        data = await acached_payload('profissional', id_profissional, {'versao': versao[0], 'fields': leve.nomes}, serializar)
+        if data is None:
+            return _response({'error': 'Profissional não encontrado'}, status.HTTP_404_NOT_FOUND)
+        return set_validadores(_response(data, status.HTTP_200_OK), etag, last_modified)
+
+
+# CRUD assíncrono - Contatos
+async def contato_crud_async(request, data):
+    # Inserir novo Contato (POST)
+    if request.method == 'POST':
+        if isinstance(data, list):
+            return await _bulk_response('contatos', data)
+        return await _gravar(views.criar_vinculado, Contato, ContatoBulkSerializer, ContatoSerializer, sanitizar(data, CAMPOS_CONTATO))
+
+    # Atualizar Contato (PUT)
+    elif request.method == 'PUT':
+        id_contato = data.get('id_contato')
+        if not id_contato:
+            return _response({'error': 'ID do contato é necessário'}, status.HTTP_400_BAD_REQUEST)
+        try:
+            contato = await Contato.objects.aget(id_contato=id_contato)
+        except (Contato.DoesNotExist, ValueError):
+            return _response({'error': 'Contato não encontrado'}, status.HTTP_404_NOT_FOUND)
+        return await _gravar(views.atualizar_vinculado, contato, ContatoBulkSerializer, ContatoSerializer, sanitizar(data, CAMPOS_CONTATO))
+
+    # Deletar Contato (DELETE)
+    elif request.method == 'DELETE':
+        try:
+            contato = await Contato.objects.aget(id_contato=data.get('id_contato'))
+        except (Contato.DoesNotExist, ValueError):
+            return _response({'error': 'Contato não encontrado'}, status.HTTP_404_NOT_FOUND)
+
+        await contato.adelete()
+        await atouch(contato.profissional_id)
+        return _response({'message': 'Contato deletado com sucesso'}, status.HTTP_204_NO_CONTENT)
+
+    # Contatos pelo id do profissional (GET), ou pelos próprios ids com ?ids=
+    else:
+        if 'ids' in request.GET:
+            return await _resposta_por_ids('contatos', request.GET)
+        id_profissional = _id_profissional(request)
+        if id_profissional is None:
+            return _response({'error': 'ID do profissional é necessário'}, status.HTTP_400_BAD_REQUEST)
+        try:
+            leve = parse_campos(request.GET.get('fields'), CONTATO_LEVE)
+        except ValueError as e:
+            return _response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        contatos = Contato.objects.filter(profissional=id_profissional, profissional__excluido_em__isnull=True).order_by('id_contato')
+        linhas = [linha async for linha in leve.linhas(contatos)]
+        return _response(leve.representar(linhas), status.HTTP_200_OK)
+
+
+async def _gravar(funcao, *args, verificar=None):
+    """
+    POST/PUT de Contato e Consulta: o UPDATE da versão do profissional, a verificação de
+    sobreposição (Consulta) e a gravação da linha rodam em uma única transação, que o ORM
+    assíncrono não oferece. Usa o caminho síncrono (views.criar_vinculado /
+    views.atualizar_vinculado) em uma thread.
+    """
+    resposta = await sync_to_async(funcao)(*args, verificar=verificar)
+    return _response(resposta.data, resposta.status_code)
+
+
+# CRUD assíncrono - Consultas
+async def _consulta_nao_encontrada(id_consulta):
+    # Como views.consulta_nao_encontrada: 409 para uma consulta arquivada
+    try:
+        arquivada = await ConsultaArquivada.objects.filter(id_consulta=id_consulta).aexists()
+    except (TypeError, ValueError):
+        arquivada = False
+    if arquivada:
+        return _response({'error': 'Consulta arquivada: somente leitura'}, status.HTTP_409_CONFLICT)
+    return _response({'error': 'Consulta não encontrada'}, status.HTTP_404_NOT_FOUND)
+
+
+async def consulta_crud_async(request, data):
+    # Inserir nova Consulta (POST)
+    if request.method == 'POST':
+        if isinstance(data, list):
+            return await _bulk_response('consultas', data)
+        return await _gravar(views.criar_vinculado, Consulta, ConsultaBulkSerializer, ConsultaSerializer, data, verificar=views.conflito_consulta)
+
+    # Atualizar Consulta (PUT)
+    elif request.method == 'PUT':
+        try:
+            consulta = await Consulta.objects.aget(id_consulta=data.get('id_consulta'))
+        except (Consulta.DoesNotExist, ValueError):
+            return await _consulta_nao_encontrada(data.get('id_consulta'))
+        return await _gravar(views.atualizar_vinculado, consulta, ConsultaBulkSerializer, ConsultaSerializer, data, verificar=views.conflito_consulta)
+
+    # Deletar Consulta (DELETE)
+    elif request.method == 'DELETE':
+        try:
+            consulta = await Consulta.objects.aget(id_consulta=data.get('id_consulta'))
+        except (Consulta.DoesNotExist, ValueError):
+            return await _consulta_nao_encontrada(data.get('id_consulta'))
+
+        await consulta.adelete()
+        await atouch(consulta.profissional_id)
+        return _response({'message': 'Consulta deletada com sucesso'}, status.HTTP_204_NO_CONTENT)
+
+    # Consulta pelo id do profissional (GET), paginada por cursor, ou pelos próprios ids com ?ids=
+    else:
+        if 'ids' in request.GET:
+            return await _resposta_por_ids('consultas', request.GET)
+        id_profissional = _id_profissional(request)
+        if id_profissional is None:
+            return _response({'error': 'ID do profissional é necessário'}, status.HTTP_400_BAD_REQUEST)
+        try:
+            leve = parse_campos(request.GET.get('fields'), CONSULTA_LEVE, ocultas=('data_consulta',))
+        except ValueError as e:
+            return _response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        versao = await aversao_atual(id_profissional)
+        if versao is None:
+            return _response({'error': 'Consulta não encontrada'}, status.HTTP_404_NOT_FOUND)
+        etag, last_modified = validadores(id_profissional, *versao)
+        resposta_304 = not_modified(request, etag, last_modified)
+        if resposta_304 is not None:
+            return resposta_304
+
+        async def serializar():
+            chave = chave_cursor(leve)
+            pagina, limite = preparar_pagina(Consulta.objects.filter(profissional=id_profissional), request.GET)
+            linhas = [linha async for linha in leve.linhas(pagina)]
+            if pagina_pode_ter_arquivadas(request.GET):
+                arquivo = preparar_pagina(ConsultaArquivada.objects.filter(profissional=id_profissional), request.GET)[0]
+                linhas = intercalar(linhas, [linha async for linha in leve.linhas(arquivo)], limite, chave)
+            linhas, proximo = fechar_pagina(linhas, limite, chave=chave)
+            if not linhas and not request.GET.get('cursor'):
+                return None
+            return {'results': leve.representar(linhas), 'next_cursor': proximo}
+
+        filtros = {nome: request.GET.get(nome) for nome in ('from', 'to', 'limit', 'cursor')}
+        try:
+            data = await acached_payload('consultas', id_profissional, {**filtros, 'versao': versao[0], 'fields': leve.nomes}, serializar)
+        except ValueError as e:
+            return _response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        if data is None:
+            return _response({'error': 'Consulta não encontrada'}, status.HTTP_404_NOT_FOUND)
+        return set_validadores(_response(data, status.HTTP_200_OK), etag, last_modified)
+
+
+ASYNC_CRUDS = {
+    'profissionais': profissional_crud_async,
+    'contatos': contato_crud_async,
+    'consultas': consulta_crud_async,
+}
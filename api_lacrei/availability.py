@@ -0,0 +1,143 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .agenda import arquivo_no_intervalo, consultas_no_intervalo
+from .models import Profissional, ConsultaArquivada, HorarioAtendimento
+from .utils import datetime_formatter
+
+
+# Expediente usado para os profissionais sem HorarioAtendimento cadastrado: {dia_semana: [(inicio, fim)]}
+EXPEDIENTE_PADRAO = getattr(settings, 'LACREI_EXPEDIENTE_PADRAO', {
+    dia: [(datetime.time(8), datetime.time(18))] for dia in range(5)
+})
+
+# Maior período aceito em uma busca de disponibilidade
+MAX_DIAS_BUSCA = getattr(settings, 'LACREI_DISPONIBILIDADE_MAX_DIAS', 31)
+
+
+def unir_intervalos(intervalos):
+    """
+    Ordena os intervalos (inicio, fim) e une os que se sobrepõem ou se encostam, para
+    que dois horários de atendimento sobrepostos no mesmo dia não gerem slots repetidos.
+    """
+    unidos = []
+    for inicio, fim in sorted(intervalos):
+        if unidos and inicio <= unidos[-1][1]:
+            unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fim))
+        else:
+            unidos.append((inicio, fim))
+    return unidos
+
+
+def janelas_de_trabalho(expediente, inicio, fim):
+    """
+    Gera, em ordem e sem sobreposições, os intervalos (inicio, fim) de expediente contidos
+    em [inicio, fim). `expediente` mapeia o dia da semana para uma lista de
+    (hora_inicio, hora_fim) locais.
+    """
+    tz = timezone.get_current_timezone()
+    dia = timezone.localtime(inicio, tz).date()
+    ultimo_dia = timezone.localtime(fim, tz).date()
+
+    while dia <= ultimo_dia:
+        for hora_inicio, hora_fim in unir_intervalos(expediente.get(dia.weekday(), ())):
+            janela_inicio = max(timezone.make_aware(datetime.datetime.combine(dia, hora_inicio), tz), inicio)
+            janela_fim = min(timezone.make_aware(datetime.datetime.combine(dia, hora_fim), tz), fim)
+            if janela_inicio < janela_fim:
+                yield janela_inicio, janela_fim
+        dia += datetime.timedelta(days=1)
+
+
+def slots_livres(janelas, ocupados, duracao_slot, max_slots=None):
+    """
+    Varre em paralelo as janelas de expediente e os intervalos ocupados (inicio, fim),
+    ambos ordenados pelo início, e retorna o início de cada slot livre de `duracao_slot`.
+    Cada intervalo ocupado é visitado uma única vez: O(janelas + consultas).
+    """
+    livres = []
+    indice = 0
+    for janela_inicio, janela_fim in janelas:
+        atual = janela_inicio
+        while atual + duracao_slot <= janela_fim:
+            fim_slot = atual + duracao_slot
+            # Avança até a primeira consulta que ainda não terminou no início do slot
+            while indice < len(ocupados) and ocupados[indice][1] <= atual:
+                indice += 1
+            if indice < len(ocupados) and ocupados[indice][0] < fim_slot:
+                # Conflito: o slot recomeça quando a consulta termina
+                atual = ocupados[indice][1]
+                continue
+
+            livres.append(atual)
+            if max_slots is not None and len(livres) >= max_slots:
+                return livres
+            atual = fim_slot
+    return livres
+
+
+def _expedientes(ids):
+    """Carrega os horários de atendimento de vários profissionais em uma consulta."""
+    expedientes = defaultdict(lambda: defaultdict(list))
+    horarios = HorarioAtendimento.objects.filter(profissional_id__in=ids).values_list(
+        'profissional_id', 'dia_semana', 'hora_inicio', 'hora_fim'
+    )
+    for profissional_id, dia_semana, hora_inicio, hora_fim in horarios:
+        expedientes[profissional_id][dia_semana].append((hora_inicio, hora_fim))
+    return expedientes
+
+
+def _ocupados(ids, inicio, fim):
+    """
+    Intervalos ocupados dos profissionais, em uma consulta que percorre o índice
+    (profissional, data_consulta) apenas dentro do período buscado.
+    """
+    ocupados = defaultdict(list)
+    consultas = consultas_no_intervalo(ids, inicio, fim).order_by('profissional_id', 'data_consulta').values_list(
+        'profissional_id', 'data_consulta', 'data_fim'
+    )
+    for profissional_id, data_consulta, data_fim in consultas:
+        ocupados[profissional_id].append((data_consulta, data_fim))
+
+    # Períodos no passado também ocupam o horário das consultas arquivadas
+    if arquivo_no_intervalo(inicio):
+        arquivadas = consultas_no_intervalo(ids, inicio, fim, model=ConsultaArquivada).values_list(
+            'profissional_id', 'data_consulta', 'data_fim'
+        )
+        for profissional_id, data_consulta, data_fim in arquivadas:
+            ocupados[profissional_id].append((data_consulta, data_fim))
+        for intervalos in ocupados.values():
+            intervalos.sort()
+    return ocupados
+
+
+def buscar_disponibilidade(inicio, fim, duracao_slot, profissao=None, limit=20, cursor=None, max_slots=None):
+    """
+    Calcula os slots livres de uma página de profissionais (ordenados pelo id) entre
+    `inicio` e `fim`. Retorna (resultados, proximo_cursor); o cursor é o último id da
+    página, ou None quando não há mais profissionais.
+    """
+    profissionais = Profissional.objects.order_by('id_profissional')
+    if profissao:
+        profissionais = profissionais.filter(profissao=profissao)
+    if cursor is not None:
+        profissionais = profissionais.filter(id_profissional__gt=cursor)
+    pagina = list(profissionais.values('id_profissional', 'nome_completo', 'profissao')[:limit])
+
+    ids = [profissional['id_profissional'] for profissional in pagina]
+    expedientes = _expedientes(ids)
+    ocupados = _ocupados(ids, inicio, fim)
+    formatar = datetime_formatter()
+
+    resultados = []
+    for profissional in pagina:
+        expediente = expedientes.get(profissional['id_profissional']) or EXPEDIENTE_PADRAO
+        janelas = janelas_de_trabalho(expediente, inicio, fim)
+        slots = slots_livres(janelas, ocupados[profissional['id_profissional']], duracao_slot, max_slots)
+        if slots:
+            resultados.append({**profissional, 'slots': [formatar(slot) for slot in slots]})
+
+    proximo = ids[-1] if len(ids) == limit else None
+    return resultados, proximo
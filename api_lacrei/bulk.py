@@ -0,0 +1,246 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .agenda import conflitos_com_o_banco, sobreposicoes_no_lote
+from .metrics import medir
+from .models import Profissional, Contato, Consulta
+from .query_budget import BULK_QUERIES_PER_CHUNK, declarar_orcamento
+from .serializers import MSG_PROFISSIONAL_EXCLUIDO, MSG_SOBREPOSICAO, ProfissionalBulkSerializer, ContatoBulkSerializer, ConsultaBulkSerializer
+from .utils import CAMPOS_PROFISSIONAL, CAMPOS_CONTATO, sanitizar
+from .versioning import touch
+
+
+# Quantidade de itens gravados por transação
+BULK_CHUNK_SIZE = getattr(settings, 'LACREI_BULK_CHUNK_SIZE', 500)
+
+# Quantidade máxima de itens aceitos em uma única requisição
+BULK_MAX_ITEMS = getattr(settings, 'LACREI_BULK_MAX_ITEMS', 100_000)
+
+
+@dataclass(frozen=True)
+class BulkConfig:
+    model: type
+    serializer_class: type
+    campos_sanitizados: tuple
+    chave: tuple               # Campos que identificam uma linha existente
+    campos_atualizados: tuple  # Campos sobrescritos quando a linha já existe
+    # Conflitos entre itens do próprio lote e com as linhas gravadas: {indice: conflitante}
+    conflitos_no_lote: Optional[Callable] = None
+    conflitos_no_banco: Optional[Callable] = None
+
+
+BULK_CONFIGS = {
+    'profissionais': BulkConfig(
+        model=Profissional,
+        serializer_class=ProfissionalBulkSerializer,
+        campos_sanitizados=CAMPOS_PROFISSIONAL,
+        chave=('id_profissional',),
+        campos_atualizados=('nome_completo', 'nome_social', 'profissao', 'endereco', 'latitude', 'longitude', 'geohash'),
+    ),
+    'contatos': BulkConfig(
+        model=Contato,
+        serializer_class=ContatoBulkSerializer,
+        campos_sanitizados=CAMPOS_CONTATO,
+        chave=('profissional_id', 'contato'),
+        campos_atualizados=('tipo',),
+    ),
+    'consultas': BulkConfig(
+        model=Consulta,
+        serializer_class=ConsultaBulkSerializer,
+        campos_sanitizados=(),
+        chave=('profissional_id', 'data_consulta'),
+        campos_atualizados=('duracao', 'data_fim'),
+        conflitos_no_lote=sobreposicoes_no_lote,
+        conflitos_no_banco=conflitos_com_o_banco,
+    ),
+}
+
+
+def _chunks(itens, tamanho):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def _erro(indice, mensagem):
+    return {'index': indice, 'status': 'error', 'errors': {'non_field_errors': [mensagem]}}
+
+
+def _validar(config, itens, resultados):
+    """
+    Valida todos os itens reaproveitando uma única instância do serializer.
+    Retorna a lista de (indice, dados_validados) dos itens válidos.
+    """
+    serializer = config.serializer_class()
+    validos = []
+    vistos = {}
+
+    with medir('serializer', config.model.__name__):
+        for indice, item in enumerate(itens):
+            if not isinstance(item, dict):
+                resultados[indice] = _erro(indice, 'Item deve ser um objeto')
+                continue
+            try:
+                dados = serializer.run_validation(sanitizar(item, config.campos_sanitizados))
+            except ValidationError as exc:
+                resultados[indice] = {'index': indice, 'status': 'error', 'errors': exc.detail}
+                continue
+
+            # A mesma chave não pode aparecer duas vezes no lote
+            chave = tuple(dados[campo] for campo in config.chave)
+            if chave in vistos:
+                resultados[indice] = _erro(indice, f'Item duplicado no lote (índice {vistos[chave]})')
+                continue
+            vistos[chave] = indice
+            validos.append((indice, dados))
+
+    if config.conflitos_no_lote:
+        conflitos = config.conflitos_no_lote(validos)
+        for indice, outro in conflitos.items():
+            resultados[indice] = _erro(indice, f'Sobreposição com outro item do lote (índice {outro})')
+        validos = [(indice, dados) for indice, dados in validos if indice not in conflitos]
+
+    return validos
+
+
+def _profissionais_existentes(ids):
+    return set(Profissional.objects.filter(id_profissional__in=ids).values_list('id_profissional', flat=True))
+
+
+def _chaves_existentes(config, lote):
+    """
+    Busca, em uma consulta, quais chaves do lote já existem no banco. Retorna
+    (existentes, excluidas): as excluídas são de profissionais excluídos logicamente,
+    que ainda ocupam a chave primária até o expurgo.
+    """
+    model = config.model
+    if model is Profissional:
+        campo = config.chave[0]
+        linhas = list(Profissional.todos.filter(**{f'{campo}__in': [dados[campo] for _, dados in lote]}).values_list(campo, 'excluido_em'))
+        return {(valor,) for valor, _ in linhas}, {(valor,) for valor, excluido_em in linhas if excluido_em is not None}
+
+    primeiro, segundo = config.chave
+    filtro = {
+        f'{primeiro}__in': {dados[primeiro] for _, dados in lote},
+        f'{segundo}__in': {dados[segundo] for _, dados in lote},
+    }
+    return set(model.objects.filter(**filtro).values_list(primeiro, segundo)), set()
+
+
+def _com_profissional(lote, resultados, existentes):
+    """Separa os itens cujo profissional está em `existentes`; os demais recebem o erro."""
+    pendentes = []
+    for indice, dados in lote:
+        if dados['profissional_id'] in existentes:
+            pendentes.append((indice, dados))
+        else:
+            resultados[indice] = {
+                'index': indice,
+                'status': 'error',
+                'errors': {'profissional': ['Não existe profissional vinculado ao id passado']},
+            }
+    return pendentes
+
+
+def _gravar_bloco(config, lote, resultados):
+    if not lote:
+        return
+    try:
+        _gravar_lote(config, lote, resultados)
+    except IntegrityError as exc:
+        # Falha no bloco (ex.: escrita concorrente): os demais blocos continuam
+        for indice, _ in lote:
+            resultados[indice] = _erro(indice, str(exc))
+
+
+def _gravar_lote(config, lote, resultados):
+    model = config.model
+    unique_fields = [campo.removesuffix('_id') for campo in config.chave]
+    with transaction.atomic():
+        # O UPDATE das versões vem primeiro: no SQLite ele pega o lock de escrita do banco
+        # (RESERVED) até o commit, de modo que a verificação de conflitos abaixo não corre
+        # contra outra escrita. Ver views.criar_vinculado para os limites dessa garantia
+        touch(*{dados.get('profissional_id', dados.get('id_profissional')) for _, dados in lote})
+        if config.conflitos_no_banco:
+            conflitos = config.conflitos_no_banco(lote)
+            for indice, id_conflitante in conflitos.items():
+                resultados[indice] = _erro(indice, MSG_SOBREPOSICAO.format(id_consulta=id_conflitante))
+            lote = [(indice, dados) for indice, dados in lote if indice not in conflitos]
+            if not lote:
+                return
+
+        existentes, excluidas = _chaves_existentes(config, lote)
+        if excluidas:
+            # O upsert gravaria por cima de um profissional que a API já não mostra
+            for indice, dados in lote:
+                if tuple(dados[campo] for campo in config.chave) in excluidas:
+                    resultados[indice] = _erro(indice, MSG_PROFISSIONAL_EXCLUIDO)
+            lote = [(indice, dados) for indice, dados in lote if resultados[indice] is None]
+            if not lote:
+                return
+        objetos = [model(**dados) for _, dados in lote]
+        model.objects.bulk_create(
+            objetos,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=list(config.campos_atualizados),
+        )
+
+    for (indice, dados), objeto in zip(lote, objetos):
+        chave = tuple(dados[campo] for campo in config.chave)
+        resultados[indice] = {
+            'index': indice,
+            'status': 'updated' if chave in existentes else 'created',
+            'id': objeto.pk,
+        }
+
+
+def bulk_upsert(model_name, itens, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Valida e grava uma lista de objetos do modelo informado, atualizando as linhas
+    que já existem (pela chave primária de Profissional ou pelo unique_together de
+    Contato/Consulta). Cada bloco de `chunk_size` itens é gravado em uma transação.
+
+    Retorna um relatório com o resultado de cada item, na ordem recebida.
+    """
+    config = BULK_CONFIGS[model_name]
+    resultados = [None] * len(itens)
+    validos = _validar(config, itens, resultados)
+    declarar_orcamento(BULK_QUERIES_PER_CHUNK[model_name] * -(-len(validos) // chunk_size))
+
+    for lote in _chunks(validos, chunk_size):
+        # Contatos e consultas: verifica a existência dos profissionais do bloco em uma consulta
+        if 'profissional_id' in config.chave:
+            lote = _com_profissional(lote, resultados, _profissionais_existentes({dados['profissional_id'] for _, dados in lote}))
+        _gravar_bloco(config, lote, resultados)
+
+    contagem = {'created': 0, 'updated': 0, 'error': 0}
+    for resultado in resultados:
+        contagem[resultado['status']] += 1
+
+    return {
+        'total': len(itens),
+        'created': contagem['created'],
+        'updated': contagem['updated'],
+        'failed': contagem['error'],
+        'results': resultados,
+    }
+
+
+def gravar_bloco(model_name, itens, profissionais):
+    """
+    Valida e grava `itens` em uma transação, como um bloco de `bulk_upsert`. A existência
+    dos profissionais é conferida no conjunto `profissionais` (ids carregados uma vez pelo
+    chamador), sem consulta por bloco. Usado pela importação de arquivos (importacao.py).
+    Retorna o resultado de cada item, na ordem recebida.
+    """
+    config = BULK_CONFIGS[model_name]
+    resultados = [None] * len(itens)
+    lote = _validar(config, itens, resultados)
+    if 'profissional_id' in config.chave:
+        lote = _com_profissional(lote, resultados, profissionais)
+    _gravar_bloco(config, lote, resultados)
+    return resultados
@@ -0,0 +1,125 @@
+import operator
+import re
+from contextlib import contextmanager
+from functools import reduce
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.db.models import Q
+
+from .models import Profissional
+from .serializers import PROFISSIONAL_LEVE
+
+
+# Tabela FTS5 criada pela migração 0005 e mantida pelos gatilhos do banco, que deixam de
+# fora os profissionais excluídos logicamente (migração 0007)
+TABELA_FTS = 'api_lacrei_profissional_fts'
+COLUNAS_FTS = ('nome_completo', 'nome_social', 'profissao', 'endereco')
+
+# Peso de cada coluna de COLUNAS_FTS na ordenação por relevância (bm25)
+BUSCA_PESOS = getattr(settings, 'LACREI_BUSCA_PESOS', (10.0, 8.0, 4.0, 1.0))
+
+# Resultados por busca (padrão e máximo) e quantidade máxima de termos considerados
+BUSCA_LIMITE = getattr(settings, 'LACREI_BUSCA_LIMITE', 20)
+BUSCA_MAX_LIMITE = getattr(settings, 'LACREI_BUSCA_MAX_LIMITE', 100)
+BUSCA_MAX_TERMOS = 8
+
+# Tamanho mínimo do último termo para ser tratado como prefixo. Uma letra casaria com
+# boa parte da tabela e não é atendida pelos índices de prefixo (2 a 4 letras)
+BUSCA_PREFIXO_MINIMO = 2
+
+_PALAVRA = re.compile(r'\w+')
+
+
+def termos(texto):
+    return _PALAVRA.findall(texto or '')[:BUSCA_MAX_TERMOS]
+
+
+def expressao_fts(texto):
+    """
+    Converte o texto digitado em uma consulta FTS5: todos os termos são obrigatórios e
+    vão entre aspas (operadores da sintaxe do FTS5 não chegam ao banco). O último termo
+    vira prefixo enquanto ainda está sendo digitado, isto é, sem espaço depois dele.
+    """
+    palavras = termos(texto)
+    if not palavras:
+        return None
+    partes = [f'"{palavra}"' for palavra in palavras]
+    if not texto[-1].isspace() and len(palavras[-1]) >= BUSCA_PREFIXO_MINIMO:
+        partes[-1] += '*'
+    return ' '.join(partes)
+
+
+def buscar_profissionais(texto, profissao=None, limite=BUSCA_LIMITE):
+    """
+    Profissionais que contêm todos os termos em nome, nome social, profissão ou endereço,
+    do mais ao menos relevante. Uma consulta: o índice FTS5 resolve os termos e ordena
+    pelo bm25; só as `limite` primeiras linhas são lidas da tabela de profissionais.
+    """
+    expressao = expressao_fts(texto)
+    if expressao is None:
+        return []
+    if connection.vendor != 'sqlite':
+        return _buscar_sem_indice(texto, profissao, limite)
+
+    tabela = Profissional._meta.db_table
+    colunas = ', '.join(f'p."{coluna}"' for coluna in PROFISSIONAL_LEVE.colunas)
+    pesos = ', '.join(str(float(peso)) for peso in BUSCA_PESOS)
+    filtro, params = '', []
+    if profissao:
+        filtro = f'JOIN "{tabela}" filtro ON filtro.id_profissional = {TABELA_FTS}.rowid AND filtro.profissao = %s'
+        params.append(profissao)
+    sql = (
+        f'SELECT {colunas} FROM ('
+        f'SELECT {TABELA_FTS}.rowid AS id, bm25({TABELA_FTS}, {pesos}) AS relevancia FROM {TABELA_FTS} {filtro} '
+        f'WHERE {TABELA_FTS} MATCH %s ORDER BY relevancia, id LIMIT %s'
+        f') ranking JOIN "{tabela}" p ON p.id_profissional = ranking.id ORDER BY ranking.relevancia, ranking.id'
+    )
+    params += [expressao, limite]
+
+    # SQL direto não passa pelo roteador: o banco de leitura (primário ou réplica) é escolhido aqui
+    with connections[router.db_for_read(Profissional)].cursor() as cursor:
+        cursor.execute(sql, params)
+        linhas = cursor.fetchall()
+    return PROFISSIONAL_LEVE.representar(linhas)
+
+
+def _buscar_sem_indice(texto, profissao, limite):
+    # Bancos sem FTS5: cada termo precisa aparecer em alguma das colunas (sem ranking)
+    filtros = [reduce(operator.or_, (Q(**{f'{coluna}__icontains': palavra}) for coluna in COLUNAS_FTS)) for palavra in termos(texto)]
+    profissionais = Profissional.objects.filter(*filtros).order_by('id_profissional')
+    if profissao:
+        profissionais = profissionais.filter(profissao=profissao)
+    return PROFISSIONAL_LEVE.representar(list(PROFISSIONAL_LEVE.linhas(profissionais[:limite])))
+
+
+@contextmanager
+def indice_suspenso():
+    """
+    Para cargas grandes: remove os gatilhos do índice durante o bloco e reconstrói o
+    índice inteiro no fim, o que é bem mais rápido que atualizá-lo linha a linha. Os
+    gatilhos são recriados com o SQL que estava no banco.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tabela = Profissional._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s AND name LIKE %s", [tabela, f'{TABELA_FTS}%'])
+        gatilhos = cursor.fetchall()
+        for nome, _ in gatilhos:
+            cursor.execute(f'DROP TRIGGER {nome}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in gatilhos:
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+            # O rebuild lê a tabela inteira: os excluídos que aguardam o expurgo saem de novo
+            colunas = ', '.join(COLUNAS_FTS)
+            cursor.execute(
+                f"INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, {colunas}) "
+                f"SELECT 'delete', id_profissional, {colunas} FROM {tabela} WHERE excluido_em IS NOT NULL"
+            )
+
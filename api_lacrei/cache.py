@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+# Backend de cache usado (qualquer alias de settings.CACHES) e validade das entradas em segundos
+CACHE_ALIAS = getattr(settings, 'LACREI_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'LACREI_CACHE_TIMEOUT', 300)
+
+_contadores = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_lock = threading.Lock()
+
+
+def _contar(nome, quantidade=1):
+    with _lock:
+        _contadores[nome] += quantidade
+
+
+def _chave_geracao(id_profissional):
+    return f'lacrei:geracao:{id_profissional}'
+
+
+def _geracao(backend, id_profissional):
+    """
+    Token que identifica a versão atual dos dados de um profissional. As entradas do
+    cache incluem o token na chave; trocar o token invalida todas de uma vez, inclusive
+    as de todas as páginas e filtros da listagem de consultas.
+    """
+    chave = _chave_geracao(id_profissional)
+    geracao = backend.get(chave)
+    if geracao is None:
+        backend.add(chave, uuid.uuid4().hex, None)
+        geracao = backend.get(chave)
+    return geracao
+
+
+def cached_payload(tipo, id_profissional, params, calcular):
+    """
+    Retorna o payload serializado de `tipo` para o profissional, calculando-o com
+    `calcular()` apenas quando não estiver no cache. Payloads None não são guardados.
+    """
+    backend = caches[CACHE_ALIAS]
+    geracao = _geracao(backend, id_profissional)
+    # Os filtros entram na chave como hash, para respeitar o limite de tamanho dos backends
+    filtros = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()
+    chave = f'lacrei:{tipo}:{id_profissional}:{geracao}:{filtros}'
+
+    payload = backend.get(chave)
+    if payload is not None:
+        _contar('hits')
+        return payload
+
+    _contar('misses')
+    payload = calcular()
+    if payload is not None:
+        backend.set(chave, payload, CACHE_TIMEOUT)
+    return payload
+
+
+async def _ageracao(backend, id_profissional):
+    chave = _chave_geracao(id_profissional)
+    geracao = await backend.aget(chave)
+    if geracao is None:
+        await backend.aadd(chave, uuid.uuid4().hex, None)
+        geracao = await backend.aget(chave)
+    return geracao
+
+
+async def acached_payload(tipo, id_profissional, params, calcular):
+    """Versão assíncrona de `cached_payload`; `calcular` é uma corrotina."""
+    backend = caches[CACHE_ALIAS]
+    geracao = await _ageracao(backend, id_profissional)
+    filtros = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()
+    chave = f'lacrei:{tipo}:{id_profissional}:{geracao}:{filtros}'
+
+    payload = await backend.aget(chave)
+    if payload is not None:
+        _contar('hits')
+        return payload
+
+    _contar('misses')
+    payload = await calcular()
+    if payload is not None:
+        await backend.aset(chave, payload, CACHE_TIMEOUT)
+    return payload
+
+
+def invalidar(*ids_profissionais):
+    """
+    Descarta tudo o que está em cache para os profissionais informados. Dentro de uma
+    transação a troca é feita agora e repetida após o commit, para que uma leitura
+    concorrente não deixe os dados antigos de volta no cache.
+    """
+    from .replicas import fixar_profissionais
+
+    ids = {id_profissional for id_profissional in ids_profissionais if id_profissional is not None}
+    if not ids:
+        return
+
+    def trocar_geracao():
+        caches[CACHE_ALIAS].set_many({_chave_geracao(id_profissional): uuid.uuid4().hex for id_profissional in ids}, None)
+        # As leituras desses profissionais ficam no primário enquanto as réplicas se atualizam
+        fixar_profissionais(*ids)
+
+    trocar_geracao()
+    _contar('invalidations', len(ids))
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(trocar_geracao)
+
+
+async def ainvalidar(*ids_profissionais):
+    """Versão assíncrona de `invalidar` (o ORM assíncrono trabalha em autocommit)."""
+    from .replicas import afixar_profissionais
+
+    ids = {id_profissional for id_profissional in ids_profissionais if id_profissional is not None}
+    if not ids:
+        return
+    await caches[CACHE_ALIAS].aset_many({_chave_geracao(id_profissional): uuid.uuid4().hex for id_profissional in ids}, None)
+    await afixar_profissionais(*ids)
+    _contar('invalidations', len(ids))
+
+
+def cache_stats():
+    with _lock:
+        estatisticas = dict(_contadores)
+    leituras = estatisticas['hits'] + estatisticas['misses']
+    estatisticas['hit_ratio'] = estatisticas['hits'] / leituras if leituras else 0.0
+    return estatisticas
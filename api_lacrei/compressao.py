@@ -0,0 +1,147 @@
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .metrics import medir
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional: sem ela, só gzip
+    brotli = None
+
+
+# Respostas menores que isso (em bytes) vão sem compressão: o ganho não paga o tempo
+COMPRESSAO_MINIMO = getattr(settings, 'LACREI_COMPRESSAO_MINIMO', 1024)
+
+# Níveis de compressão: respostas dinâmicas pedem níveis rápidos (o brotli vai até 11)
+GZIP_NIVEL = getattr(settings, 'LACREI_GZIP_NIVEL', 6)
+BROTLI_QUALIDADE = getattr(settings, 'LACREI_BROTLI_QUALIDADE', 4)
+
+# Tipos que já vêm comprimidos (ex.: a exportação com gzip=1)
+TIPOS_COMPRIMIDOS = ('application/gzip', 'application/zip', 'image/', 'video/', 'audio/')
+
+
+def codificacoes_aceitas(accept_encoding):
+    """{codificação: q} do header Accept-Encoding (q=0 recusa; '*' vale para as demais)."""
+    aceitas = {}
+    for parte in accept_encoding.split(','):
+        nome, _, parametros = parte.strip().partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.strip().partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        aceitas[nome] = q
+    return aceitas
+
+
+def escolher_codificacao(accept_encoding):
+    """'br', 'gzip' ou None, pela preferência do cliente (com empate, br comprime mais)."""
+    aceitas = codificacoes_aceitas(accept_encoding)
+    curinga = aceitas.get('*', 0.0)
+    candidatas = [('gzip', aceitas.get('gzip', aceitas.get('x-gzip', curinga)))]
+    if brotli is not None:
+        candidatas.insert(0, ('br', aceitas.get('br', curinga)))
+    nome, q = max(candidatas, key=lambda candidata: candidata[1])
+    return nome if q > 0 else None
+
+
+def comprimir(conteudo, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(conteudo, quality=BROTLI_QUALIDADE)
+    # mtime=0: o mesmo conteúdo gera sempre os mesmos bytes
+    return gzip.compress(conteudo, compresslevel=GZIP_NIVEL, mtime=0)
+
+
+def _compressor(codificacao):
+    """(comprimir_bloco, finalizar) para respostas enviadas em blocos."""
+    if codificacao == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALIDADE)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    # Z_SYNC_FLUSH: cada bloco chega ao cliente assim que é gerado
+    return (lambda bloco: compressor.compress(bloco) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+def _comprimir_blocos(blocos, codificacao):
+    comprimir_bloco, finalizar = _compressor(codificacao)
+    for bloco in blocos:
+        saida = comprimir_bloco(bloco)
+        if saida:
+            yield saida
+    yield finalizar()
+
+
+async def _acomprimir_blocos(blocos, codificacao):
+    comprimir_bloco, finalizar = _compressor(codificacao)
+    async for bloco in blocos:
+        saida = comprimir_bloco(bloco)
+        if saida:
+            yield saida
+    yield finalizar()
+
+
+class CompressaoMiddleware:
+    """
+    Comprime as respostas com brotli (se instalado) ou gzip, conforme o Accept-Encoding,
+    a partir de COMPRESSAO_MINIMO bytes. Respostas em blocos (exportação) são comprimidas
+    bloco a bloco. Como o GZipMiddleware do Django, torna o ETag fraco: o If-None-Match
+    continua valendo para as duas representações.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._comprimir(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._comprimir(request, await self.get_response(request))
+
+    def _comprimir(self, request, response):
+        if response.has_header('Content-Encoding') or response.get('Content-Type', '').startswith(TIPOS_COMPRIMIDOS):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSAO_MINIMO:
+            return response
+
+        # A resposta depende do Accept-Encoding, mesmo quando vai sem compressão
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacao is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acomprimir_blocos(response.streaming_content, codificacao)
+            else:
+                response.streaming_content = _comprimir_blocos(response.streaming_content, codificacao)
+            del response['Content-Length']
+        else:
+            with medir('compress'):
+                comprimido = comprimir(response.content, codificacao)
+            # Conteúdo que não diminui (já comprimido ou aleatório) vai como está
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificacao
+        return response
@@ -0,0 +1,104 @@
+import datetime
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Consulta, ConsultaArquivada, ResumoDiario
+
+
+# Maior período (em dias) de uma consulta às estatísticas
+ESTATISTICAS_MAX_DIAS = getattr(settings, 'LACREI_ESTATISTICAS_MAX_DIAS', 366)
+
+# Agrupamento das datas: o próprio dia ou o primeiro dia da semana (segunda) ou do mês
+PERIODOS = {
+    'dia': lambda dia: dia,
+    'semana': lambda dia: dia - datetime.timedelta(days=dia.weekday()),
+    'mes': lambda dia: dia.replace(day=1),
+}
+
+# Chave de cada agrupamento na resposta e o campo correspondente do resumo
+AGRUPAMENTOS = {
+    'profissional': ('id_profissional', 'profissional_id'),
+    'profissao': ('profissao', 'profissional__profissao'),
+}
+
+
+def agregar(inicio, fim, periodo='dia', agrupar='profissional', id_profissional=None, profissao=None):
+    """
+    Consultas de [inicio, fim] (datas UTC) por período e por profissional ou profissão,
+    somadas no banco a partir do resumo diário: o custo depende de quantos dias e
+    profissionais o período tem, e não de quantas consultas. Profissionais excluídos
+    ficam de fora, como nas demais leituras.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"O parâmetro periodo deve ser um de: {', '.join(PERIODOS)}")
+    if agrupar not in AGRUPAMENTOS:
+        raise ValueError(f"O parâmetro agrupar deve ser um de: {', '.join(AGRUPAMENTOS)}")
+
+    resumos = ResumoDiario.objects.filter(dia__gte=inicio, dia__lte=fim, profissional__excluido_em__isnull=True)
+    if id_profissional is not None:
+        resumos = resumos.filter(profissional_id=id_profissional)
+    if profissao:
+        resumos = resumos.filter(profissional__profissao=profissao)
+
+    # O banco soma por grupo e dia (no máximo dias x grupos linhas); semanas e meses são
+    # juntados aqui, sem uma função de data por linha no SQL
+    chave, campo = AGRUPAMENTOS[agrupar]
+    truncar = PERIODOS[periodo]
+    totais = {}
+    linhas = resumos.values_list(campo, 'dia').annotate(consultas=Sum('total')).order_by(campo, 'dia')
+    for grupo, dia, total in linhas:
+        periodo_do_dia = grupo, truncar(dia)
+        totais[periodo_do_dia] = totais.get(periodo_do_dia, 0) + total
+    return [{chave: grupo, 'period': data, 'count': total} for (grupo, data), total in totais.items()]
+
+
+def contagens(using=None):
+    """{(profissional_id, dia): consultas} calculado das consultas (e do arquivo), sem o resumo."""
+    reais = {}
+    for model in (Consulta, ConsultaArquivada):
+        linhas = (
+            model.objects.using(using)
+            .values_list('profissional_id', TruncDate('data_consulta', tzinfo=datetime.timezone.utc))
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        for profissional_id, dia, total in linhas:
+            reais[profissional_id, dia] = reais.get((profissional_id, dia), 0) + total
+    return reais
+
+
+def divergencias(using=None):
+    """
+    Compara o resumo com as contagens calculadas das consultas. Retorna uma lista de
+    (profissional_id, dia, no_resumo, real) dos dias que não batem.
+    """
+    reais = contagens(using)
+    resumo = {
+        (profissional_id, dia): total
+        for profissional_id, dia, total in ResumoDiario.objects.using(using).values_list('profissional_id', 'dia', 'total')
+    }
+    return sorted(
+        (profissional_id, dia, resumo.get((profissional_id, dia), 0), reais.get((profissional_id, dia), 0))
+        for profissional_id, dia in resumo.keys() | reais.keys()
+        if resumo.get((profissional_id, dia), 0) != reais.get((profissional_id, dia), 0)
+    )
+
+
+def reconstruir(lote=5000):
+    """
+    Recalcula o resumo inteiro a partir das consultas, em uma transação: as escritas
+    de consultas esperam o fim da reconstrução e nenhuma fica de fora. Retorna quantas
+    linhas o resumo passou a ter.
+    """
+    using = router.db_for_write(ResumoDiario)
+    with transaction.atomic(using=using):
+        ResumoDiario.objects.using(using).all()._raw_delete(using)
+        linhas = [
+            ResumoDiario(profissional_id=profissional_id, dia=dia, total=total)
+            for (profissional_id, dia), total in contagens(using).items()
+        ]
+        ResumoDiario.objects.using(using).bulk_create(linhas, batch_size=lote)
+    return len(linhas)
@@ -0,0 +1,86 @@
+import time
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import invalidar
+from .models import Profissional, Contato, Consulta, ConsultaArquivada, HorarioAtendimento, ResumoDiario
+
+
+# Linhas removidas por transação no expurgo: cada lote segura o lock de escrita do banco
+# por pouco tempo, e as requisições seguem entre um lote e outro
+EXPURGO_LOTE = getattr(settings, 'LACREI_EXPURGO_LOTE', 1000)
+
+# Tabelas que dependem do profissional, esvaziadas antes dele
+DEPENDENTES = (Contato, Consulta, ConsultaArquivada, HorarioAtendimento, ResumoDiario)
+
+
+def excluir_profissional(id_profissional):
+    """
+    Exclusão lógica: um UPDATE, qualquer que seja a quantidade de contatos e consultas.
+    A partir do commit o profissional some da API, da busca textual (os gatilhos do FTS5
+    o tiram do índice) e da busca por proximidade (sem geohash, fica fora das faixas);
+    `expurgar` remove as linhas depois. Retorna False se o profissional não existe.
+    """
+    agora = timezone.now()
+    excluidos = Profissional.objects.filter(id_profissional=id_profissional).update(
+        excluido_em=agora, geohash=None, versao=F('versao') + 1, atualizado_em=agora,
+    )
+    if excluidos:
+        invalidar(id_profissional)
+    return bool(excluidos)
+
+
+def _apagar(queryset):
+    # DELETE direto pelo filtro, sem o coletor do Django: ele carrega as linhas para
+    # exclusões em cascata e passa a fazê-lo para todas assim que houver um receptor de
+    # pre_delete/post_delete no modelo. `queryset.db` seria o banco de leitura (réplica)
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def excluir_definitivamente(ids_profissionais):
+    """
+    Remove os profissionais (excluídos logicamente ou não) e tudo que depende deles
+    com um DELETE por tabela, sem carregar nenhuma linha. Retorna quantos
+    profissionais foram removidos.
+    """
+    ids = list(ids_profissionais)
+    with transaction.atomic():
+        # Marcados como excluídos antes, o feed de alterações registra só a exclusão de cada
+        # profissional, e não a de cada contato e consulta (ver migração 0008)
+        Profissional.objects.filter(id_profissional__in=ids).update(excluido_em=timezone.now())
+        for model in DEPENDENTES:
+            _apagar(model.objects.filter(profissional_id__in=ids))
+        removidos = _apagar(Profissional.todos.filter(id_profissional__in=ids))
+    if removidos:
+        invalidar(*ids)
+    return removidos
+
+
+def expurgar(lote=EXPURGO_LOTE, pausa=0.0):
+    """
+    Remove os profissionais excluídos logicamente: primeiro os contatos, consultas
+    (também as arquivadas), horários e o resumo diário, no máximo `lote` linhas por
+    transação, depois os próprios profissionais.
+    `pausa` (segundos) entre os lotes deixa o banco livre para as demais escritas.
+    Produz (modelo, linhas removidas) a cada transação.
+    """
+    while True:
+        ids = list(Profissional.todos.filter(excluido_em__isnull=False).values_list('id_profissional', flat=True)[:lote])
+        if not ids:
+            return
+        for model in DEPENDENTES:
+            while True:
+                # Um DELETE por lote (pk IN (SELECT ... LIMIT)), que é a própria transação
+                lote_atual = model.objects.filter(profissional_id__in=ids).values('pk')[:lote]
+                removidas = _apagar(model.objects.filter(pk__in=lote_atual))
+                if not removidas:
+                    break
+                yield model, removidas
+                if pausa:
+                    time.sleep(pausa)
+        # A API não grava linhas para um profissional excluído; o que uma escrita que já
+        # estava em andamento tenha gravado sai junto com ele, aqui
+        yield Profissional, excluir_definitivamente(ids)
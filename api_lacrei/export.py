@@ -0,0 +1,127 @@
+import csv
+import heapq
+import io
+import json
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+from .models import Profissional, Contato, Consulta, ConsultaArquivada
+from .serializers import ProfissionalSerializer
+from .utils import datetime_formatter
+
+
+# Linhas lidas do banco por vez e escritas em cada bloco da resposta
+EXPORT_CHUNK_SIZE = getattr(settings, 'LACREI_EXPORT_CHUNK_SIZE', 2000)
+
+EXPORT_MODELS = {
+    'profissionais': Profissional,
+    'contatos': Contato,
+    'consultas': Consulta,
+}
+
+# Tabelas de arquivo cujas linhas saem na exportação do modelo, com as mesmas colunas
+EXPORT_ARQUIVO = {
+    Consulta: ConsultaArquivada,
+}
+
+# Campos de controle que também ficam fora da API
+EXPORT_EXCLUDE = {
+    Profissional: ProfissionalSerializer.Meta.exclude,
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _campos(model):
+    """Retorna (nomes, colunas, conversores) dos campos exportados, na ordem do modelo."""
+    formatar = datetime_formatter()
+    nomes, colunas, conversores = [], [], []
+    for field in model._meta.concrete_fields:
+        if field.name in EXPORT_EXCLUDE.get(model, ()):
+            continue
+        nomes.append(field.name)
+        colunas.append(field.attname)
+        # Datas no mesmo formato dos serializers da API
+        conversores.append(formatar if isinstance(field, models.DateTimeField) else None)
+    return nomes, colunas, conversores
+
+
+def iter_rows(model, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """
+    Percorre a tabela com um iterador do lado do servidor, sem carregar o resultado
+    inteiro. Produz listas de até `chunk_size` dicionários já convertidos. `using` fixa
+    o banco lido (o iterador roda depois da view, fora do roteamento da requisição).
+    """
+    nomes, colunas, conversores = _campos(model)
+    convertidos = [(indice, conversor) for indice, conversor in enumerate(conversores) if conversor]
+
+    def ler(model):
+        linhas = model.objects.using(using).order_by('pk')
+        if model is not Profissional:
+            # Contatos e consultas de profissionais excluídos saem junto com eles, antes do expurgo
+            linhas = linhas.filter(profissional__excluido_em__isnull=True)
+        return linhas.values_list(*colunas).iterator(chunk_size=chunk_size)
+
+    linhas = ler(model)
+    if model in EXPORT_ARQUIVO:
+        # As duas tabelas em ordem de pk (os ids não se repetem): a saída continua ordenada
+        posicao = colunas.index(model._meta.pk.attname)
+        linhas = heapq.merge(linhas, ler(EXPORT_ARQUIVO[model]), key=lambda linha: linha[posicao])
+
+    bloco = []
+    for linha in linhas:
+        if convertidos:
+            linha = list(linha)
+            for indice, conversor in convertidos:
+                if linha[indice] is not None:
+                    linha[indice] = conversor(linha[indice])
+        bloco.append(dict(zip(nomes, linha)))
+        if len(bloco) >= chunk_size:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def iter_ndjson(model, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    for bloco in iter_rows(model, chunk_size, using):
+        yield ''.join(json.dumps(linha, ensure_ascii=False) + '\n' for linha in bloco).encode()
+
+
+def iter_csv(model, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    nomes = _campos(model)[0]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=nomes)
+    writer.writeheader()
+
+    for bloco in iter_rows(model, chunk_size, using):
+        writer.writerows(bloco)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Tabela vazia: entrega ao menos o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_stream(blocos):
+    """Comprime um fluxo de bytes em formato gzip, bloco a bloco."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloco in blocos:
+        comprimido = compressor.compress(bloco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def export_stream(model_name, formato='ndjson', gzip=False, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """Retorna o iterador de bytes da exportação do modelo no formato pedido."""
+    model = EXPORT_MODELS[model_name]
+    stream = iter_csv(model, chunk_size, using) if formato == 'csv' else iter_ndjson(model, chunk_size, using)
+    return gzip_stream(stream) if gzip else stream
@@ -0,0 +1,120 @@
+import math
+
+
+# Alfabeto do geohash (base 32 sem a, i, l, o)
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_PROXIMO = {atual: seguinte for atual, seguinte in zip(BASE32, BASE32[1:])}
+
+# Precisão gravada no banco: 9 caracteres são células de ~5 m x 5 m
+PRECISAO = 9
+
+RAIO_TERRA_KM = 6371.0088
+
+
+def codificar(latitude, longitude, precisao=PRECISAO):
+    """Geohash do ponto: bits alternados de longitude e latitude, 5 por caractere."""
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    caracteres = []
+    valor, bits, longitude_da_vez = 0, 0, True
+    while len(caracteres) < precisao:
+        if longitude_da_vez:
+            meio = (lon_min + lon_max) / 2
+            if longitude >= meio:
+                valor, lon_min = valor * 2 + 1, meio
+            else:
+                valor, lon_max = valor * 2, meio
+        else:
+            meio = (lat_min + lat_max) / 2
+            if latitude >= meio:
+                valor, lat_min = valor * 2 + 1, meio
+            else:
+                valor, lat_max = valor * 2, meio
+        longitude_da_vez = not longitude_da_vez
+        bits += 1
+        if bits == 5:
+            caracteres.append(BASE32[valor])
+            valor, bits = 0, 0
+    return ''.join(caracteres)
+
+
+def tamanho_celula(precisao):
+    """(altura, largura) em graus das células de uma precisão."""
+    bits = 5 * precisao
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """Distância sobre a superfície da Terra (fórmula de haversine)."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caixa(latitude, longitude, raio_km):
+    """
+    Retângulos (lat_min, lat_max, lon_min, lon_max) que contêm o círculo de `raio_km`.
+    Um círculo que cruza o antimeridiano vira dois retângulos; um que alcança um polo
+    ocupa todas as longitudes.
+    """
+    angulo = raio_km / RAIO_TERRA_KM
+    lat_min, lat_max = latitude - math.degrees(angulo), latitude + math.degrees(angulo)
+    if lat_min <= -90.0 or lat_max >= 90.0:
+        return [(max(-90.0, lat_min), min(90.0, lat_max), -180.0, 180.0)]
+
+    # Maior diferença de longitude dentro do círculo (calota esférica)
+    delta_lon = math.degrees(math.asin(math.sin(angulo) / math.cos(math.radians(latitude))))
+    lon_min, lon_max = longitude - delta_lon, longitude + delta_lon
+    if lon_min < -180.0:
+        return [(lat_min, lat_max, lon_min + 360.0, 180.0), (lat_min, lat_max, -180.0, lon_max)]
+    if lon_max > 180.0:
+        return [(lat_min, lat_max, lon_min, 180.0), (lat_min, lat_max, -180.0, lon_max - 360.0)]
+    return [(lat_min, lat_max, lon_min, lon_max)]
+
+
+def _indices(minimo, maximo, origem, tamanho, limite):
+    return range(int((minimo - origem) // tamanho), min(int((maximo - origem) // tamanho), limite - 1) + 1)
+
+
+def celulas(retangulos, max_celulas):
+    """
+    Menor conjunto de células de mesma precisão que cobre os retângulos: a precisão mais
+    fina cuja cobertura não passa de `max_celulas` células.
+    """
+    for precisao in range(PRECISAO, 0, -1):
+        altura, largura = tamanho_celula(precisao)
+        faixas = [
+            (_indices(lat_min, lat_max, -90.0, altura, round(180.0 / altura)),
+             _indices(lon_min, lon_max, -180.0, largura, round(360.0 / largura)))
+            for lat_min, lat_max, lon_min, lon_max in retangulos
+        ]
+        if sum(len(linhas) * len(colunas) for linhas, colunas in faixas) <= max_celulas or precisao == 1:
+            return sorted({
+                codificar(-90.0 + (linha + 0.5) * altura, -180.0 + (coluna + 0.5) * largura, precisao)
+                for linhas, colunas in faixas for linha in linhas for coluna in colunas
+            })
+
+
+def _seguinte(prefixo):
+    """Primeiro geohash depois de todos os que começam com `prefixo` (None: não há)."""
+    while prefixo and prefixo[-1] == BASE32[-1]:
+        prefixo = prefixo[:-1]
+    if not prefixo:
+        return None
+    return prefixo[:-1] + _PROXIMO[prefixo[-1]]
+
+
+def intervalos(prefixos):
+    """
+    Converte prefixos ordenados em intervalos [inicio, fim) de geohash, juntando os que
+    são vizinhos na ordem do índice. `fim` None significa sem limite superior.
+    """
+    resultado = []
+    for prefixo in prefixos:
+        fim = _seguinte(prefixo)
+        # '6gyg0' continua o intervalo que termina em '6gyg': não há geohash entre os dois
+        if resultado and resultado[-1][1] == prefixo.rstrip(BASE32[0]):
+            resultado[-1] = (resultado[-1][0], fim)
+        else:
+            resultado.append((prefixo, fim))
+    return resultado
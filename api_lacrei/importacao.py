@@ -0,0 +1,204 @@
+import csv
+import gzip
+import html
+import json
+import os
+from dataclasses import asdict, dataclass, replace
+
+from django.conf import settings
+
+from .bulk import BULK_CONFIGS, gravar_bloco
+from .models import Profissional
+from .parsers import _ndjson_loads
+
+
+# Registros gravados por transação na importação (cada bloco é um upsert em lote)
+IMPORTACAO_LOTE = getattr(settings, 'LACREI_IMPORTACAO_LOTE', 2000)
+
+IMPORT_MODELS = tuple(BULK_CONFIGS)
+
+# Formato de cada extensão aceita (o arquivo pode estar comprimido com gzip: .csv.gz)
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+@dataclass
+class Progresso:
+    model_name: str
+    registros: int = 0         # Registros do arquivo já processados (gravados ou rejeitados)
+    importados: int = 0
+    rejeitados: int = 0
+    bytes_rejeitados: int = 0  # Tamanho do arquivo de rejeitados depois do último bloco
+    retomado_em: int = 0       # Registros já processados quando esta execução começou
+    posicao: int = 0           # Byte (do conteúdo descomprimido) logo depois do último registro processado
+    linhas: int = 0            # Linhas do arquivo até `posicao` (numeração dos rejeitados)
+
+
+def formato_do_arquivo(caminho):
+    extensao = os.path.splitext(caminho.removesuffix('.gz'))[1].lower()
+    if extensao not in IMPORT_FORMATS:
+        raise ValueError(f"Formato não reconhecido para {caminho}: use {', '.join(IMPORT_FORMATS)} (opcionalmente .gz)")
+    return IMPORT_FORMATS[extensao]
+
+
+def _abrir(caminho):
+    # Modo binário: a posição de cada registro (tell) é guardada no progresso
+    if caminho.endswith('.gz'):
+        return gzip.open(caminho, 'rb')
+    return open(caminho, 'rb')
+
+
+def registros(arquivo, formato, posicao=0, linhas=0):
+    """
+    Lê o arquivo (aberto em modo binário) registro a registro, sem carregá-lo na memória.
+    Produz (linha, item, erro, posicao): `erro` é a mensagem de um registro ilegível (item
+    None) e `posicao` é o byte logo depois do registro. Com `posicao`/`linhas` de um
+    progresso salvo, a leitura continua desse byte (seek), sem reler nem interpretar os
+    registros anteriores; no CSV, só o cabeçalho é lido antes.
+    """
+    atual = {'linhas': linhas, 'posicao': posicao}
+
+    def ler_linhas():
+        for linha in iter(arquivo.readline, b''):
+            atual['linhas'] += 1
+            atual['posicao'] = arquivo.tell()
+            yield linha
+
+    if formato == 'csv':
+        cabecalho = next(csv.reader([arquivo.readline().decode('utf-8')]), None)
+        if not cabecalho:
+            return
+        if posicao:
+            arquivo.seek(posicao)
+        else:
+            atual.update(linhas=1, posicao=arquivo.tell())
+        leitor = csv.DictReader((linha.decode('utf-8') for linha in ler_linhas()), fieldnames=cabecalho)
+        for linha in leitor:
+            # Colunas vazias ficam de fora, como os campos opcionais omitidos no JSON (a
+            # exportação em CSV escreve None como vazio)
+            item = {campo: valor for campo, valor in linha.items() if campo is not None and valor != ''}
+            yield atual['linhas'], item, None, atual['posicao']
+        return
+
+    arquivo.seek(posicao)
+    for linha in ler_linhas():
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            yield atual['linhas'], _ndjson_loads(linha), None, atual['posicao']
+        except ValueError as exc:
+            yield atual['linhas'], None, f'NDJSON inválido: {exc}', atual['posicao']
+
+
+def _desfazer_escape(item, campos):
+    """
+    Arquivo já escapado (--ja-escapado, ex.: gerado pela exportação, que escreve os valores
+    como estão no banco): os campos sanitizados voltam ao texto original, e a sanitização
+    da gravação chega de novo ao mesmo valor, sem escapá-lo duas vezes.
+    """
+    if not isinstance(item, dict):
+        return item
+    return {
+        campo: html.unescape(valor) if campo in campos and isinstance(valor, str) else valor
+        for campo, valor in item.items()
+    }
+
+
+def _carregar_estado(caminho, model_name):
+    if not os.path.exists(caminho):
+        return Progresso(model_name)
+    with open(caminho, encoding='utf-8') as arquivo:
+        progresso = Progresso(**json.load(arquivo))
+    if progresso.model_name != model_name:
+        raise ValueError(f'{caminho} é o progresso de uma importação de {progresso.model_name}')
+    return progresso
+
+
+def _salvar_estado(caminho, progresso):
+    # Escrita atômica: um crash deixa o estado anterior ou o novo, nunca um arquivo pela metade
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(asdict(progresso), arquivo)
+    os.replace(temporario, caminho)
+
+
+def importar(
+    model_name, caminho, formato=None, lote=IMPORTACAO_LOTE, rejeitados=None, estado=None, recomecar=False,
+    ja_escapado=False,
+):
+    """
+    Importa profissionais, contatos ou consultas de um arquivo CSV ou NDJSON com as
+    regras da inserção em lote (mesmos serializers, upsert pela mesma chave e, nas
+    consultas, a verificação de sobreposição), `lote` registros por transação.
+
+    Os ids dos profissionais existentes são carregados uma vez, e os contatos e consultas
+    são conferidos nesse conjunto, sem consulta por registro. Os registros recusados vão
+    para `rejeitados` (NDJSON com a linha, os erros e o registro).
+
+    Depois de cada bloco o progresso é gravado em `estado`, com a posição (byte) do
+    último registro confirmado: rodar de novo depois de uma interrupção continua dessa
+    posição, sem reler os registros já importados (o upsert torna a repetição de um
+    bloco inofensiva). O estado é removido no fim. Produz uma cópia do Progresso a cada
+    bloco.
+
+    O arquivo deve trazer o texto sem escape, como o corpo de um POST, e passa pela mesma
+    sanitização. Com `ja_escapado` (ex.: um arquivo da exportação), o escape dos campos
+    sanitizados é desfeito antes, para que eles não sejam escapados duas vezes.
+    """
+    formato = formato or formato_do_arquivo(caminho)
+    rejeitados = rejeitados or f'{caminho}.rejeitados.ndjson'
+    estado = estado or f'{caminho}.progresso'
+    if recomecar and os.path.exists(estado):
+        os.remove(estado)
+    progresso = _carregar_estado(estado, model_name)
+    progresso.retomado_em = progresso.registros
+
+    campos_escapados = BULK_CONFIGS[model_name].campos_sanitizados if ja_escapado else ()
+    profissionais = None
+    if 'profissional_id' in BULK_CONFIGS[model_name].chave:
+        profissionais = set(Profissional.objects.values_list('id_profissional', flat=True))
+
+    with _abrir(caminho) as arquivo, open(rejeitados, 'a+b') as saida:
+        # Descarta o que foi escrito depois do último bloco confirmado
+        saida.truncate(progresso.bytes_rejeitados)
+        saida.seek(progresso.bytes_rejeitados)
+
+        def gravar(bloco):
+            legiveis = [(linha, item) for linha, item, erro, _ in bloco if erro is None]
+            itens = [_desfazer_escape(item, campos_escapados) for _, item in legiveis]
+            resultados = gravar_bloco(model_name, itens, profissionais)
+            recusados = [(linha, None, {'non_field_errors': [erro]}) for linha, _, erro, _ in bloco if erro is not None]
+            recusados += [
+                (linha, item, resultado['errors'])
+                for (linha, item), resultado in zip(legiveis, resultados) if resultado['status'] == 'error'
+            ]
+            for linha, item, erros in sorted(recusados, key=lambda recusado: recusado[0]):
+                saida.write(json.dumps({'line': linha, 'errors': erros, 'item': item}, ensure_ascii=False).encode() + b'\n')
+            saida.flush()
+
+            progresso.registros += len(bloco)
+            progresso.rejeitados += len(recusados)
+            progresso.importados += len(bloco) - len(recusados)
+            progresso.bytes_rejeitados = saida.tell()
+            progresso.linhas, progresso.posicao = bloco[-1][0], bloco[-1][3]
+            _salvar_estado(estado, progresso)
+
+        bloco = []
+        for registro in registros(arquivo, formato, progresso.posicao, progresso.linhas):
+            bloco.append(registro)
+            if len(bloco) >= lote:
+                gravar(bloco)
+                bloco = []
+                yield replace(progresso)
+        if bloco:
+            gravar(bloco)
+            yield replace(progresso)
+
+    if os.path.exists(estado):
+        os.remove(estado)
+    if not progresso.rejeitados:
+        os.remove(rejeitados)
@@ -0,0 +1,39 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_lacrei.arquivo import ARQUIVO_HORIZONTE, ARQUIVO_HORIZONTE_MINIMO, ARQUIVO_LOTE, arquivar
+from api_lacrei.models import Consulta, ConsultaArquivada
+
+
+class Command(BaseCommand):
+    help = (
+        'Move as consultas antigas para o arquivo (ConsultaArquivada), em lotes: a tabela de '
+        'consultas e seus índices ficam com as consultas recentes e futuras.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizonte-dias', type=float, default=ARQUIVO_HORIZONTE.total_seconds() / 86400,
+                            help='Arquiva as consultas que começaram há mais que esse número de dias')
+        parser.add_argument('--lote', type=int, default=ARQUIVO_LOTE, help='Consultas movidas por transação')
+        parser.add_argument('--pausa', type=float, default=0.0, help='Segundos de espera entre os lotes')
+        parser.add_argument(
+            '--intervalo', type=float, default=0.0,
+            help='Continua rodando e arquiva de novo a cada INTERVALO segundos (0: roda uma vez)',
+        )
+
+    def handle(self, *args, **options):
+        horizonte = datetime.timedelta(days=options['horizonte_dias'])
+        if horizonte < ARQUIVO_HORIZONTE_MINIMO:
+            raise CommandError(f'--horizonte-dias deve ser pelo menos {ARQUIVO_HORIZONTE_MINIMO.days}')
+        while True:
+            inicio = time.perf_counter()
+            lotes = list(arquivar(horizonte, options['lote'], options['pausa']))
+            self.stderr.write(
+                f'Consultas arquivadas: {sum(lotes)} em {len(lotes)} lotes, em {time.perf_counter() - inicio:.2f}s '
+                f'({Consulta.objects.count()} na tabela principal, {ConsultaArquivada.objects.count()} no arquivo)'
+            )
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
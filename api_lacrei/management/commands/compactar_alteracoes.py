@@ -0,0 +1,37 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_lacrei.alteracoes import ALTERACOES_RETENCAO, COMPACTACAO_LOTE, compactar
+from api_lacrei.models import Alteracao
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacta o feed de alterações: descarta as alterações mais velhas que a retenção e '
+        'mantém só a mais nova de cada objeto.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retencao-dias', type=float, default=ALTERACOES_RETENCAO.total_seconds() / 86400,
+                            help='Por quantos dias as alterações ficam no feed')
+        parser.add_argument('--lote', type=int, default=COMPACTACAO_LOTE, help='Posições do feed examinadas por DELETE')
+        parser.add_argument('--pausa', type=float, default=0.0, help='Segundos de espera entre os lotes')
+        parser.add_argument(
+            '--intervalo', type=float, default=0.0,
+            help='Continua rodando e compacta de novo a cada INTERVALO segundos (0: roda uma vez)',
+        )
+
+    def handle(self, *args, **options):
+        retencao = datetime.timedelta(days=options['retencao_dias'])
+        while True:
+            inicio = time.perf_counter()
+            removidas = sum(compactar(retencao, options['lote'], options['pausa']))
+            self.stderr.write(
+                f'Feed compactado: {removidas} alterações removidas, {Alteracao.objects.count()} restantes, '
+                f'em {time.perf_counter() - inicio:.2f}s'
+            )
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,36 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_lacrei.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_MODELS, export_stream
+
+
+class Command(BaseCommand):
+    help = 'Exporta profissionais, contatos ou consultas em NDJSON ou CSV, lendo a tabela em blocos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_name', choices=sorted(EXPORT_MODELS))
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='Comprime a saída em gzip')
+        parser.add_argument('--output', '-o', help='Arquivo de saída (padrão: saída padrão)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        stream = export_stream(options['model_name'], options['format'], options['gzip'], options['chunk_size'])
+
+        destino = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        total = 0
+        try:
+            for bloco in stream:
+                destino.write(bloco)
+                total += len(bloco)
+        finally:
+            if options['output']:
+                destino.close()
+            else:
+                destino.flush()
+
+        if options['output']:
+            self.stderr.write(f'{total} bytes exportados em {time.perf_counter() - inicio:.2f}s')
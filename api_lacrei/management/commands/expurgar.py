@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_lacrei.exclusao import EXPURGO_LOTE, expurgar
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove os profissionais excluídos logicamente e seus contatos, consultas e horários, '
+        'em lotes curtos para não segurar o lock de escrita do banco.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=EXPURGO_LOTE, help='Linhas removidas por transação')
+        parser.add_argument('--pausa', type=float, default=0.0, help='Segundos de espera entre os lotes')
+        parser.add_argument(
+            '--intervalo', type=float, default=0.0,
+            help='Continua rodando e procura novas exclusões a cada INTERVALO segundos (0: roda uma vez)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            removidos = {}
+            for model, linhas in expurgar(options['lote'], options['pausa']):
+                removidos[model] = removidos.get(model, 0) + linhas
+                if options['verbosity'] > 1:
+                    self.stderr.write(f'{model.__name__}: {linhas} linhas removidas')
+
+            if removidos:
+                resumo = ', '.join(f'{model.__name__} {linhas}' for model, linhas in removidos.items())
+                self.stderr.write(f'Linhas removidas: {resumo}, em {time.perf_counter() - inicio:.2f}s')
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_lacrei.importacao import IMPORT_MODELS, IMPORTACAO_LOTE, importar
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa profissionais, contatos ou consultas de um arquivo CSV ou NDJSON (opcionalmente .gz), '
+        'lido em fluxo e gravado em blocos. Uma importação interrompida continua de onde parou.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_name', choices=IMPORT_MODELS)
+        parser.add_argument('arquivo')
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--lote', type=int, default=IMPORTACAO_LOTE, help='Registros gravados por transação')
+        parser.add_argument('--rejeitados', help='Arquivo NDJSON dos registros recusados (padrão: ARQUIVO.rejeitados.ndjson)')
+        parser.add_argument('--estado', help='Arquivo do progresso, para continuar depois de uma interrupção (padrão: ARQUIVO.progresso)')
+        parser.add_argument('--recomecar', action='store_true', help='Ignora o progresso salvo e importa desde o início')
+        parser.add_argument(
+            '--ja-escapado', action='store_true',
+            help='Os textos já vêm escapados (ex.: arquivo da exportação): não são escapados de novo',
+        )
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre as mensagens de progresso')
+
+    def handle(self, *args, **options):
+        inicio = ultimo_aviso = time.perf_counter()
+        progresso = None
+        try:
+            for progresso in importar(
+                options['model_name'], options['arquivo'], options['format'], options['lote'],
+                options['rejeitados'], options['estado'], options['recomecar'], options['ja_escapado'],
+            ):
+                agora = time.perf_counter()
+                if agora - ultimo_aviso >= options['intervalo']:
+                    ultimo_aviso = agora
+                    self.stderr.write(self._resumo(progresso, agora - inicio))
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if progresso is None:
+            self.stderr.write('Nenhum registro a importar')
+            return
+        self.stderr.write('Importação concluída: ' + self._resumo(progresso, time.perf_counter() - inicio))
+
+    def _resumo(self, progresso, segundos):
+        # Em uma retomada, a vazão conta só o que foi lido nesta execução
+        vazao = (progresso.registros - progresso.retomado_em) / max(segundos, 1e-9)
+        return (
+            f'{progresso.registros} registros ({progresso.importados} gravados, {progresso.rejeitados} rejeitados) '
+            f'em {segundos:.1f}s, {vazao:,.0f} registros/s'
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_lacrei.estatisticas import divergencias, reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula o resumo diário de consultas (estatísticas) a partir das consultas e confere '
+        'o resultado. Com --verificar, só confere o resumo atual.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='Só compara o resumo com as consultas, sem regravá-lo')
+        parser.add_argument('--lote', type=int, default=5000, help='Linhas do resumo por INSERT')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        if not options['verificar']:
+            linhas = reconstruir(options['lote'])
+            self.stderr.write(f'Resumo reconstruído: {linhas} dias com consultas, em {time.perf_counter() - inicio:.2f}s')
+
+        diferentes = divergencias()
+        for profissional_id, dia, no_resumo, real in diferentes[:20]:
+            self.stderr.write(f'  profissional {profissional_id} em {dia}: {no_resumo} no resumo, {real} consultas')
+        if diferentes:
+            raise CommandError(f'{len(diferentes)} dias do resumo não batem com as consultas')
+        self.stderr.write(f'Resumo conferido: sem divergências, em {time.perf_counter() - inicio:.2f}s')
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_lacrei.replicas import replicar, todas_as_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Substituto local da replicação: copia o banco primário (SQLite) para as réplicas '
+        'de LACREI_REPLICAS e LACREI_REPLICAS_POR_MODELO.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('replicas', nargs='*', help='Aliases das réplicas (padrão: todas)')
+        parser.add_argument(
+            '--intervalo', type=float, default=0.0,
+            help='Continua rodando e copia o primário a cada INTERVALO segundos, o atraso máximo das réplicas (0: roda uma vez)',
+        )
+
+    def handle(self, *args, **options):
+        if not (options['replicas'] or todas_as_replicas()):
+            raise CommandError('Nenhuma réplica configurada (LACREI_REPLICAS)')
+        while True:
+            inicio = time.perf_counter()
+            replicas = replicar(options['replicas'])
+            self.stderr.write(f'Réplicas atualizadas: {", ".join(replicas)}, em {time.perf_counter() - inicio:.2f}s')
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
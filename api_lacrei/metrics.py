@@ -0,0 +1,246 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+# Liga/desliga a instrumentação (middleware, contagem de SQL e tempos de serializer)
+METRICS_ENABLED = getattr(settings, 'LACREI_METRICS', True)
+
+# Limites dos histogramas, em segundos e em quantidade de consultas
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Valores aceitos no rótulo `model` vindos da URL (<model_name>). Qualquer outro valor, que
+# o cliente controla, vira "other", para que o número de séries dos histogramas seja limitado
+MODELOS = frozenset(getattr(settings, 'LACREI_METRICS_MODELOS', ('profissionais', 'contatos', 'consultas', 'horarios')))
+ROTULO_OUTRO = 'other'
+
+
+# Controle de transação (BEGIN explícito do SQLite, savepoints): não conta como consulta
+TRANSACAO_SQL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class Coletor:
+    """Tempos acumulados durante uma requisição."""
+    __slots__ = ('metodo', 'sql_count', 'sql_segundos', 'tempos', 'marca_render', 'orcamento_extra')
+
+    def __init__(self, metodo):
+        self.metodo = metodo
+        self.sql_count = 0
+        self.sql_segundos = 0.0
+        self.tempos = {}
+        self.marca_render = None
+        self.orcamento_extra = None  # Orçamento de consultas declarado pela própria view (ex.: lotes)
+
+    def somar(self, nome, segundos):
+        self.tempos[nome] = self.tempos.get(nome, 0.0) + segundos
+
+
+_coletor = contextvars.ContextVar('lacrei_coletor', default=None)
+
+
+def _escapar(valor):
+    # Escapes exigidos nos valores de rótulo do formato de texto do Prometheus
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulo_model(match):
+    """
+    Rótulo `model` de uma requisição: o model_name da URL, se for um modelo conhecido, ou
+    o nome da rota, que vem do URLconf. Sem rota (404) ou com um modelo desconhecido, "other".
+    """
+    if match is None:
+        return ROTULO_OUTRO
+    if 'model_name' in match.kwargs:
+        return match.kwargs['model_name'] if match.kwargs['model_name'] in MODELOS else ROTULO_OUTRO
+    return match.url_name or ROTULO_OUTRO
+
+
+class Histograma:
+    def __init__(self, nome, descricao, rotulos, buckets):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observar(self, valor, *rotulos):
+        with self.lock:
+            serie = self.series.get(rotulos)
+            if serie is None:
+                # [contagem por bucket..., +Inf, soma]
+                serie = self.series[rotulos] = [0] * (len(self.buckets) + 1) + [0.0]
+            serie[bisect.bisect_left(self.buckets, valor)] += 1
+            serie[-1] += valor
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        with self.lock:
+            series = {rotulos: list(serie) for rotulos, serie in self.series.items()}
+        for rotulos, serie in sorted(series.items()):
+            base = ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.rotulos, rotulos))
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + ('+Inf',), serie[:-1]):
+                acumulado += quantidade
+                linhas.append(f'{self.nome}_bucket{{{base},le="{limite}"}} {acumulado}')
+            linhas.append(f'{self.nome}_sum{{{base}}} {serie[-1]}')
+            linhas.append(f'{self.nome}_count{{{base}}} {acumulado}')
+        return linhas
+
+
+REQUEST_DURATION = Histograma(
+    'lacrei_http_request_duration_seconds', 'Tempo total da requisição.', ('model', 'method', 'status'), BUCKETS_SEGUNDOS
+)
+REQUEST_DB_DURATION = Histograma(
+    'lacrei_http_request_db_duration_seconds', 'Tempo em SQL por requisição.', ('model', 'method'), BUCKETS_SEGUNDOS
+)
+REQUEST_DB_QUERIES = Histograma(
+    'lacrei_http_request_db_queries', 'Consultas SQL por requisição.', ('model', 'method'), BUCKETS_CONSULTAS
+)
+SERIALIZER_DURATION = Histograma(
+    'lacrei_serializer_duration_seconds', 'Tempo em serializers (validação e representação).', ('model', 'method'), BUCKETS_SEGUNDOS
+)
+HISTOGRAMAS = (REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_DB_QUERIES, SERIALIZER_DURATION)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Execute wrapper instalado em toda conexão: soma quantidade e tempo de SQL da requisição."""
+    coletor = _coletor.get()
+    if coletor is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        coletor.sql_segundos += time.perf_counter() - inicio
+        if not sql.startswith(TRANSACAO_SQL):
+            coletor.sql_count += 1
+
+
+def coletor_atual():
+    return _coletor.get()
+
+
+@contextmanager
+def coletar(metodo):
+    """Ativa um coletor para o trecho (usado quando o middleware de métricas está desligado)."""
+    coletor = Coletor(metodo)
+    token = _coletor.set(coletor)
+    try:
+        yield coletor
+    finally:
+        _coletor.reset(token)
+
+
+def instalar_sql_wrapper(sender, connection, **kwargs):
+    """Receptor de `connection_created` (ver apps.py)."""
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+@contextmanager
+def medir(nome, model=None):
+    """
+    Mede um trecho da requisição atual (ex.: 'sanitize', 'serializer'). Com `model`,
+    o tempo também entra no histograma de serializers por modelo e método.
+    """
+    coletor = _coletor.get()
+    if coletor is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        coletor.somar(nome, segundos)
+        if model is not None:
+            SERIALIZER_DURATION.observar(segundos, model, coletor.metodo)
+
+
+def _server_timing(total, coletor):
+    partes = [f'total;dur={total * 1000:.2f}', f'db;dur={coletor.sql_segundos * 1000:.2f};desc="{coletor.sql_count} queries"']
+    partes.extend(f'{nome};dur={segundos * 1000:.2f}' for nome, segundos in coletor.tempos.items())
+    return ', '.join(partes)
+
+
+class ServerTimingMiddleware:
+    """
+    Mede cada requisição (tempo total, SQL, serializers, sanitização e renderização),
+    envia o resultado no header Server-Timing e alimenta os histogramas de /metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if not METRICS_ENABLED:
+            return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        coletor, token, inicio = self._iniciar(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _coletor.reset(token)
+        return self._finalizar(request, response, coletor, inicio)
+
+    async def __acall__(self, request):
+        coletor, token, inicio = self._iniciar(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _coletor.reset(token)
+        return self._finalizar(request, response, coletor, inicio)
+
+    def process_template_response(self, request, response):
+        # Chamado logo antes da renderização da Response do DRF
+        coletor = _coletor.get()
+        if coletor is not None:
+            coletor.marca_render = time.perf_counter()
+        return response
+
+    def _iniciar(self, request):
+        coletor = Coletor(request.method)
+        return coletor, _coletor.set(coletor), time.perf_counter()
+
+    def _finalizar(self, request, response, coletor, inicio):
+        fim = time.perf_counter()
+        if coletor.marca_render is not None:
+            # A compressão (CompressaoMiddleware) roda depois da renderização e tem tempo próprio
+            coletor.somar('render', fim - coletor.marca_render - coletor.tempos.get('compress', 0.0))
+        total = fim - inicio
+
+        model = _rotulo_model(getattr(request, 'resolver_match', None))
+        REQUEST_DURATION.observar(total, model, request.method, str(response.status_code))
+        REQUEST_DB_DURATION.observar(coletor.sql_segundos, model, request.method)
+        REQUEST_DB_QUERIES.observar(coletor.sql_count, model, request.method)
+
+        response['Server-Timing'] = _server_timing(total, coletor)
+        return response
+
+
+def exportar_prometheus():
+    """Texto no formato de exposição do Prometheus com os histogramas e o cache."""
+    from .cache import cache_stats
+
+    linhas = []
+    for histograma in HISTOGRAMAS:
+        linhas.extend(histograma.exportar())
+
+    estatisticas = cache_stats()
+    for nome in ('hits', 'misses', 'invalidations'):
+        linhas.append(f'# TYPE lacrei_cache_{nome}_total counter')
+        linhas.append(f'lacrei_cache_{nome}_total {estatisticas[nome]}')
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profissional',
+            name='profissao',
+            field=models.CharField(db_index=True, default='', max_length=45),
+        ),
+        migrations.CreateModel(
+            name='HorarioAtendimento',
+            fields=[
+                ('id_horario', models.AutoField(primary_key=True, serialize=False)),
+                ('dia_semana', models.PositiveSmallIntegerField()),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fim', models.TimeField()),
+                ('profissional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_lacrei.profissional')),
+            ],
+            options={
+                'unique_together': {('profissional', 'dia_semana', 'hora_inicio')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0002_horario_atendimento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profissional',
+            name='atualizado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='profissional',
+            name='versao',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
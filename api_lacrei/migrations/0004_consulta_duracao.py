@@ -0,0 +1,37 @@
+import datetime
+
+import api_lacrei.models
+from django.db import migrations, models
+
+
+def preencher_fim(apps, schema_editor):
+    # Consultas já existentes recebem a duração padrão: o fim é calculado em um único UPDATE
+    Consulta = apps.get_model('api_lacrei', 'Consulta')
+    duracao = datetime.timedelta(minutes=api_lacrei.models.duracao_padrao())
+    Consulta.objects.update(data_fim=models.F('data_consulta') + duracao)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0003_profissional_versao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consulta',
+            name='duracao',
+            field=models.PositiveSmallIntegerField(default=api_lacrei.models.duracao_padrao),
+        ),
+        migrations.AddField(
+            model_name='consulta',
+            name='data_fim',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(preencher_fim, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='consulta',
+            name='data_fim',
+            field=models.DateTimeField(editable=False),
+        ),
+    ]
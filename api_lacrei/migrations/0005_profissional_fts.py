@@ -0,0 +1,69 @@
+from django.db import migrations
+
+
+# Índice FTS5 de conteúdo externo: guarda só o índice invertido e lê o texto da própria
+# tabela de profissionais. unicode61 com remove_diacritics ignora acentos (joao = João)
+# e `prefix` mantém índices extras para prefixos de 2 a 4 letras (busca enquanto digita).
+CRIAR = [
+    """
+    CREATE VIRTUAL TABLE api_lacrei_profissional_fts USING fts5(
+        nome_completo, nome_social, profissao, endereco,
+        content='api_lacrei_profissional', content_rowid='id_profissional',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    # Gatilhos no banco: também cobrem bulk_create, upserts, exclusões em cascata e cargas
+    # com SQL direto, que não passam pelos signals do Django
+    """
+    CREATE TRIGGER api_lacrei_profissional_fts_ai AFTER INSERT ON api_lacrei_profissional BEGIN
+        INSERT INTO api_lacrei_profissional_fts(rowid, nome_completo, nome_social, profissao, endereco)
+        VALUES (new.id_profissional, new.nome_completo, new.nome_social, new.profissao, new.endereco);
+    END
+    """,
+    """
+    CREATE TRIGGER api_lacrei_profissional_fts_ad AFTER DELETE ON api_lacrei_profissional BEGIN
+        INSERT INTO api_lacrei_profissional_fts(api_lacrei_profissional_fts, rowid, nome_completo, nome_social, profissao, endereco)
+        VALUES ('delete', old.id_profissional, old.nome_completo, old.nome_social, old.profissao, old.endereco);
+    END
+    """,
+    # Só as colunas indexadas: o UPDATE da versão (touch) não mexe no índice
+    """
+    CREATE TRIGGER api_lacrei_profissional_fts_au
+    AFTER UPDATE OF nome_completo, nome_social, profissao, endereco ON api_lacrei_profissional BEGIN
+        INSERT INTO api_lacrei_profissional_fts(api_lacrei_profissional_fts, rowid, nome_completo, nome_social, profissao, endereco)
+        VALUES ('delete', old.id_profissional, old.nome_completo, old.nome_social, old.profissao, old.endereco);
+        INSERT INTO api_lacrei_profissional_fts(rowid, nome_completo, nome_social, profissao, endereco)
+        VALUES (new.id_profissional, new.nome_completo, new.nome_social, new.profissao, new.endereco);
+    END
+    """,
+    # Indexa os profissionais que já existem
+    "INSERT INTO api_lacrei_profissional_fts(api_lacrei_profissional_fts) VALUES ('rebuild')",
+]
+
+REMOVER = [
+    'DROP TRIGGER IF EXISTS api_lacrei_profissional_fts_au',
+    'DROP TRIGGER IF EXISTS api_lacrei_profissional_fts_ad',
+    'DROP TRIGGER IF EXISTS api_lacrei_profissional_fts_ai',
+    'DROP TABLE IF EXISTS api_lacrei_profissional_fts',
+]
+
+
+def _executar(comandos):
+    def executar(apps, schema_editor):
+        # FTS5 é do SQLite; em outros bancos a busca usa o filtro sem índice (ver busca.py)
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in comandos:
+            schema_editor.execute(sql)
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0004_consulta_duracao'),
+    ]
+
+    operations = [
+        migrations.RunPython(_executar(CRIAR), _executar(REMOVER)),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0005_profissional_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profissional',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='profissional',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profissional',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='profissional',
+            index=models.Index(fields=['profissao', 'geohash', 'latitude', 'longitude'], name='profissional_prof_geo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profissional',
+            index=models.Index(fields=['geohash', 'latitude', 'longitude'], name='profissional_geo_idx'),
+        ),
+    ]
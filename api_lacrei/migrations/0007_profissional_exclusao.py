@@ -0,0 +1,83 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:57
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+COLUNAS = 'nome_completo, nome_social, profissao, endereco'
+
+# Profissionais excluídos logicamente saem do índice FTS5 na mesma escrita que os exclui,
+# então a busca não precisa consultar a tabela de profissionais para descartá-los. Os
+# gatilhos da migração 0005 passam a ignorar as linhas com excluido_em preenchido.
+GATILHOS = [
+    f"""
+    CREATE TRIGGER api_lacrei_profissional_fts_ai AFTER INSERT ON api_lacrei_profissional
+    WHEN new.excluido_em IS NULL BEGIN
+        INSERT INTO api_lacrei_profissional_fts(rowid, {COLUNAS})
+        VALUES (new.id_profissional, new.nome_completo, new.nome_social, new.profissao, new.endereco);
+    END
+    """,
+    # O expurgo apaga linhas que já estão fora do índice
+    f"""
+    CREATE TRIGGER api_lacrei_profissional_fts_ad AFTER DELETE ON api_lacrei_profissional
+    WHEN old.excluido_em IS NULL BEGIN
+        INSERT INTO api_lacrei_profissional_fts(api_lacrei_profissional_fts, rowid, {COLUNAS})
+        VALUES ('delete', old.id_profissional, old.nome_completo, old.nome_social, old.profissao, old.endereco);
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_lacrei_profissional_fts_au
+    AFTER UPDATE OF {COLUNAS}, excluido_em ON api_lacrei_profissional BEGIN
+        INSERT INTO api_lacrei_profissional_fts(api_lacrei_profissional_fts, rowid, {COLUNAS})
+        SELECT 'delete', old.id_profissional, old.nome_completo, old.nome_social, old.profissao, old.endereco
+        WHERE old.excluido_em IS NULL;
+        INSERT INTO api_lacrei_profissional_fts(rowid, {COLUNAS})
+        SELECT new.id_profissional, new.nome_completo, new.nome_social, new.profissao, new.endereco
+        WHERE new.excluido_em IS NULL;
+    END
+    """,
+]
+
+REMOVER = [
+    'DROP TRIGGER IF EXISTS api_lacrei_profissional_fts_au',
+    'DROP TRIGGER IF EXISTS api_lacrei_profissional_fts_ad',
+    'DROP TRIGGER IF EXISTS api_lacrei_profissional_fts_ai',
+]
+
+
+def _gatilhos_0005():
+    # CREATE TRIGGER da migração 0005 (entre a criação da tabela e o rebuild)
+    return [sql for sql in import_module('api_lacrei.migrations.0005_profissional_fts').CRIAR if 'CREATE TRIGGER' in sql]
+
+
+def _executar(comandos):
+    def executar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in comandos():
+            schema_editor.execute(sql)
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0006_profissional_localizacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profissional',
+            name='excluido_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='profissional',
+            index=models.Index(condition=models.Q(('excluido_em__isnull', False)), fields=['excluido_em'], name='profissional_excluido_idx'),
+        ),
+        migrations.RunPython(
+            _executar(lambda: REMOVER + GATILHOS),
+            _executar(lambda: REMOVER + _gatilhos_0005()),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# Feed de alterações: gatilhos no banco registram cada INSERT, UPDATE e DELETE de
+# profissionais, contatos e consultas na mesma transação da escrita, inclusive as de
+# lotes, upserts e SQL direto, sem uma ida a mais ao banco por requisição.
+AGORA = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _registrar(modelo, id_objeto, operacao):
+    return (
+        f'INSERT INTO api_lacrei_alteracao(modelo, id_objeto, operacao, criado_em) '
+        f"VALUES ('{modelo}', {id_objeto}, {operacao}, {AGORA});"
+    )
+
+
+def _gatilho(nome, evento, tabela, corpo, condicao=None):
+    quando = f'WHEN {condicao} ' if condicao else ''
+    return f'CREATE TRIGGER {nome} {evento} ON {tabela} {quando}BEGIN {corpo} END'
+
+
+PROFISSIONAL = 'api_lacrei_profissional'
+# Colunas expostas pela API: o UPDATE da versão (touch) e do geohash não entram no feed
+COLUNAS_PROFISSIONAL = 'nome_completo, nome_social, profissao, endereco, latitude, longitude, excluido_em'
+# Contatos e consultas de um profissional excluído saem com a exclusão dele (um único
+# registro); o expurgo e o DELETE definitivo não geram um registro por linha
+PROFISSIONAL_VISIVEL = f'(SELECT excluido_em FROM {PROFISSIONAL} WHERE id_profissional = old.profissional_id) IS NULL'
+
+GATILHOS = [
+    _gatilho('api_lacrei_profissional_alteracao_ai', 'AFTER INSERT', PROFISSIONAL,
+             _registrar('profissionais', 'new.id_profissional', "'created'"), 'new.excluido_em IS NULL'),
+    # A exclusão lógica é um UPDATE de excluido_em: vira o registro da exclusão
+    _gatilho('api_lacrei_profissional_alteracao_au', f'AFTER UPDATE OF {COLUNAS_PROFISSIONAL}', PROFISSIONAL,
+             _registrar('profissionais', 'new.id_profissional', "CASE WHEN new.excluido_em IS NULL THEN 'updated' ELSE 'deleted' END"),
+             'old.excluido_em IS NULL'),
+    _gatilho('api_lacrei_profissional_alteracao_ad', 'AFTER DELETE', PROFISSIONAL,
+             _registrar('profissionais', 'old.id_profissional', "'deleted'"), 'old.excluido_em IS NULL'),
+]
+for modelo, tabela, chave in (('contatos', 'api_lacrei_contato', 'id_contato'), ('consultas', 'api_lacrei_consulta', 'id_consulta')):
+    GATILHOS += [
+        _gatilho(f'{tabela}_alteracao_ai', 'AFTER INSERT', tabela, _registrar(modelo, f'new.{chave}', "'created'")),
+        _gatilho(f'{tabela}_alteracao_au', 'AFTER UPDATE', tabela, _registrar(modelo, f'new.{chave}', "'updated'")),
+        _gatilho(f'{tabela}_alteracao_ad', 'AFTER DELETE', tabela, _registrar(modelo, f'old.{chave}', "'deleted'"), PROFISSIONAL_VISIVEL),
+    ]
+
+
+def _criar(apps, schema_editor):
+    # Gatilhos do SQLite, como os do índice FTS5 (migração 0005)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in GATILHOS:
+        schema_editor.execute(sql)
+
+
+def _remover(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in GATILHOS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {sql.split()[2]}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0007_profissional_exclusao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Compactacao',
+            fields=[
+                ('id_compactacao', models.AutoField(primary_key=True, serialize=False)),
+                ('ate', models.BigIntegerField()),
+                ('executada_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Alteracao',
+            fields=[
+                ('id_alteracao', models.BigAutoField(primary_key=True, serialize=False)),
+                ('modelo', models.CharField(max_length=15)),
+                ('id_objeto', models.IntegerField()),
+                ('operacao', models.CharField(max_length=7)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modelo', 'id_objeto'], name='alteracao_objeto_idx')],
+            },
+        ),
+        migrations.RunPython(_criar, _remover),
+    ]
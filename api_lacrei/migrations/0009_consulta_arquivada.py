@@ -0,0 +1,78 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:15
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+GATILHO = 'api_lacrei_consulta_alteracao_ad'
+GATILHO_ARQUIVO = 'api_lacrei_consultaarquivada_alteracao_ad'
+
+
+def _alteracoes():
+    return import_module('api_lacrei.migrations.0008_alteracoes')
+
+
+def _gatilho_0008():
+    return next(sql for sql in _alteracoes().GATILHOS if sql.split()[2] == GATILHO)
+
+
+def _gatilho_com_arquivo():
+    # O arquivamento copia a consulta para o arquivo antes de removê-la de Consulta: para o
+    # feed de alterações, a consulta continua existindo e a remoção não é registrada
+    alteracoes = _alteracoes()
+    condicao = (
+        f'{alteracoes.PROFISSIONAL_VISIVEL} '
+        'AND NOT EXISTS (SELECT 1 FROM api_lacrei_consultaarquivada WHERE id_consulta = old.id_consulta)'
+    )
+    return alteracoes._gatilho(GATILHO, 'AFTER DELETE', 'api_lacrei_consulta',
+                               alteracoes._registrar('consultas', 'old.id_consulta', "'deleted'"), condicao)
+
+
+def _gatilho_do_arquivo():
+    # A consulta arquivada só sai do arquivo quando é excluída (exclusão definitiva)
+    alteracoes = _alteracoes()
+    return alteracoes._gatilho(GATILHO_ARQUIVO, 'AFTER DELETE', 'api_lacrei_consultaarquivada',
+                               alteracoes._registrar('consultas', 'old.id_consulta', "'deleted'"),
+                               alteracoes.PROFISSIONAL_VISIVEL)
+
+
+def _arquivar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS {GATILHO}')
+    schema_editor.execute(_gatilho_com_arquivo())
+    schema_editor.execute(_gatilho_do_arquivo())
+
+
+def _desarquivar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS {GATILHO_ARQUIVO}')
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS {GATILHO}')
+    schema_editor.execute(_gatilho_0008())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0008_alteracoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultaArquivada',
+            fields=[
+                ('id_consulta', models.IntegerField(primary_key=True, serialize=False)),
+                ('data_consulta', models.DateTimeField()),
+                ('duracao', models.PositiveSmallIntegerField()),
+                ('data_fim', models.DateTimeField()),
+                ('profissional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_lacrei.profissional')),
+            ],
+            options={
+                'unique_together': {('profissional', 'data_consulta')},
+            },
+        ),
+        migrations.RunPython(_arquivar, _desarquivar),
+    ]
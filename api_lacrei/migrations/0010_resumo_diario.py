@@ -0,0 +1,101 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:23
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Resumo diário de consultas: gatilhos no banco somam e subtraem cada consulta gravada,
+# movida de dia ou de profissional e excluída, na mesma transação da escrita (inclusive
+# lotes, upserts e SQL direto). O dia é a data UTC de data_consulta.
+RESUMO = 'api_lacrei_resumodiario'
+CONSULTA = 'api_lacrei_consulta'
+ARQUIVO = 'api_lacrei_consultaarquivada'
+
+
+def _alteracoes():
+    return import_module('api_lacrei.migrations.0008_alteracoes')
+
+
+def _somar(profissional, data):
+    return (
+        f'INSERT INTO {RESUMO} (profissional_id, dia, total) VALUES ({profissional}, date({data}), 1) '
+        'ON CONFLICT (profissional_id, dia) DO UPDATE SET total = total + 1;'
+    )
+
+
+def _subtrair(profissional, data):
+    # Sem linhas com total zero: o resumo só tem os dias com consultas
+    filtro = f'profissional_id = {profissional} AND dia = date({data})'
+    return (
+        f'UPDATE {RESUMO} SET total = total - 1 WHERE {filtro}; '
+        f'DELETE FROM {RESUMO} WHERE {filtro} AND total = 0;'
+    )
+
+
+def _gatilhos():
+    alteracoes = _alteracoes()
+    gatilho, visivel = alteracoes._gatilho, alteracoes.PROFISSIONAL_VISIVEL
+    return [
+        gatilho(f'{CONSULTA}_resumo_ai', 'AFTER INSERT', CONSULTA, _somar('new.profissional_id', 'new.data_consulta')),
+        gatilho(f'{CONSULTA}_resumo_au', 'AFTER UPDATE OF profissional_id, data_consulta', CONSULTA,
+                _subtrair('old.profissional_id', 'old.data_consulta') + ' ' + _somar('new.profissional_id', 'new.data_consulta'),
+                'old.profissional_id != new.profissional_id OR date(old.data_consulta) != date(new.data_consulta)'),
+        # O arquivamento (cópia para o arquivo) não muda o resumo. As consultas de um
+        # profissional excluído saem com o resumo dele (expurgo e DELETE definitivo)
+        gatilho(f'{CONSULTA}_resumo_ad', 'AFTER DELETE', CONSULTA, _subtrair('old.profissional_id', 'old.data_consulta'),
+                f'{visivel} AND NOT EXISTS (SELECT 1 FROM {ARQUIVO} WHERE id_consulta = old.id_consulta)'),
+        gatilho(f'{ARQUIVO}_resumo_ad', 'AFTER DELETE', ARQUIVO, _subtrair('old.profissional_id', 'old.data_consulta'), visivel),
+    ]
+
+
+# Preenche o resumo com as consultas já gravadas
+PREENCHER = f"""
+    INSERT INTO {RESUMO} (profissional_id, dia, total)
+    SELECT profissional_id, dia, SUM(total) FROM (
+        SELECT profissional_id, date(data_consulta) AS dia, COUNT(*) AS total FROM {CONSULTA} GROUP BY 1, 2
+        UNION ALL
+        SELECT profissional_id, date(data_consulta) AS dia, COUNT(*) AS total FROM {ARQUIVO} GROUP BY 1, 2
+    ) GROUP BY profissional_id, dia
+"""
+
+
+def _criar(apps, schema_editor):
+    # Gatilhos do SQLite, como os do feed de alterações (migração 0008)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in _gatilhos():
+        schema_editor.execute(sql)
+    schema_editor.execute(PREENCHER)
+
+
+def _remover(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in _gatilhos():
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {sql.split()[2]}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_lacrei', '0009_consulta_arquivada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id_resumo', models.AutoField(primary_key=True, serialize=False)),
+                ('dia', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('profissional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_lacrei.profissional')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dia'], name='resumo_dia_idx')],
+                'unique_together': {('profissional', 'dia')},
+            },
+        ),
+        migrations.RunPython(_criar, _remover),
+    ]
@@ -1,19 +1,78 @@
+import datetime
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from . import geohash
 
 # Create your models here.
 from django.db import models
 
 
+class ProfissionalQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create não chama save(): a célula de cada profissional é preenchida aqui
+        objs = list(objs)
+        for profissional in objs:
+            profissional.preencher_geohash()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class ProfissionalManager(models.Manager.from_queryset(ProfissionalQuerySet)):
+    # Profissionais excluídos logicamente somem de toda a API assim que o DELETE responde;
+    # as linhas ficam no banco até o expurgo (ver exclusao.py)
+    def get_queryset(self):
+        return super().get_queryset().filter(excluido_em__isnull=True)
+
+
 class Profissional(models.Model):
     id_profissional = models.IntegerField(primary_key=True)
     nome_completo = models.CharField(max_length=100, default='', blank=False) # Nome completo do Profissional
     nome_social = models.CharField(max_length=100, default='', blank=True)    # Nome Social do Profissional (pode ser vazio)
-    profissao = models.CharField(max_length=45, default='', blank=False)      # Profissão do Profissional
+    profissao = models.CharField(max_length=45, default='', blank=False, db_index=True)  # Profissão do Profissional
     endereco = models.CharField(max_length=255, default='', blank=False)      # Endereço do Profissional
+    versao = models.PositiveIntegerField(default=1)                           # Incrementada a cada escrita no profissional, contatos ou consultas
+    atualizado_em = models.DateTimeField(default=timezone.now)                # Momento da última escrita (base do ETag/Last-Modified)
+    latitude = models.FloatField(null=True, blank=True)                       # Localização informada pelo cliente (opcional)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)  # Célula da localização (busca por proximidade)
+    excluido_em = models.DateTimeField(null=True, blank=True, editable=False)  # Exclusão lógica (o expurgo remove a linha depois)
+
+    objects = ProfissionalManager()
+    todos = ProfissionalQuerySet.as_manager()                                 # Inclui os excluídos que aguardam o expurgo
+
+    class Meta:
+        # Buscas por proximidade percorrem só as faixas de geohash das células vizinhas;
+        # latitude/longitude no índice evitam ler a linha para calcular as distâncias
+        indexes = [
+            models.Index(fields=['profissao', 'geohash', 'latitude', 'longitude'], name='profissional_prof_geo_idx'),
+            models.Index(fields=['geohash', 'latitude', 'longitude'], name='profissional_geo_idx'),
+            # Só as linhas excluídas entram no índice: o expurgo as encontra sem percorrer a tabela
+            models.Index(fields=['excluido_em'], name='profissional_excluido_idx', condition=models.Q(excluido_em__isnull=False)),
+        ]
 
     def __str__(self):
         return self.nome_completo
 
+    def preencher_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = geohash.codificar(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.preencher_geohash()
+        super().save(*args, **kwargs)
+
+
+def _nome_profissional(objeto):
+    # Usa o nome apenas se o profissional já foi carregado (select_related/prefetch):
+    # listar contatos ou consultas não pode disparar uma consulta por linha
+    if type(objeto).profissional.is_cached(objeto):
+        return objeto.profissional.nome_completo
+    return f"Profissional {objeto.profissional_id}"
+
 
 class Contato(models.Model):
     id_contato = models.AutoField(primary_key=True)                           # Identificador Único do contato  
@@ -25,16 +84,117 @@ class Contato(models.Model):
         unique_together = ('profissional', 'contato')
 
     def __str__(self):
-        return f"{self.profissional.nome_completo} - {self.contato}"
+        return f"{_nome_profissional(self)} - {self.contato}"
+
+
+def duracao_padrao():
+    # Duração (minutos) das consultas criadas sem `duracao`
+    return getattr(settings, 'LACREI_DURACAO_CONSULTA', 30)
+
+
+class ConsultaQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create não chama save(): o fim de cada consulta é preenchido aqui
+        objs = list(objs)
+        for consulta in objs:
+            consulta.preencher_fim()
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Consulta(models.Model):
     id_consulta = models.AutoField(primary_key=True)                          # Identificador Único da consulta  
     profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE)  # Relacionamento com Profissional.id_profissional                             # Definir o tipo de contato, como email, telefone...
     data_consulta = models.DateTimeField()                                    # Data da Consulta
-    
+    duracao = models.PositiveSmallIntegerField(default=duracao_padrao)        # Duração da consulta, em minutos
+    data_fim = models.DateTimeField(editable=False)                           # data_consulta + duracao (usado na detecção de sobreposição)
+
+    objects = ConsultaQuerySet.as_manager()
+
     class Meta:
+        # O índice único (profissional, data_consulta) também atende a paginação por
+        # keyset: filtra o profissional e percorre as consultas já na ordem da data
         unique_together = ('profissional', 'data_consulta')
     
     def __str__(self):
-        return f"Consulta de {self.profissional.nome_completo} em {self.data_consulta}"
+        return f"Consulta de {_nome_profissional(self)} em {self.data_consulta}"
+
+    def preencher_fim(self):
+        inicio = self._meta.get_field('data_consulta').to_python(self.data_consulta)
+        self.data_fim = inicio + datetime.timedelta(minutes=self.duracao)
+
+    def save(self, *args, **kwargs):
+        self.preencher_fim()
+        super().save(*args, **kwargs)
+
+
+class ConsultaArquivada(models.Model):
+    # Consultas antigas movidas de Consulta pelo arquivamento (ver arquivo.py), com as mesmas
+    # colunas e o mesmo id. Somente leitura pela API
+    id_consulta = models.IntegerField(primary_key=True)                       # Id que a consulta tinha em Consulta
+    profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE)  # Relacionamento com Profissional.id_profissional
+    data_consulta = models.DateTimeField()                                    # Data da Consulta
+    duracao = models.PositiveSmallIntegerField()                              # Duração da consulta, em minutos
+    data_fim = models.DateTimeField()                                         # data_consulta + duracao
+
+    class Meta:
+        # Atende a leitura do histórico de um profissional, como o índice de Consulta
+        unique_together = ('profissional', 'data_consulta')
+
+    def __str__(self):
+        return f"Consulta arquivada de {_nome_profissional(self)} em {self.data_consulta}"
+
+
+class ResumoDiario(models.Model):
+    # Quantidade de consultas (inclusive as arquivadas) de um profissional em um dia (UTC),
+    # mantida pelos gatilhos da migração 0010 na mesma transação das escritas. Ver estatisticas.py
+    id_resumo = models.AutoField(primary_key=True)                            # Identificador Único do resumo
+    profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE)  # Relacionamento com Profissional.id_profissional
+    dia = models.DateField()                                                  # Dia das consultas
+    total = models.PositiveIntegerField(default=0)                            # Consultas do profissional no dia
+
+    class Meta:
+        # Atende os períodos de um profissional; as agregações por profissão leem o dia inteiro
+        unique_together = ('profissional', 'dia')
+        indexes = [models.Index(fields=['dia'], name='resumo_dia_idx')]
+
+    def __str__(self):
+        return f"{self.total} consultas de {_nome_profissional(self)} em {self.dia}"
+
+
+class HorarioAtendimento(models.Model):
+    id_horario = models.AutoField(primary_key=True)                           # Identificador Único do horário
+    profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE)  # Relacionamento com Profissional.id_profissional
+    dia_semana = models.PositiveSmallIntegerField()                           # Dia da semana (0 = segunda ... 6 = domingo)
+    hora_inicio = models.TimeField()                                          # Início do expediente
+    hora_fim = models.TimeField()                                             # Fim do expediente
+
+    class Meta:
+        unique_together = ('profissional', 'dia_semana', 'hora_inicio')
+
+    def __str__(self):
+        return f"Horário de {self.profissional_id}: dia {self.dia_semana}, {self.hora_inicio}-{self.hora_fim}"
+
+
+class Alteracao(models.Model):
+    # Preenchida por gatilhos no banco (migração 0008), na mesma transação de cada escrita
+    id_alteracao = models.BigAutoField(primary_key=True)                      # Posição no feed de alterações (cursor)
+    modelo = models.CharField(max_length=15)                                  # profissionais, contatos ou consultas
+    id_objeto = models.IntegerField()                                         # Chave primária da linha alterada
+    operacao = models.CharField(max_length=7)                                 # created, updated ou deleted
+    criado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # A compactação procura, para cada linha do feed, uma alteração mais nova do mesmo objeto
+        indexes = [models.Index(fields=['modelo', 'id_objeto'], name='alteracao_objeto_idx')]
+
+    def __str__(self):
+        return f"{self.id_alteracao}: {self.operacao} {self.modelo} {self.id_objeto}"
+
+
+class Compactacao(models.Model):
+    id_compactacao = models.AutoField(primary_key=True)
+    ate = models.BigIntegerField()                                            # Alterações até esta posição do feed foram descartadas
+    executada_em = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Compactação até {self.ate} em {self.executada_em}"
@@ -0,0 +1,151 @@
+import base64
+import datetime
+import heapq
+import operator
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+# Tamanho padrão e máximo de uma página de consultas
+PAGE_SIZE = getattr(settings, 'LACREI_PAGE_SIZE', 100)
+MAX_PAGE_SIZE = getattr(settings, 'LACREI_MAX_PAGE_SIZE', 1000)
+
+
+def encode_cursor(data_consulta, id_consulta):
+    """Gera o cursor opaco que aponta para a última consulta entregue."""
+    bruto = f'{data_consulta.isoformat()}|{id_consulta}'.encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Interpreta um cursor gerado por `encode_cursor`. Levanta ValueError se for inválido."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        data, id_consulta = bruto.rsplit('|', 1)
+        data_consulta = datetime.datetime.fromisoformat(data)
+        return data_consulta, int(id_consulta)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def parse_limit(valor):
+    if valor in (None, ''):
+        return PAGE_SIZE
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError('O parâmetro limit deve ser um número inteiro')
+    if limite < 1:
+        raise ValueError('O parâmetro limit deve ser maior que zero')
+    return min(limite, MAX_PAGE_SIZE)
+
+
+def parse_instante(valor, fim_do_dia=False):
+    """
+    Converte o valor de `from`/`to` em datetime com fuso. Aceita data e hora ISO 8601
+    ou apenas a data; com `fim_do_dia`, uma data isolada vale até o fim daquele dia.
+    """
+    if valor in (None, ''):
+        return None
+
+    # A data isolada é verificada primeiro: parse_datetime também a aceita (como meia-noite)
+    dia = parse_date(valor)
+    if dia is not None:
+        if fim_do_dia:
+            dia += datetime.timedelta(days=1)
+        instante = datetime.datetime.combine(dia, datetime.time.min)
+    else:
+        instante = parse_datetime(valor)
+        if instante is None:
+            raise ValueError(f'Data inválida: {valor}')
+
+    if timezone.is_naive(instante):
+        instante = timezone.make_aware(instante)
+    return instante
+
+
+def preparar_pagina(queryset, params):
+    """
+    Aplica os filtros de período e do cursor e a ordenação (data_consulta, id_consulta).
+
+    A condição do cursor começa por `data_consulta >= data`, o que permite ao banco
+    posicionar a busca direto no índice (profissional, data_consulta): o custo de
+    uma página não depende de quantas páginas vieram antes.
+
+    Retorna (queryset_da_pagina, limite); o queryset traz um item a mais que o limite.
+    """
+    limite = parse_limit(params.get('limit'))
+    inicio = parse_instante(params.get('from'))
+    fim = parse_instante(params.get('to'), fim_do_dia=True)
+
+    if inicio is not None:
+        queryset = queryset.filter(data_consulta__gte=inicio)
+    if fim is not None:
+        queryset = queryset.filter(data_consulta__lt=fim)
+
+    cursor = params.get('cursor')
+    if cursor:
+        data_consulta, id_consulta = decode_cursor(cursor)
+        queryset = queryset.filter(data_consulta__gte=data_consulta).filter(
+            Q(data_consulta__gt=data_consulta) | Q(id_consulta__gt=id_consulta)
+        )
+
+    # Busca um item a mais para saber se existe próxima página
+    return queryset.order_by('data_consulta', 'id_consulta')[:limite + 1], limite
+
+
+def fechar_pagina(consultas, limite, chave=None):
+    """
+    Corta o item extra e gera o cursor da próxima página (None na última).
+    `chave` extrai (data_consulta, id_consulta) de itens que não são instâncias (ex.: tuplas).
+    """
+    proximo = None
+    if len(consultas) > limite:
+        consultas = consultas[:limite]
+        ultima = consultas[-1]
+        if chave is not None:
+            proximo = encode_cursor(*chave(ultima))
+        else:
+            proximo = encode_cursor(ultima.data_consulta, ultima.id_consulta)
+    return consultas, proximo
+
+
+def paginar_consultas(queryset, params, leve=None, arquivo=None):
+    """
+    Pagina as consultas por keyset, na ordem (data_consulta, id_consulta).
+    Retorna (consultas, proximo_cursor); o cursor é None na última página.
+
+    Com um `SerializerLeve`, a página vem de `values_list()` e já é devolvida na
+    representação final (lista de dicionários). `arquivo` (com `leve`) é um queryset
+    de ConsultaArquivada cujas consultas entram na mesma página.
+    """
+    pagina, limite = preparar_pagina(queryset, params)
+    if leve is None:
+        return fechar_pagina(list(pagina), limite)
+
+    chave = chave_cursor(leve)
+    linhas = list(leve.linhas(pagina))
+    if arquivo is not None:
+        arquivadas = list(leve.linhas(preparar_pagina(arquivo, params)[0]))
+        linhas = intercalar(linhas, arquivadas, limite, chave)
+    linhas, proximo = fechar_pagina(linhas, limite, chave=chave)
+    return leve.representar(linhas), proximo
+
+
+def intercalar(linhas, arquivadas, limite, chave):
+    """
+    Junta duas páginas já ordenadas por (data_consulta, id_consulta), cada uma com até
+    limite + 1 itens, na página (também com o item extra) da união das duas tabelas.
+    Os ids de consulta não se repetem entre as tabelas, então o cursor continua valendo.
+    """
+    if not arquivadas:
+        return linhas
+    return list(heapq.merge(arquivadas, linhas, key=chave))[:limite + 1]
+
+
+def chave_cursor(leve):
+    """Extrai (data_consulta, id_consulta) das tuplas de um `SerializerLeve`."""
+    return operator.itemgetter(leve.posicao('data_consulta'), leve.posicao('id_consulta'))
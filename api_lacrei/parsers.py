@@ -0,0 +1,71 @@
+import codecs
+import io
+import json
+
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import JSON_RAPIDO, JSONRenderer, orjson
+
+
+def _utf8(encoding):
+    return codecs.lookup(encoding).name == 'utf-8'
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    JSONParser do DRF com o orjson, que lê o corpo UTF-8 direto dos bytes. Um corpo que
+    o orjson recusa (JSON inválido, NaN fora do modo estrito, inteiro maior que 64 bits)
+    passa pelo parser do DRF, que dá o mesmo resultado ou a mesma mensagem de erro de hoje.
+    """
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not JSON_RAPIDO or not _utf8(encoding):
+            return super().parse(stream, media_type, parser_context)
+
+        corpo = stream.read()
+        try:
+            return orjson.loads(corpo)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(corpo), media_type, parser_context)
+
+
+def _ndjson_loads(linha):
+    # Sem o orjson (ou com LACREI_JSON_RAPIDO = False), só a biblioteca padrão. Linha que o
+    # orjson recusa: o json da biblioteca padrão dá o resultado ou o erro de hoje
+    if orjson is None or not JSON_RAPIDO:
+        return json.loads(linha)
+    try:
+        return orjson.loads(linha)
+    except orjson.JSONDecodeError:
+        return json.loads(linha)
+
+
+class NDJSONParser(BaseParser):
+    """
+    Interpreta um corpo NDJSON (um objeto JSON por linha) como uma lista de objetos.
+    Linhas em branco são ignoradas.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        rapido = JSON_RAPIDO and _utf8(encoding)
+        linhas = stream if rapido else codecs.getreader(encoding)(stream)
+
+        itens = []
+        for numero, linha in enumerate(linhas, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                itens.append(_ndjson_loads(linha) if rapido else json.loads(linha))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON inválido na linha {numero}: {exc}')
+        return itens
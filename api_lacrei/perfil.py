@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from .models import Contato, Consulta
+
+
+# Quantidade de próximas consultas embutidas em cada profissional do perfil
+PERFIL_CONSULTAS = getattr(settings, 'LACREI_PERFIL_CONSULTAS', 10)
+
+
+def carregar_perfis(profissionais, agora=None):
+    """
+    Carrega os contatos e as próximas consultas de uma lista de profissionais em duas
+    consultas, independentemente do tamanho da lista. As consultas ficam em
+    `proximas_consultas` (até PERFIL_CONSULTAS por profissional, a partir de `agora`).
+    """
+    if agora is None:
+        agora = timezone.now()
+    proximas = Consulta.objects.filter(data_consulta__gte=agora).order_by('data_consulta', 'id_consulta')
+    prefetch_related_objects(
+        profissionais,
+        Prefetch('contato_set', queryset=Contato.objects.order_by('id_contato')),
+        # Fatia por profissional (o Django usa uma window function no prefetch)
+        Prefetch('consulta_set', queryset=proximas[:PERFIL_CONSULTAS], to_attr='proximas_consultas'),
+    )
+    return profissionais
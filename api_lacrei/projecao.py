@@ -0,0 +1,89 @@
+from django.conf import settings
+
+from .models import Profissional, Contato, Consulta, ConsultaArquivada, HorarioAtendimento
+from .serializers import CONSULTA_LEVE, CONTATO_LEVE, HORARIO_LEVE, PROFISSIONAL_LEVE
+
+
+# Máximo de ids em um GET com ?ids= (uma consulta com IN de até esse tamanho)
+IDS_MAX = getattr(settings, 'LACREI_IDS_MAX', 200)
+
+# Representação e tabelas de cada GET com ?ids=, na ordem em que são lidas. Como nas
+# listagens, os dados de profissionais excluídos ficam de fora
+POR_IDS = {
+    'profissionais': (PROFISSIONAL_LEVE, (Profissional.objects.all(),)),
+    'contatos': (CONTATO_LEVE, (Contato.objects.filter(profissional__excluido_em__isnull=True),)),
+    'consultas': (CONSULTA_LEVE, (
+        Consulta.objects.filter(profissional__excluido_em__isnull=True),
+        ConsultaArquivada.objects.filter(profissional__excluido_em__isnull=True),
+    )),
+    'horarios': (HORARIO_LEVE, (HorarioAtendimento.objects.filter(profissional__excluido_em__isnull=True),)),
+}
+
+
+def parse_campos(valor, leve, ocultas=()):
+    """
+    Interpreta `?fields=` (nomes separados por vírgula) como uma projeção de `leve`:
+    apenas as colunas pedidas são lidas do banco e representadas. Sem o parâmetro,
+    retorna o próprio `leve`. A chave primária e as colunas de `ocultas` são lidas
+    sempre, para uso interno (ordem dos ids, cursor), mas só aparecem na saída se
+    forem pedidas. Levanta ValueError com um campo desconhecido.
+    """
+    if valor in (None, ''):
+        return leve
+    campos = [campo.strip() for campo in valor.split(',') if campo.strip()]
+    desconhecidos = [campo for campo in campos if campo not in leve.nomes]
+    if not campos or desconhecidos:
+        raise ValueError(f"O parâmetro fields aceita: {', '.join(leve.nomes)}")
+    return leve.projetar(campos, (leve.model._meta.pk.attname, *ocultas))
+
+
+def parse_ids(valor):
+    """Ids de `?ids=` (inteiros separados por vírgula), sem repetições e na ordem pedida."""
+    try:
+        ids = list(dict.fromkeys(int(id_) for id_ in valor.split(',') if id_.strip()))
+    except (AttributeError, ValueError):
+        raise ValueError('O parâmetro ids deve ser uma lista de números inteiros separados por vírgula')
+    if not ids:
+        raise ValueError('O parâmetro ids deve ser uma lista de números inteiros separados por vírgula')
+    if len(ids) > IDS_MAX:
+        raise ValueError(f'O parâmetro ids aceita no máximo {IDS_MAX} ids')
+    return ids
+
+
+def _por_chave(linhas, leve):
+    posicao = leve.posicao(leve.model._meta.pk.attname)
+    return {linha[posicao]: linha for linha in linhas}
+
+
+def buscar_por_ids(model_name, ids, leve):
+    """
+    Registros de `ids` na ordem pedida, em uma consulta por tabela de POR_IDS: a tabela
+    seguinte (o arquivo de consultas) só é lida para os ids que ainda faltam. `leve` é
+    a representação do modelo ou uma projeção dela (parse_campos). Retorna
+    (resultados, ids_ausentes).
+    """
+    querysets = POR_IDS[model_name][1]
+    encontradas = {}
+    for queryset in querysets:
+        faltam = [id_ for id_ in ids if id_ not in encontradas]
+        if not faltam:
+            break
+        encontradas.update(_por_chave(leve.linhas(queryset.filter(pk__in=faltam)), leve))
+    return _resultado(ids, encontradas, leve)
+
+
+async def abuscar_por_ids(model_name, ids, leve):
+    """Versão assíncrona de `buscar_por_ids`."""
+    querysets = POR_IDS[model_name][1]
+    encontradas = {}
+    for queryset in querysets:
+        faltam = [id_ for id_ in ids if id_ not in encontradas]
+        if not faltam:
+            break
+        encontradas.update(_por_chave([linha async for linha in leve.linhas(queryset.filter(pk__in=faltam))], leve))
+    return _resultado(ids, encontradas, leve)
+
+
+def _resultado(ids, encontradas, leve):
+    resultados = leve.representar([encontradas[id_] for id_ in ids if id_ in encontradas])
+    return resultados, [id_ for id_ in ids if id_ not in encontradas]
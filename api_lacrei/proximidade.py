@@ -0,0 +1,90 @@
+import heapq
+import math
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+
+from . import geohash
+from .models import Profissional
+from .serializers import PROFISSIONAL_LEVE
+
+
+# Máximo de células de geohash cobertas por consulta (a precisão se ajusta ao raio)
+GEO_MAX_CELULAS = getattr(settings, 'LACREI_GEO_MAX_CELULAS', 64)
+
+# Busca pelos k mais próximos: o raio começa em GEO_RAIO_INICIAL km e cresce até achar
+# k profissionais ou chegar a GEO_RAIO_MAXIMO km, em no máximo GEO_MAX_TENTATIVAS consultas
+GEO_RAIO_INICIAL = getattr(settings, 'LACREI_GEO_RAIO_INICIAL', 1.0)
+GEO_RAIO_MAXIMO = getattr(settings, 'LACREI_GEO_RAIO_MAXIMO', 500.0)
+GEO_MAX_TENTATIVAS = getattr(settings, 'LACREI_GEO_MAX_TENTATIVAS', 10)
+
+GEO_LIMITE = 20
+GEO_MAX_LIMITE = 100
+
+
+def _no_raio(latitude, longitude, raio_km, profissao):
+    """
+    (distancia_km, id) dos profissionais a até `raio_km` do ponto. O banco lê só as
+    faixas de geohash das células que cobrem o círculo (pelo índice, que já traz a
+    latitude e a longitude); a distância é calculada apenas para esses candidatos.
+    """
+    faixas = geohash.intervalos(geohash.celulas(geohash.caixa(latitude, longitude, raio_km), GEO_MAX_CELULAS))
+    filtros = []
+    for inicio, fim in faixas:
+        # A profissão entra em cada faixa para que o banco use o índice (profissao, geohash)
+        filtro = Q(geohash__gte=inicio, profissao=profissao) if profissao else Q(geohash__gte=inicio)
+        if fim is not None:
+            filtro &= Q(geohash__lt=fim)
+        filtros.append(filtro)
+
+    encontrados = []
+    # Profissionais excluídos ficam sem geohash, fora das faixas: o manager sem o filtro de
+    # exclusão mantém a leitura só no índice
+    candidatos = Profissional.todos.filter(reduce(operator.or_, filtros)).values_list('id_profissional', 'latitude', 'longitude')
+    for id_profissional, lat, lon in candidatos:
+        distancia = geohash.distancia_km(latitude, longitude, lat, lon)
+        if distancia <= raio_km:
+            encontrados.append((distancia, id_profissional))
+    return encontrados
+
+
+def buscar_proximos(latitude, longitude, profissao=None, raio_km=None, limite=GEO_LIMITE):
+    """
+    Profissionais mais próximos do ponto, do mais perto ao mais longe. Com `raio_km`,
+    apenas os que estão dentro do raio; sem ele, os `limite` mais próximos (até
+    GEO_RAIO_MAXIMO). Cada resultado traz `distancia_km`.
+    """
+    if raio_km is not None:
+        encontrados = _no_raio(latitude, longitude, raio_km, profissao)
+    else:
+        raio = GEO_RAIO_INICIAL
+        for tentativa in range(GEO_MAX_TENTATIVAS):
+            ultima = tentativa == GEO_MAX_TENTATIVAS - 1 or raio >= GEO_RAIO_MAXIMO
+            if ultima:
+                raio = GEO_RAIO_MAXIMO
+            encontrados = _no_raio(latitude, longitude, raio, profissao)
+            # Com k profissionais dentro do raio, os k mais próximos estão entre eles
+            if len(encontrados) >= limite or ultima:
+                break
+            # Sem ninguém, o raio dobra; com alguns, cresce pela densidade observada (a
+            # quantidade acompanha a área, isto é, o quadrado do raio)
+            fator = max(1.5, math.sqrt(limite / len(encontrados)) * 1.2) if encontrados else 2.0
+            raio = min(raio * fator, GEO_RAIO_MAXIMO)
+
+    proximos = heapq.nsmallest(limite, encontrados)
+    if not proximos:
+        return []
+
+    posicao = PROFISSIONAL_LEVE.posicao('id_profissional')
+    linhas = {
+        linha[posicao]: linha
+        for linha in PROFISSIONAL_LEVE.linhas(Profissional.objects.filter(id_profissional__in=[id_ for _, id_ in proximos]))
+    }
+    # Um profissional excluído entre as duas consultas fica de fora
+    proximos = [(distancia, id_) for distancia, id_ in proximos if id_ in linhas]
+    resultados = PROFISSIONAL_LEVE.representar([linhas[id_] for _, id_ in proximos])
+    for resultado, (distancia, _) in zip(resultados, proximos):
+        resultado['distancia_km'] = round(distancia, 3)
+    return resultados
@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import TRANSACAO_SQL, coletar, coletor_atual
+
+
+# Máximo de consultas SQL por endpoint e método. Os valores são o mínimo de idas ao banco
+# de cada operação; um aumento aqui deve ser uma decisão consciente, não um efeito colateral.
+QUERY_BUDGETS = {
+    # GET: versão (ETag) + leitura quando o cache não tem a resposta
+    ('profissionais', 'GET'): 2,
+    # POST: INSERT (a unicidade do id é garantida pela chave primária)
+    ('profissionais', 'POST'): 1,
+    # PUT: leitura + UPDATE (que também incrementa a versão)
+    ('profissionais', 'PUT'): 2,
+    # DELETE: UPDATE da exclusão lógica. Com ?hard=true, a view declara também um DELETE por
+    # tabela (as de exclusao.DEPENDENTES e a do profissional)
+    ('profissionais', 'DELETE'): 1,
+    ('contatos', 'GET'): 1,
+    # POST: UPDATE da versão do profissional (confirma que ele existe) + INSERT
+    ('contatos', 'POST'): 2,
+    # PUT/DELETE: leitura + UPDATE da versão do profissional + UPDATE/DELETE
+    ('contatos', 'PUT'): 3,
+    ('contatos', 'DELETE'): 3,
+    # GET: como em profissionais, mais a mesma página no arquivo quando o período começa no
+    # passado (ver arquivo.py)
+    ('consultas', 'GET'): 3,
+    # POST/PUT: como em contatos, mais a busca por sobreposição no índice (profissional, data_consulta),
+    # repetida no arquivo para consultas no passado
+    ('consultas', 'POST'): 4,
+    ('consultas', 'PUT'): 5,
+    ('consultas', 'DELETE'): 3,
+    ('horarios', 'GET'): 1,
+    # POST: profissional + unicidade + INSERT
+    ('horarios', 'POST'): 3,
+    ('horarios', 'DELETE'): 2,
+    # GET: profissionais + contatos + próximas consultas (prefetch), para qualquer tamanho de página
+    ('perfil', 'GET'): 3,
+    # GET: índice FTS5 + join com os profissionais, em uma consulta
+    ('busca', 'GET'): 1,
+    # GET com raio: faixas de geohash vizinhas + linhas dos mais próximos. Sem raio, a view
+    # declara uma consulta por raio tentado (ver proximidade.GEO_MAX_TENTATIVAS)
+    ('proximos', 'GET'): 2,
+    # GET: horizonte da compactação + página do feed + estado atual de cada modelo da página,
+    # mais as consultas da página que já foram arquivadas
+    ('changes', 'GET'): 6,
+    # GET: soma do resumo diário no banco, para qualquer período
+    ('estatisticas', 'GET'): 1,
+}
+
+# Consultas por bloco gravado pela inserção em lote (ver bulk.py)
+BULK_QUERIES_PER_CHUNK = {
+    # chaves existentes + INSERT ... ON CONFLICT + UPDATE das versões
+    'profissionais': 3,
+    # profissionais existentes + chaves existentes + INSERT ... ON CONFLICT + UPDATE das versões
+    'contatos': 4,
+    # contatos + consultas já gravadas na janela do bloco (sobreposição), também no arquivo
+    'consultas': 6,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def declarar_orcamento(consultas):
+    """Permite que a view informe o orçamento de uma operação de tamanho variável (lotes)."""
+    coletor = coletor_atual()
+    if coletor is not None:
+        coletor.orcamento_extra = consultas
+
+
+def orcamento(model_name, method):
+    return QUERY_BUDGETS.get((model_name, method))
+
+
+@contextmanager
+def assert_query_budget(model_name, method, budget=None, using=DEFAULT_DB_ALIAS):
+    """
+    Helper dos testes: falha se o trecho executar mais consultas que o orçamento
+    declarado para o endpoint/método. BEGIN/COMMIT e savepoints não contam.
+    """
+    from django.test.utils import CaptureQueriesContext
+
+    limite = budget if budget is not None else QUERY_BUDGETS[(model_name, method)]
+    with CaptureQueriesContext(connections[using]) as contexto:
+        yield contexto
+
+    executadas = [query['sql'] for query in contexto.captured_queries if not query['sql'].startswith(TRANSACAO_SQL)]
+    if len(executadas) > limite:
+        raise AssertionError(
+            f'{method} {model_name}: {len(executadas)} consultas, orçamento {limite}\n' + '\n'.join(executadas)
+        )
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware de desenvolvimento: com LACREI_QUERY_BUDGET_STRICT, levanta
+    QueryBudgetExceeded quando uma requisição passa do orçamento de consultas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if not getattr(settings, 'LACREI_QUERY_BUDGET_STRICT', False):
+            return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        coletor = coletor_atual()
+        if coletor is not None:
+            response = self.get_response(request)
+            self._verificar(request, coletor)
+            return response
+        with coletar(request.method) as coletor:
+            response = self.get_response(request)
+        self._verificar(request, coletor)
+        return response
+
+    async def __acall__(self, request):
+        coletor = coletor_atual()
+        if coletor is not None:
+            response = await self.get_response(request)
+            self._verificar(request, coletor)
+            return response
+        with coletar(request.method) as coletor:
+            response = await self.get_response(request)
+        self._verificar(request, coletor)
+        return response
+
+    def _verificar(self, request, coletor):
+        match = getattr(request, 'resolver_match', None)
+        model_name = (match.kwargs.get('model_name') or match.url_name) if match else None
+        limite = coletor.orcamento_extra if coletor.orcamento_extra is not None else orcamento(model_name, request.method)
+        if limite is not None and coletor.sql_count > limite:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path}: {coletor.sql_count} consultas, orçamento {limite}'
+            )
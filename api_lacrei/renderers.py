@@ -0,0 +1,47 @@
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela vale o JSON da biblioteca padrão
+    orjson = None
+
+
+# Usa o orjson, quando instalado, para gerar e interpretar JSON nas views da API
+JSON_RAPIDO = getattr(settings, 'LACREI_JSON_RAPIDO', True) and orjson is not None
+
+if orjson is not None:
+    # Datas, horas e os tipos que o orjson não conhece (Decimal, lazy strings, QuerySets)
+    # passam pelo encoder do DRF, que define a saída de hoje
+    OPCOES_ORJSON = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    _padrao = JSONEncoder().default
+
+
+def json_rapido_disponivel():
+    """O orjson gera a mesma saída do JSONRenderer do DRF com os settings atuais?"""
+    return JSON_RAPIDO and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer do DRF com o orjson: mesmos bytes (JSON compacto, UTF-8, datas no
+    formato do DRF e Decimal como número) em uma fração do tempo. Sem o orjson, com
+    indentação pedida no Accept ou com um valor que ele não serializa (ex.: inteiro
+    maior que 64 bits), usa o renderer do DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not json_rapido_disponivel() or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            conteudo = orjson.dumps(data, default=_padrao, option=OPCOES_ORJSON)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Como o DRF, escapa os separadores de linha/parágrafo (inválidos em JavaScript)
+        if b'\xe2\x80\xa8' in conteudo or b'\xe2\x80\xa9' in conteudo:
+            conteudo = conteudo.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return conteudo
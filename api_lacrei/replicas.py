@@ -0,0 +1,192 @@
+import contextvars
+import random
+import sqlite3
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .cache import CACHE_ALIAS
+
+
+# Aliases de DATABASES com cópias do primário (`default`), que atendem as leituras dos GETs
+REPLICAS = getattr(settings, 'LACREI_REPLICAS', [])
+
+# Réplicas por modelo ('api_lacrei.consulta': ['replica']); uma lista vazia deixa as
+# leituras do modelo no primário. Modelos fora do dicionário usam REPLICAS
+REPLICAS_POR_MODELO = getattr(settings, 'LACREI_REPLICAS_POR_MODELO', {})
+
+# Depois de uma escrita, as leituras ficam no primário por esse tempo (segundos): a
+# réplica pode ainda não ter recebido a escrita. Vale para o cliente que escreveu (cookie)
+# e, no servidor, para os GETs com o `id_profissional` alterado (ver fixar_profissionais)
+REPLICA_FIXACAO = getattr(settings, 'LACREI_REPLICA_FIXACAO', 5)
+COOKIE_FIXACAO = 'lacrei_primario'
+
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+class Roteamento:
+    """Estado do roteamento durante uma requisição."""
+    __slots__ = ('liberado', 'escreveu', 'escolhas')
+
+    def __init__(self, liberado):
+        self.liberado = liberado  # As leituras podem ir para as réplicas
+        self.escreveu = False
+        self.escolhas = {}  # Réplica sorteada para cada grupo de réplicas, fixa na requisição
+
+
+_roteamento = contextvars.ContextVar('lacrei_roteamento', default=None)
+
+
+@contextmanager
+def roteamento(liberado):
+    """Ativa o roteamento do trecho; com `liberado`, as leituras podem ir para as réplicas."""
+    estado = Roteamento(liberado)
+    token = _roteamento.set(estado)
+    try:
+        yield estado
+    finally:
+        _roteamento.reset(token)
+
+
+def replicas_do_modelo(model):
+    return tuple(REPLICAS_POR_MODELO.get(model._meta.label_lower, REPLICAS))
+
+
+def todas_as_replicas():
+    return set(REPLICAS).union(*REPLICAS_POR_MODELO.values())
+
+
+def _chave_fixacao(id_profissional):
+    return f'lacrei:primario:{id_profissional}'
+
+
+def fixar_profissionais(*ids_profissionais):
+    """
+    Mantém no primário, por REPLICA_FIXACAO segundos, os GETs com o `id_profissional` de
+    um profissional recém-alterado, de qualquer cliente, com ou sem o cookie. Chamado a
+    cada invalidação do cache (cache.invalidar), que acompanha toda escrita nos dados de
+    um profissional. A marca fica no backend de cache (LACREI_CACHE_ALIAS): para valer
+    entre processos, ele precisa ser compartilhado (ex.: Redis, Memcached).
+    """
+    if REPLICA_FIXACAO and ids_profissionais and todas_as_replicas():
+        caches[CACHE_ALIAS].set_many({_chave_fixacao(id_profissional): 1 for id_profissional in ids_profissionais}, REPLICA_FIXACAO)
+
+
+async def afixar_profissionais(*ids_profissionais):
+    if REPLICA_FIXACAO and ids_profissionais and todas_as_replicas():
+        await caches[CACHE_ALIAS].aset_many({_chave_fixacao(id_profissional): 1 for id_profissional in ids_profissionais}, REPLICA_FIXACAO)
+
+
+def profissional_fixado(id_profissional):
+    if not id_profissional:
+        return False
+    return caches[CACHE_ALIAS].get(_chave_fixacao(id_profissional)) is not None
+
+
+class ReplicaRouter:
+    """
+    Escritas no primário; leituras nas réplicas apenas dentro de uma requisição de
+    leitura (RoteamentoMiddleware). Fora de uma requisição (comandos, shell), dentro de
+    uma transação e depois de qualquer escrita da requisição, as leituras também ficam
+    no primário.
+    """
+
+    def db_for_read(self, model, **hints):
+        estado = _roteamento.get()
+        # Com `instance`, o Django lê as relações no banco de onde o objeto veio
+        if estado is None or not estado.liberado or estado.escreveu or 'instance' in hints:
+            return None
+        candidatas = replicas_do_modelo(model)
+        if not candidatas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replica = estado.escolhas.get(candidatas)
+        if replica is None:
+            replica = estado.escolhas[candidatas] = random.choice(candidatas)
+        return replica
+
+    def db_for_write(self, model, **hints):
+        estado = _roteamento.get()
+        if estado is not None:
+            estado.escreveu = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS} | todas_as_replicas()
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas recebem o esquema junto com os dados, pela replicação
+        if db in todas_as_replicas():
+            return False
+        return None
+
+
+class RoteamentoMiddleware:
+    """
+    Libera as réplicas para as leituras dos GETs. Uma requisição que escreve fixa o
+    cliente no primário por REPLICA_FIXACAO segundos (cookie), e um GET com o
+    `id_profissional` de um profissional alterado nesse intervalo também lê do primário
+    (fixar_profissionais), para clientes sem cookie e para os demais clientes. As
+    requisições que não são de leitura nunca leem das réplicas.
+
+    Limite: as leituras que não informam `id_profissional` (busca, proximidade, feed,
+    exportação, listagens) de um cliente sem o cookie podem ler uma réplica atrasada em
+    até o atraso da replicação; não há verificação do atraso da réplica.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if not todas_as_replicas():
+            return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with roteamento(self._liberado(request)) as estado:
+            response = self.get_response(request)
+        return self._fixar(response, estado)
+
+    async def __acall__(self, request):
+        with roteamento(self._liberado(request)) as estado:
+            response = await self.get_response(request)
+        return self._fixar(response, estado)
+
+    def _liberado(self, request):
+        return (
+            request.method in METODOS_LEITURA
+            and COOKIE_FIXACAO not in request.COOKIES
+            and not profissional_fixado(request.GET.get('id_profissional'))
+        )
+
+    def _fixar(self, response, estado):
+        if estado.escreveu and REPLICA_FIXACAO:
+            response.set_cookie(COOKIE_FIXACAO, '1', max_age=REPLICA_FIXACAO, httponly=True, samesite='Lax')
+        return response
+
+
+def replicar(replicas=None, origem=DEFAULT_DB_ALIAS):
+    """
+    Substituto local da replicação, para SQLite: copia o banco primário inteiro para
+    cada réplica com o backup online do SQLite (em WAL, a cópia não bloqueia as escritas
+    no primário). Retorna as réplicas atualizadas.
+    """
+    primario = connections[origem]
+    primario.ensure_connection()
+    replicas = list(replicas or todas_as_replicas())
+    for alias in replicas:
+        destino = sqlite3.connect(connections[alias].settings_dict['NAME'])
+        try:
+            primario.connection.backup(destino)
+        finally:
+            destino.close()
+    return replicas
@@ -1,20 +1,243 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.validators import UniqueTogetherValidator
 
-from . models import Profissional, Consulta, Contato
+import datetime
 
-class ProfissionalSerializer(serializers.ModelSerializer):
+from . agenda import DURACAO_MAXIMA, DURACAO_MINIMA
+from . metrics import medir
+from . models import Profissional, Consulta, Contato, HorarioAtendimento, duracao_padrao
+from . utils import datetime_formatter
+
+
+# Registram o tempo de validação e de representação por modelo (Server-Timing e /metrics)
+class MedidoListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with medir('serializer', self.child.Meta.model.__name__):
+            return super().data
+
+
+class MedidoModelSerializer(serializers.ModelSerializer):
+    def is_valid(self, *, raise_exception=False):
+        with medir('serializer', self.Meta.model.__name__):
+            return super().is_valid(raise_exception=raise_exception)
+
+    @property
+    def data(self):
+        with medir('serializer', self.Meta.model.__name__):
+            return super().data
+
+
+class ProfissionalSerializer(MedidoModelSerializer):
     class Meta:
         model = Profissional
+        list_serializer_class = MedidoListSerializer
+        # versao/atualizado_em são controle interno, expostos nos headers ETag/Last-Modified;
+        # geohash é derivado de latitude/longitude e excluido_em nunca aparece na API
+        exclude = ('versao', 'atualizado_em', 'geohash', 'excluido_em')
+
+
+class ConsultaSerializer(MedidoModelSerializer):
+    class Meta:
+        model = Consulta
+        fields = '__all__'
+        list_serializer_class = MedidoListSerializer
+
+
+class ContatoSerializer(MedidoModelSerializer):
+    class Meta:
+        model = Contato
+        fields = '__all__'
+        list_serializer_class = MedidoListSerializer
+
+
+class HorarioAtendimentoSerializer(MedidoModelSerializer):
+    dia_semana = serializers.IntegerField(min_value=0, max_value=6)
+
+    class Meta:
+        model = HorarioAtendimento
         fields = '__all__'
+        list_serializer_class = MedidoListSerializer
+
+    def validate(self, data):
+        if data['hora_fim'] <= data['hora_inicio']:
+            raise serializers.ValidationError('hora_fim deve ser posterior a hora_inicio')
+        return data
+
+
+# Perfil completo: espera os contatos e as próximas consultas já carregados (ver perfil.py)
+class ProfissionalPerfilSerializer(ProfissionalSerializer):
+    contatos = ContatoSerializer(source='contato_set', many=True, read_only=True)
+    proximas_consultas = ConsultaSerializer(many=True, read_only=True)
+
+
+class SerializerLeve:
+    """
+    Representação de listas a partir de `values_list()`, sem instanciar modelos nem o
+    grafo de fields do DRF por linha. As colunas, a ordem das chaves e os conversores
+    vêm dos fields do serializer original, então a saída é idêntica à dele.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self._campos = None
+        self._projecoes = {}
+
+    def _preparar(self):
+        nomes, colunas, tipos = [], [], []
+        for nome, field in self.serializer_class().fields.items():
+            nomes.append(nome)
+            colunas.append(self.model._meta.get_field(field.source).attname)
+            tipos.append(field)
+        self._campos = (tuple(nomes), tuple(colunas), tuple(tipos))
+        return self._campos
+
+    @property
+    def nomes(self):
+        return (self._campos or self._preparar())[0]
+
+    @property
+    def colunas(self):
+        return (self._campos or self._preparar())[1]
 
+    def posicao(self, coluna):
+        return self.colunas.index(coluna)
+
+    def projetar(self, campos, ocultas=()):
+        """
+        Representação só com `campos` (na ordem do serializer). As colunas de `ocultas`
+        são lidas depois das visíveis, para uso interno, e ficam fora da saída.
+        """
+        chave = (frozenset(campos), tuple(ocultas))
+        projecao = self._projecoes.get(chave)
+        if projecao is None:
+            nomes, colunas, tipos = self._campos or self._preparar()
+            visiveis = [indice for indice, nome in enumerate(nomes) if nome in chave[0]]
+            projecao = SerializerLeve(self.serializer_class)
+            colunas_visiveis = tuple(colunas[indice] for indice in visiveis)
+            # representar() combina os nomes com as colunas por zip: as ocultas, no fim, ficam de fora
+            projecao._campos = (
+                tuple(nomes[indice] for indice in visiveis),
+                colunas_visiveis + tuple(dict.fromkeys(coluna for coluna in ocultas if coluna not in colunas_visiveis)),
+                tuple(tipos[indice] for indice in visiveis),
+            )
+            projecao = self._projecoes.setdefault(chave, projecao)
+        return projecao
+
+    def linhas(self, queryset):
+        """Seleciona apenas as colunas usadas na representação."""
+        return queryset.values_list(*self.colunas)
+
+    def _conversores(self):
+        # O formatador de datas depende do fuso ativo: é montado a cada lista, não a cada linha
+        conversores = []
+        for indice, field in enumerate((self._campos or self._preparar())[2]):
+            if isinstance(field, serializers.DateTimeField):
+                conversores.append((indice, datetime_formatter()))
+            elif isinstance(field, (serializers.DateField, serializers.TimeField)):
+                formato = getattr(field, 'format', None) or ISO_8601
+                conversores.append((indice, _isoformat if formato == ISO_8601 else field.to_representation))
+        return conversores
+
+    def representar(self, linhas):
+        """Converte as tuplas de `linhas()` nos dicionários que o serializer geraria."""
+        nomes = self.nomes
+        conversores = self._conversores()
+        with medir('serializer', self.model.__name__):
+            if not conversores:
+                return [dict(zip(nomes, linha)) for linha in linhas]
+            resultado = []
+            for linha in linhas:
+                linha = list(linha)
+                for indice, conversor in conversores:
+                    if linha[indice] is not None:
+                        linha[indice] = conversor(linha[indice])
+                resultado.append(dict(zip(nomes, linha)))
+            return resultado
+
+
+def _isoformat(valor):
+    return valor.isoformat()
+
+
+PROFISSIONAL_LEVE = SerializerLeve(ProfissionalSerializer)
+CONSULTA_LEVE = SerializerLeve(ConsultaSerializer)
+CONTATO_LEVE = SerializerLeve(ContatoSerializer)
+HORARIO_LEVE = SerializerLeve(HorarioAtendimentoSerializer)
+
+
+# Serializers de escrita (inserção em lote e CRUD): não fazem consultas ao banco durante a
+# validação. A unicidade fica com as restrições do banco (IntegrityError) e a existência do
+# profissional é confirmada pelo UPDATE da versão (ver views.py) ou uma vez por lote (bulk.py).
+class ProfissionalBulkSerializer(MedidoModelSerializer):
+    id_profissional = serializers.IntegerField()
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False, allow_null=True)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False, allow_null=True)
+
+    class Meta:
+        model = Profissional
+        exclude = ('versao', 'atualizado_em', 'geohash', 'excluido_em')
+
+    def validate(self, attrs):
+        # Localização é o par completo ou nada (em atualizações parciais, com o que já está gravado)
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError({'latitude': ['Informe latitude e longitude juntas.']})
+        return attrs
+
+
+class ConsultaBulkSerializer(MedidoModelSerializer):
+    profissional = serializers.IntegerField(source='profissional_id')
+    duracao = serializers.IntegerField(min_value=DURACAO_MINIMA, max_value=DURACAO_MAXIMA, required=False)
 
-class ConsultaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Consulta
         fields = '__all__'
+        validators = []
+
+    def validate(self, attrs):
+        # Fim da consulta, usado na verificação de sobreposição (em atualizações parciais
+        # o que não foi enviado vem da própria instância)
+        inicio = attrs.get('data_consulta', getattr(self.instance, 'data_consulta', None))
+        duracao = attrs.get('duracao', getattr(self.instance, 'duracao', None) or duracao_padrao())
+        attrs['data_fim'] = inicio + datetime.timedelta(minutes=duracao)
+        return attrs
 
 
-class ContatoSerializer(serializers.ModelSerializer):
+class ContatoBulkSerializer(MedidoModelSerializer):
+    profissional = serializers.IntegerField(source='profissional_id')
+
     class Meta:
         model = Contato
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        validators = []
+
+
+# Mensagens equivalentes às dos validadores que os serializers de escrita dispensam
+MSG_PROFISSIONAL_INEXISTENTE = PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+MSG_UNICO = {
+    Contato: UniqueTogetherValidator.message.format(field_names='profissional, contato'),
+    Consulta: UniqueTogetherValidator.message.format(field_names='profissional, data_consulta'),
+}
+
+
+MSG_PROFISSIONAL_EXCLUIDO = 'Profissional excluído: o id fica reservado até o expurgo.'
+
+MSG_SOBREPOSICAO = 'Horário indisponível: o profissional já tem a consulta {id_consulta} neste intervalo.'
+
+
+def consulta_sobreposta(id_consulta):
+    return {'error': MSG_SOBREPOSICAO.format(id_consulta=id_consulta), 'conflicting_id': id_consulta}
+
+
+def profissional_inexistente(profissional_id):
+    return {'profissional': [MSG_PROFISSIONAL_INEXISTENTE.format(pk_value=profissional_id)]}
+
+
+def profissional_duplicado():
+    field = Profissional._meta.get_field('id_profissional')
+    mensagem = field.error_messages['unique'] % {'model_name': Profissional._meta.verbose_name, 'field_label': field.verbose_name}
+    return {'id_profissional': [mensagem]}
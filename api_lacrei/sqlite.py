@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    """
+    Receptor de `connection_created` (ver apps.py): aplica LACREI_SQLITE_PRAGMAS em cada
+    nova conexão SQLite. Os PRAGMAs rodam direto na conexão do sqlite3, fora dos execute
+    wrappers, então não entram na contagem de consultas da requisição.
+    """
+    pragmas = getattr(settings, 'LACREI_SQLITE_PRAGMAS', None)
+    if not pragmas or connection.vendor != 'sqlite':
+        return
+    for nome, valor in pragmas.items():
+        connection.connection.execute(f'PRAGMA {nome} = {valor}')
@@ -4,6 +4,12 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from .models import Profissional, Contato, Consulta
 
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    # O cache de leitura sobrevive entre os testes; cada teste começa com ele vazio
+    from django.core.cache import cache
+    cache.clear()
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -165,3 +171,1534 @@ def test_delete_consulta(api_client, consulta_data, profissional_data):
     assert response.status_code == status.HTTP_204_NO_CONTENT
     assert Consulta.objects.filter(id_consulta=consulta.id_consulta).count() == 0
 
+
+# Teste: Inserir Profissionais em lote (lista JSON), atualizando os existentes
+@pytest.mark.django_db
+def test_bulk_upsert_profissionais(api_client, profissional_data):
+    Profissional.objects.create(**profissional_data)
+
+    url = reverse('handle_request', args=['profissionais'])
+    lote = [
+        {**profissional_data, "profissao": "Cardiologista"},
+        {**profissional_data, "id_profissional": 2, "nome_completo": "Dra. Maria <b>Souza</b>"},
+        {"id_profissional": "abc"},
+    ]
+    response = api_client.post(url, lote, format='json')
+
+    # Verificações
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    assert (response.data['created'], response.data['updated'], response.data['failed']) == (1, 1, 1)
+    assert [r['status'] for r in response.data['results']] == ['updated', 'created', 'error']
+    assert 'id_profissional' in response.data['results'][2]['errors']
+    assert Profissional.objects.get(id_profissional=1).profissao == "Cardiologista"
+    assert Profissional.objects.get(id_profissional=2).nome_completo == "Dra. Maria &lt;b&gt;Souza&lt;/b&gt;"
+
+# Teste: Inserir Contatos em lote via NDJSON
+@pytest.mark.django_db
+def test_bulk_upsert_contatos_ndjson(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+    existente = Contato.objects.create(profissional=profissional, tipo="email", contato="joao@exemplo.com")
+
+    url = reverse('handle_request', args=['contatos'])
+    corpo = "\n".join([
+        '{"profissional": 1, "tipo": "celular", "contato": "joao@exemplo.com"}',
+        '{"profissional": 1, "tipo": "telefone", "contato": "11 99999-0000"}',
+        '',
+        '{"profissional": 99, "tipo": "email", "contato": "x@exemplo.com"}',
+    ])
+    response = api_client.post(url, corpo, content_type='application/x-ndjson')
+
+    # Verificações
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    assert [r['status'] for r in response.data['results']] == ['updated', 'created', 'error']
+    assert response.data['results'][0]['id'] == existente.id_contato
+    existente.refresh_from_db()
+    assert existente.tipo == "celular"
+    assert Contato.objects.count() == 2
+
+# Teste: Inserir Consultas em lote, sem duplicar as existentes
+@pytest.mark.django_db
+def test_bulk_upsert_consultas(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+    existente = Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+
+    url = reverse('handle_request', args=['consultas'])
+    lote = [
+        {"profissional": 1, "data_consulta": "2024-09-12T10:00:00Z"},
+        {"profissional": 1, "data_consulta": "2024-09-12T11:00:00Z"},
+        {"profissional": 1, "data_consulta": "2024-09-12T11:00:00Z"},
+    ]
+    response = api_client.post(url, lote, format='json')
+
+    # Verificações
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    assert [r['status'] for r in response.data['results']] == ['updated', 'created', 'error']
+    assert response.data['results'][0]['id'] == existente.id_consulta
+    assert Consulta.objects.count() == 2
+
+# Teste: Listar Consultas paginadas por cursor e filtradas por período
+@pytest.mark.django_db
+def test_list_consultas_paginadas(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+    for dia in range(1, 6):
+        Consulta.objects.create(profissional=profissional, data_consulta=f"2024-09-0{dia}T10:00:00Z")
+
+    url = reverse('handle_request', args=['consultas'])
+    params = {'id_profissional': profissional.id_profissional, 'from': '2024-09-02', 'to': '2024-09-05', 'limit': 2}
+    primeira = api_client.get(url, params)
+    segunda = api_client.get(url, {**params, 'cursor': primeira.data['next_cursor']})
+
+    # Verificações
+    assert primeira.status_code == status.HTTP_200_OK
+    assert [c['data_consulta'] for c in primeira.data['results']] == ["2024-09-02T10:00:00Z", "2024-09-03T10:00:00Z"]
+    assert [c['data_consulta'] for c in segunda.data['results']] == ["2024-09-04T10:00:00Z", "2024-09-05T10:00:00Z"]
+    assert segunda.data['next_cursor'] is None
+
+# Teste: Cursor inválido e profissional sem consultas
+@pytest.mark.django_db
+def test_list_consultas_erros(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+
+    url = reverse('handle_request', args=['consultas'])
+    response = api_client.get(url, {'id_profissional': profissional.id_profissional})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = api_client.get(url, {'id_profissional': profissional.id_profissional, 'cursor': 'invalido'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: A página seguinte é buscada pelo índice (profissional, data_consulta), sem ordenação extra
+@pytest.mark.django_db
+def test_list_consultas_usa_indice(profissional_data):
+    from django.db.models import Q
+    from django.utils import timezone
+
+    agora = timezone.now()
+    consulta = Consulta.objects.filter(profissional=1, data_consulta__gte=agora).filter(
+        Q(data_consulta__gt=agora) | Q(id_consulta__gt=1)
+    ).order_by('data_consulta', 'id_consulta')[:101]
+    plano = consulta.explain()
+
+    # Verificações
+    assert 'INDEX api_lacrei_consulta_profissional_id_data_consulta' in plano
+    assert 'TEMP B-TREE' not in plano
+
+# Teste: Exportar Consultas em NDJSON
+@pytest.mark.django_db
+def test_export_consultas_ndjson(api_client, profissional_data):
+    import json
+
+    profissional = Profissional.objects.create(**profissional_data)
+    for dia in range(1, 4):
+        Consulta.objects.create(profissional=profissional, data_consulta=f"2024-09-0{dia}T10:00:00Z")
+
+    url = reverse('export_request', args=['consultas'])
+    response = api_client.get(url, {'format': 'ndjson'})
+    linhas = b''.join(response.streaming_content).decode().splitlines()
+
+    # Verificações
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'application/x-ndjson'
+    assert [json.loads(linha)['data_consulta'] for linha in linhas] == [
+        "2024-09-01T10:00:00Z", "2024-09-02T10:00:00Z", "2024-09-03T10:00:00Z"
+    ]
+    assert json.loads(linhas[0])['profissional'] == profissional.id_profissional
+
+# Teste: Exportar Profissionais em CSV comprimido
+@pytest.mark.django_db
+def test_export_profissionais_csv_gzip(api_client, profissional_data):
+    import csv
+    import gzip
+
+    Profissional.objects.create(**profissional_data)
+
+    url = reverse('export_request', args=['profissionais'])
+    response = api_client.get(url, {'format': 'csv', 'gzip': '1'})
+    conteudo = gzip.decompress(b''.join(response.streaming_content)).decode()
+    linhas = list(csv.DictReader(conteudo.splitlines()))
+
+    # Verificações
+    assert response.status_code == status.HTTP_200_OK
+    assert 'profissionais.csv.gz' in response['Content-Disposition']
+    assert linhas == [{**{k: str(v) for k, v in profissional_data.items()}, 'latitude': '', 'longitude': ''}]
+
+# Teste: Comando de exportação gravando em arquivo, em blocos pequenos
+@pytest.mark.django_db
+def test_command_exportar(tmp_path, profissional_data):
+    from django.core.management import call_command
+
+    for id_profissional in range(1, 6):
+        Profissional.objects.create(**{**profissional_data, 'id_profissional': id_profissional})
+
+    destino = tmp_path / 'profissionais.csv'
+    call_command('exportar', 'profissionais', format='csv', output=str(destino), chunk_size=2)
+    linhas = destino.read_text().splitlines()
+
+    # Verificações
+    assert linhas[0] == 'id_profissional,nome_completo,nome_social,profissao,endereco,latitude,longitude'
+    assert [linha.split(',')[0] for linha in linhas[1:]] == ['1', '2', '3', '4', '5']
+
+# Teste: Buscar horários livres por profissão, respeitando consultas e expediente cadastrado
+@pytest.mark.django_db
+def test_disponibilidade(api_client, profissional_data):
+    import datetime
+    from .models import HorarioAtendimento
+
+    cardiologista = Profissional.objects.create(**{**profissional_data, 'profissao': 'Cardiologista'})
+    Profissional.objects.create(**{**profissional_data, 'id_profissional': 2, 'profissao': 'Dermatologista'})
+    # 2024-09-16 é uma segunda-feira
+    HorarioAtendimento.objects.create(
+        profissional=cardiologista, dia_semana=0, hora_inicio=datetime.time(9), hora_fim=datetime.time(11)
+    )
+    Consulta.objects.create(profissional=cardiologista, data_consulta="2024-09-16T09:30:00Z")
+
+    url = reverse('availability_request')
+    response = api_client.get(url, {'profissao': 'Cardiologista', 'from': '2024-09-16', 'to': '2024-09-16'})
+
+    # Verificações
+    assert response.status_code == status.HTTP_200_OK
+    assert [r['id_profissional'] for r in response.data['results']] == [cardiologista.id_profissional]
+    assert response.data['results'][0]['slots'] == [
+        "2024-09-16T09:00:00Z", "2024-09-16T10:00:00Z", "2024-09-16T10:30:00Z"
+    ]
+
+# Teste: Horários de atendimento sobrepostos no mesmo dia não repetem slots
+@pytest.mark.django_db
+def test_disponibilidade_expediente_sobreposto(api_client, profissional_data):
+    import datetime
+    from .models import HorarioAtendimento
+
+    profissional = Profissional.objects.create(**profissional_data)
+    # Segunda-feira: 09:00-10:30 e 10:00-11:00 se sobrepõem; 11:00-11:30 encosta no anterior
+    for hora_inicio, hora_fim in [((9, 0), (10, 30)), ((10, 0), (11, 0)), ((11, 0), (11, 30))]:
+        HorarioAtendimento.objects.create(
+            profissional=profissional, dia_semana=0,
+            hora_inicio=datetime.time(*hora_inicio), hora_fim=datetime.time(*hora_fim),
+        )
+
+    url = reverse('availability_request')
+    response = api_client.get(url, {'profissao': profissional_data['profissao'], 'from': '2024-09-16', 'to': '2024-09-16'})
+    slots = response.data['results'][0]['slots']
+
+    # Verificações
+    assert response.status_code == status.HTTP_200_OK
+    assert slots == sorted(set(slots))
+    assert slots == [f"2024-09-16T{hora}Z" for hora in ('09:00:00', '09:30:00', '10:00:00', '10:30:00', '11:00:00')]
+
+# Teste: Horários livres paginados, com expediente padrão e slots deslocados por consultas
+@pytest.mark.django_db
+def test_disponibilidade_paginada(api_client, profissional_data):
+    for id_profissional in range(1, 4):
+        Profissional.objects.create(**{**profissional_data, 'id_profissional': id_profissional})
+    Consulta.objects.create(profissional_id=1, data_consulta="2024-09-16T08:15:00Z")
+
+    url = reverse('availability_request')
+    params = {'from': '2024-09-16T08:00:00Z', 'to': '2024-09-16T10:00:00Z', 'duracao': 60, 'limit': 2}
+    primeira = api_client.get(url, params)
+    segunda = api_client.get(url, {**params, 'cursor': primeira.data['next_cursor']})
+
+    # Verificações
+    assert [r['id_profissional'] for r in primeira.data['results']] == [1, 2]
+    assert primeira.data['results'][0]['slots'] == ["2024-09-16T08:45:00Z"]
+    assert primeira.data['results'][1]['slots'] == ["2024-09-16T08:00:00Z", "2024-09-16T09:00:00Z"]
+    assert [r['id_profissional'] for r in segunda.data['results']] == [3]
+    assert segunda.data['next_cursor'] is None
+
+    response = api_client.get(url, {'from': '2024-09-16'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: Cadastrar e listar horários de atendimento
+@pytest.mark.django_db
+def test_horarios(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+
+    url = reverse('handle_request', args=['horarios'])
+    horario = {'profissional': profissional.id_profissional, 'dia_semana': 1, 'hora_inicio': '08:00', 'hora_fim': '12:00'}
+    response = api_client.post(url, horario, format='json')
+    invalido = api_client.post(url, {**horario, 'hora_fim': '07:00'}, format='json')
+    listagem = api_client.get(url, {'id_profissional': profissional.id_profissional})
+
+    # Verificações
+    assert response.status_code == status.HTTP_201_CREATED
+    assert invalido.status_code == status.HTTP_400_BAD_REQUEST
+    assert [h['hora_inicio'] for h in listagem.data] == ['08:00:00']
+
+# Teste: Leituras de profissional e consultas passam pelo cache e são invalidadas nas escritas
+@pytest.mark.django_db
+def test_cache_leituras(api_client, profissional_data):
+    from .cache import cache_stats
+
+    profissional = Profissional.objects.create(**profissional_data)
+    consulta = Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+    url_profissional = reverse('handle_request', args=['profissionais'])
+    url_consultas = reverse('handle_request', args=['consultas'])
+    params = {'id_profissional': profissional.id_profissional}
+    antes = cache_stats()
+
+    api_client.get(url_profissional, params)
+    api_client.get(url_consultas, params)
+    api_client.get(url_profissional, params)
+    assert api_client.get(url_consultas, params).data['results'][0]['data_consulta'] == "2024-09-12T10:00:00Z"
+
+    # PUT da consulta invalida as leituras do profissional
+    api_client.put(url_consultas, {'id_consulta': consulta.id_consulta, 'data_consulta': "2024-10-12T10:00:00Z"}, format='json')
+    assert api_client.get(url_consultas, params).data['results'][0]['data_consulta'] == "2024-10-12T10:00:00Z"
+
+    # DELETE do profissional (exclusão lógica) esconde as consultas junto e invalida tudo
+    api_client.delete(url_profissional, params, format='json')
+    assert api_client.get(url_profissional, params).status_code == status.HTTP_404_NOT_FOUND
+    assert api_client.get(url_consultas, params).status_code == status.HTTP_404_NOT_FOUND
+
+    # Verificações
+    depois = cache_stats()
+    assert depois['hits'] - antes['hits'] == 2
+    assert depois['misses'] - antes['misses'] == 3
+    assert api_client.get(reverse('cache_stats_request')).data['hits'] == depois['hits']
+
+# Teste: GET condicional com ETag/Last-Modified responde 304 sem rodar queryset nem serializer
+@pytest.mark.django_db
+def test_get_condicional(api_client, profissional_data, django_assert_num_queries):
+    profissional = Profissional.objects.create(**profissional_data)
+    Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+    url = reverse('handle_request', args=['consultas'])
+    params = {'id_profissional': profissional.id_profissional}
+
+    response = api_client.get(url, params)
+    etag = response['ETag']
+    assert response['Last-Modified']
+    url_profissional = reverse('handle_request', args=['profissionais'])
+    etag_profissional = api_client.get(url_profissional, params)['ETag']
+
+    # Apenas a leitura da versão do profissional
+    with django_assert_num_queries(1):
+        nao_modificado = api_client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+    por_data = api_client.get(url, params, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+    # Uma nova consulta muda a versão do profissional
+    api_client.post(url, {'profissional': profissional.id_profissional, 'data_consulta': "2024-09-13T10:00:00Z"}, format='json')
+    modificado = api_client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    # Removido e recriado com o mesmo id, o profissional volta à versão 1: o ETag antigo
+    # não pode valer para ele
+    api_client.delete(url_profissional + '?hard=true', {'id_profissional': profissional.id_profissional}, format='json')
+    api_client.post(url_profissional, profissional_data, format='json')
+    recriado = api_client.get(url_profissional, params, HTTP_IF_NONE_MATCH=etag_profissional)
+
+    # Verificações
+    assert recriado.status_code == status.HTTP_200_OK
+    assert Profissional.objects.get(id_profissional=profissional.id_profissional).versao == 1
+    assert nao_modificado.status_code == status.HTTP_304_NOT_MODIFIED
+    assert por_data.status_code == status.HTTP_304_NOT_MODIFIED
+    assert modificado.status_code == status.HTTP_200_OK
+    assert modificado['ETag'] != etag
+    assert len(modificado.data['results']) == 2
+
+# Teste: Os filtros do GET vêm da query string, não do corpo
+@pytest.mark.django_db
+def test_get_filtros_na_query_string(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+    url = reverse('handle_request', args=['profissionais'])
+
+    response = api_client.get(f'{url}?id_profissional={profissional.id_profissional}')
+    sem_filtro = api_client.generic('GET', url, '{"id_profissional": 1}', content_type='application/json')
+
+    # Verificações
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['nome_completo'] == profissional_data['nome_completo']
+    assert 'versao' not in response.data
+    assert sem_filtro.status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: CRUD pela rota assíncrona, com as mesmas respostas da rota síncrona
+# (transaction=True: as views assíncronas rodam em autocommit, como em produção)
+@pytest.mark.django_db(transaction=True)
+def test_crud_async(api_client, profissional_data):
+    from urllib.parse import urlencode
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    url = reverse('handle_request_async', args=['profissionais'])
+    criado = async_to_sync(client.post)(url, profissional_data, content_type='application/json')
+    duplicado = async_to_sync(client.post)(url, profissional_data, content_type='application/json')
+    atualizado = async_to_sync(client.put)(
+        url, {'id_profissional': 1, 'profissao': 'Cardiologista'}, content_type='application/json'
+    )
+    lido = async_to_sync(client.get)(url, {'id_profissional': 1})
+    lido_sync = api_client.get(reverse('handle_request', args=['profissionais']), {'id_profissional': 1})
+
+    url_contatos = reverse('handle_request_async', args=['contatos'])
+    contato = {'profissional': 1, 'tipo': 'email', 'contato': 'joao@exemplo.com'}
+    async_to_sync(client.post)(url_contatos, contato, content_type='application/json')
+    versao = Profissional.objects.get(id_profissional=1).versao
+    contato_duplicado = async_to_sync(client.post)(url_contatos, contato, content_type='application/json')
+    # A falha de unicidade desfaz também o incremento da versão
+    versao_apos_duplicado = Profissional.objects.get(id_profissional=1).versao
+    contato_sync = api_client.post(reverse('handle_request', args=['contatos']), contato, format='json')
+    sem_profissional = async_to_sync(client.post)(url_contatos, {**contato, 'profissional': 9}, content_type='application/json')
+
+    # Corpos de formulário e multipart, como na rota síncrona
+    telefone = {'profissional': 1, 'tipo': 'telefone', 'contato': '11999999999'}
+    formulario = async_to_sync(client.post)(url_contatos, urlencode(telefone), content_type='application/x-www-form-urlencoded')
+    multipart = async_to_sync(client.post)(url_contatos, {**telefone, 'contato': '11888888888'})
+    nao_suportado = async_to_sync(client.post)(url_contatos, 'x', content_type='text/plain')
+
+    # Verificações
+    assert criado.status_code == status.HTTP_201_CREATED
+    assert duplicado.status_code == status.HTTP_400_BAD_REQUEST
+    assert atualizado.json()['profissao'] == 'Cardiologista'
+    assert lido.content == lido_sync.content
+    assert lido['ETag'] == lido_sync['ETag']
+    assert contato_duplicado.status_code == status.HTTP_400_BAD_REQUEST
+    assert contato_duplicado.content == contato_sync.content
+    assert sem_profissional.json() == {'profissional': ['Invalid pk "9" - object does not exist.']}
+    assert versao_apos_duplicado == versao
+    assert formulario.status_code == multipart.status_code == status.HTTP_201_CREATED
+    assert formulario.json()['contato'] == '11999999999'
+    assert nao_suportado.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+# Teste: Consultas pela rota assíncrona (lote, paginação, 304 e exclusão)
+@pytest.mark.django_db
+def test_consultas_async(profissional_data):
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient
+
+    Profissional.objects.create(**profissional_data)
+    client = AsyncClient()
+    url = reverse('handle_request_async', args=['consultas'])
+    lote = [{'profissional': 1, 'data_consulta': f"2024-09-0{dia}T10:00:00Z"} for dia in range(1, 4)]
+    criadas = async_to_sync(client.post)(url, lote, content_type='application/json')
+
+    primeira = async_to_sync(client.get)(url, {'id_profissional': 1, 'limit': 2})
+    segunda = async_to_sync(client.get)(url, {'id_profissional': 1, 'limit': 2, 'cursor': primeira.json()['next_cursor']})
+    nao_modificado = async_to_sync(client.get)(url, {'id_profissional': 1, 'limit': 2}, headers={'If-None-Match': primeira['ETag']})
+
+    id_consulta = criadas.json()['results'][0]['id']
+    removida = async_to_sync(client.delete)(url, {'id_consulta': id_consulta}, content_type='application/json')
+
+    # Verificações
+    assert criadas.json()['created'] == 3
+    assert [c['data_consulta'] for c in primeira.json()['results']] == ["2024-09-01T10:00:00Z", "2024-09-02T10:00:00Z"]
+    assert [c['data_consulta'] for c in segunda.json()['results']] == ["2024-09-03T10:00:00Z"]
+    assert nao_modificado.status_code == status.HTTP_304_NOT_MODIFIED
+    assert removida.status_code == status.HTTP_204_NO_CONTENT
+    assert Consulta.objects.count() == 2
+
+# Teste: Server-Timing por requisição e histogramas no /metrics
+@pytest.mark.django_db
+def test_server_timing_e_metrics(api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+    Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+
+    response = api_client.get(reverse('handle_request', args=['consultas']), {'id_profissional': 1})
+    # Modelos desconhecidos e rotas inexistentes não criam séries próprias
+    api_client.get(reverse('handle_request', args=['qualquer-coisa']))
+    api_client.get('/nao-existe/')
+    metricas = api_client.get(reverse('metrics')).content.decode()
+
+    # Verificações
+    server_timing = response['Server-Timing']
+    assert server_timing.startswith('total;dur=')
+    # Versão + página de consultas + a mesma página no arquivo (período sem início)
+    assert 'db;dur=' in server_timing and 'desc="3 queries"' in server_timing
+    assert 'serializer;dur=' in server_timing and 'render;dur=' in server_timing
+    assert 'lacrei_http_request_duration_seconds_bucket{model="consultas",method="GET",status="200",le="+Inf"}' in metricas
+    assert 'lacrei_serializer_duration_seconds_count{model="Consulta",method="GET"}' in metricas
+    assert 'lacrei_cache_misses_total' in metricas
+    assert 'model="qualquer-coisa"' not in metricas
+    assert 'lacrei_http_request_duration_seconds_count{model="other",method="GET",status="400"}' in metricas
+    assert 'lacrei_http_request_duration_seconds_count{model="other",method="GET",status="404"}' in metricas
+
+# Teste: Valores de rótulo escapados no formato do Prometheus
+def test_metrics_escapa_rotulos():
+    from .metrics import Histograma
+
+    histograma = Histograma('teste', 'Teste.', ('model',), (1.0,))
+    histograma.observar(0.5, 'a"b\\c\nd')
+
+    # Verificações
+    assert 'teste_count{model="a\\"b\\\\c\\nd"} 1' in histograma.exportar()
+
+# Teste: Escritas pelo admin incrementam a versão, descartam o cache e recusam sobreposições
+@pytest.mark.django_db
+def test_admin_incrementa_versao(admin_client, api_client, profissional_data):
+    profissional = Profissional.objects.create(**profissional_data)
+    contato = Contato.objects.create(profissional=profissional, tipo='email', contato='joao@exemplo.com')
+    consulta = Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+    url_profissional = reverse('handle_request', args=['profissionais'])
+    url_consultas = reverse('handle_request', args=['consultas'])
+    params = {'id_profissional': profissional.id_profissional}
+    versao = lambda: Profissional.objects.get(id_profissional=profissional.id_profissional).versao
+    etag = api_client.get(url_profissional, params)['ETag']
+    api_client.get(url_consultas, params)
+
+    v0 = versao()
+    alterar_profissional = admin_client.post(reverse('admin:api_lacrei_profissional_change', args=[profissional.pk]), {
+        **profissional_data, 'nome_social': 'Jo', 'latitude': '', 'longitude': '',
+    })
+    v1 = versao()
+    alterar_contato = admin_client.post(reverse('admin:api_lacrei_contato_change', args=[contato.pk]), {
+        'profissional': profissional.pk, 'tipo': 'email', 'contato': 'novo@exemplo.com',
+    })
+    v2 = versao()
+    alterar_consulta = admin_client.post(reverse('admin:api_lacrei_consulta_change', args=[consulta.pk]), {
+        'profissional': profissional.pk, 'data_consulta_0': '2024-09-12', 'data_consulta_1': '14:00:00', 'duracao': 30,
+    })
+    v3 = versao()
+    sobreposta = admin_client.post(reverse('admin:api_lacrei_consulta_add'), {
+        'profissional': profissional.pk, 'data_consulta_0': '2024-09-12', 'data_consulta_1': '14:15:00', 'duracao': 30,
+    })
+    v4 = versao()
+    remover_contatos = admin_client.post(reverse('admin:api_lacrei_contato_changelist'), {
+        'action': 'delete_selected', '_selected_action': [contato.pk], 'post': 'yes',
+    })
+    v5 = versao()
+
+    # Verificações
+    assert alterar_profissional.status_code == alterar_contato.status_code == alterar_consulta.status_code == 302
+    assert remover_contatos.status_code == 302
+    assert v0 < v1 < v2 < v3 and v4 == v3 and v5 > v4
+    assert api_client.get(url_profissional, params)['ETag'] != etag
+    assert api_client.get(url_profissional, params).data['nome_social'] == 'Jo'
+    assert api_client.get(url_consultas, params).data['results'][0]['data_consulta'] == "2024-09-12T14:00:00Z"
+    assert sobreposta.status_code == 200
+    assert 'já tem a consulta' in sobreposta.content.decode()
+    assert Consulta.objects.count() == 1
+    assert not Contato.objects.exists()
+
+# Teste: Orçamento de consultas SQL por endpoint (escritas e leituras)
+@pytest.mark.django_db
+def test_orcamento_de_consultas(api_client, profissional_data, contato_data, consulta_data):
+    from .query_budget import assert_query_budget
+
+    url = lambda model_name: reverse('handle_request', args=[model_name])
+    with assert_query_budget('profissionais', 'POST'):
+        api_client.post(url('profissionais'), profissional_data, format='json')
+    with assert_query_budget('profissionais', 'PUT'):
+        api_client.put(url('profissionais'), {'id_profissional': 1, 'profissao': 'Cardiologista'}, format='json')
+    with assert_query_budget('profissionais', 'GET'):
+        api_client.get(url('profissionais'), {'id_profissional': 1})
+
+    with assert_query_budget('contatos', 'POST'):
+        contato = api_client.post(url('contatos'), {**contato_data, 'profissional': 1}, format='json')
+    with assert_query_budget('contatos', 'PUT'):
+        api_client.put(url('contatos'), {'id_contato': contato.data['id_contato'], 'tipo': 'telefone'}, format='json')
+    with assert_query_budget('contatos', 'DELETE'):
+        api_client.delete(url('contatos'), {'id_contato': contato.data['id_contato']}, format='json')
+
+    with assert_query_budget('consultas', 'POST'):
+        consulta = api_client.post(url('consultas'), {**consulta_data, 'profissional': 1}, format='json')
+    with assert_query_budget('consultas', 'GET'):
+        api_client.get(url('consultas'), {'id_profissional': 1})
+    with assert_query_budget('consultas', 'PUT'):
+        api_client.put(url('consultas'), {'id_consulta': consulta.data['id_consulta'], 'data_consulta': "2024-09-13T10:00:00Z"}, format='json')
+    with assert_query_budget('consultas', 'DELETE'):
+        api_client.delete(url('consultas'), {'id_consulta': consulta.data['id_consulta']}, format='json')
+
+    with assert_query_budget('profissionais', 'DELETE'):
+        api_client.delete(url('profissionais'), {'id_profissional': 1}, format='json')
+
+    # Verificações
+    assert contato.status_code == status.HTTP_201_CREATED
+    assert consulta.status_code == status.HTTP_201_CREATED
+    assert not Profissional.objects.exists()
+
+# Teste: Erros das escritas sem consultas de validação (profissional inexistente e duplicados)
+@pytest.mark.django_db
+def test_escritas_sem_consultas_de_validacao(api_client, profissional_data, contato_data):
+    Profissional.objects.create(**profissional_data)
+    url = reverse('handle_request', args=['contatos'])
+
+    duplicado = api_client.post(reverse('handle_request', args=['profissionais']), profissional_data, format='json')
+    criado = api_client.post(url, {**contato_data, 'profissional': 1}, format='json')
+    repetido = api_client.post(url, {**contato_data, 'profissional': 1}, format='json')
+    sem_profissional = api_client.post(url, {**contato_data, 'profissional': 9}, format='json')
+    troca_invalida = api_client.put(url, {'id_contato': criado.data['id_contato'], 'profissional': 9}, format='json')
+
+    # Verificações
+    assert duplicado.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'id_profissional' in duplicado.data
+    assert repetido.data == {'non_field_errors': ['The fields profissional, contato must make a unique set.']}
+    assert sem_profissional.data == {'profissional': ['Invalid pk "9" - object does not exist.']}
+    assert troca_invalida.status_code == status.HTTP_400_BAD_REQUEST
+    # A troca inválida é desfeita por inteiro, inclusive a versão do profissional anterior
+    assert Profissional.objects.get(id_profissional=1).versao == 2
+    assert Contato.objects.get().profissional_id == 1
+
+# Teste: Middleware de orçamento falha quando uma requisição passa do limite
+@pytest.mark.django_db
+def test_query_budget_middleware(api_client, profissional_data, settings, monkeypatch):
+    from .query_budget import QUERY_BUDGETS, QueryBudgetExceeded
+
+    Profissional.objects.create(**profissional_data)
+    settings.LACREI_QUERY_BUDGET_STRICT = True
+    monkeypatch.setitem(QUERY_BUDGETS, ('profissionais', 'GET'), 1)
+    url = reverse('handle_request', args=['profissionais'])
+
+    # Verificações
+    with pytest.raises(QueryBudgetExceeded):
+        api_client.get(url, {'id_profissional': 1})
+    # Com a resposta em cache a mesma requisição cabe no orçamento
+    assert api_client.get(url, {'id_profissional': 1}).status_code == status.HTTP_200_OK
+
+# Teste: Serializers leves geram a mesma saída dos ModelSerializers
+@pytest.mark.django_db
+@pytest.mark.parametrize('fuso', ['UTC', 'America/Sao_Paulo'])
+def test_serializers_leves(profissional_data, fuso):
+    import datetime
+    from django.utils import timezone
+    from rest_framework.renderers import JSONRenderer
+    from .models import HorarioAtendimento
+    from .serializers import (
+        CONSULTA_LEVE, CONTATO_LEVE, HORARIO_LEVE, PROFISSIONAL_LEVE,
+        ConsultaSerializer, ContatoSerializer, HorarioAtendimentoSerializer, ProfissionalSerializer,
+    )
+
+    profissional = Profissional.objects.create(**profissional_data)
+    Contato.objects.create(profissional=profissional, tipo='email', contato='joao@exemplo.com')
+    Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+    Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:30:00.123456Z")
+    HorarioAtendimento.objects.create(profissional=profissional, dia_semana=1, hora_inicio=datetime.time(8), hora_fim=datetime.time(12, 30))
+
+    renderer = JSONRenderer()
+    with timezone.override(fuso):
+        for leve, serializer_class in (
+            (PROFISSIONAL_LEVE, ProfissionalSerializer),
+            (CONTATO_LEVE, ContatoSerializer),
+            (CONSULTA_LEVE, ConsultaSerializer),
+            (HORARIO_LEVE, HorarioAtendimentoSerializer),
+        ):
+            queryset = serializer_class.Meta.model.objects.order_by('pk')
+
+            # Verificações
+            esperado = renderer.render(serializer_class(queryset, many=True).data)
+            assert renderer.render(leve.representar(leve.linhas(queryset))) == esperado
+
+# Teste: Perfil completo com contatos e próximas consultas em número fixo de consultas
+@pytest.mark.django_db
+def test_perfil(api_client, profissional_data, monkeypatch):
+    import datetime
+    from django.utils import timezone
+    from . import perfil
+    from .query_budget import assert_query_budget
+
+    monkeypatch.setattr(perfil, 'PERFIL_CONSULTAS', 2)
+    agora = timezone.now()
+    for id_profissional in range(1, 6):
+        profissional = Profissional.objects.create(**{**profissional_data, 'id_profissional': id_profissional})
+        Contato.objects.create(profissional=profissional, tipo='email', contato=f'p{id_profissional}@exemplo.com')
+        for dias in (-1, 1, 2, 3):
+            Consulta.objects.create(profissional=profissional, data_consulta=agora + datetime.timedelta(days=dias))
+
+    url = reverse('perfil')
+    with assert_query_budget('perfil', 'GET'):
+        primeira = api_client.get(url, {'limit': 4})
+    segunda = api_client.get(url, {'limit': 4, 'cursor': primeira.data['next_cursor']})
+    unico = api_client.get(url, {'id_profissional': 1})
+    nao_modificado = api_client.get(url, {'id_profissional': 1}, HTTP_IF_NONE_MATCH=unico['ETag'])
+
+    # Verificações
+    assert [p['id_profissional'] for p in primeira.data['results']] == [1, 2, 3, 4]
+    assert [p['id_profissional'] for p in segunda.data['results']] == [5]
+    assert segunda.data['next_cursor'] is None
+    assert unico.data['contatos'] == [{'id_contato': 1, 'tipo': 'email', 'contato': 'p1@exemplo.com', 'profissional': 1}]
+    # Apenas as próximas consultas (a de ontem fica de fora), limitadas por profissional
+    assert len(unico.data['proximas_consultas']) == 2
+    assert all(c['data_consulta'] > agora.isoformat().replace('+00:00', 'Z') for c in unico.data['proximas_consultas'])
+    assert nao_modificado.status_code == status.HTTP_304_NOT_MODIFIED
+    assert api_client.get(url, {'id_profissional': 99}).status_code == status.HTTP_404_NOT_FOUND
+
+# Teste: GET de contatos e __str__ sem consultas extras
+@pytest.mark.django_db
+def test_get_contatos_e_str(api_client, profissional_data, contato_data, django_assert_num_queries):
+    profissional = Profissional.objects.create(**profissional_data)
+    Contato.objects.create(profissional=profissional, **contato_data)
+    Consulta.objects.create(profissional=profissional, data_consulta="2024-09-12T10:00:00Z")
+
+    response = api_client.get(reverse('handle_request', args=['contatos']), {'id_profissional': 1})
+    contatos = list(Contato.objects.all())
+    consultas = list(Consulta.objects.all())
+
+    # Verificações
+    assert response.data == [{'id_contato': 1, 'tipo': 'email', 'contato': 'joao.silva@exemplo.com', 'profissional': 1}]
+    with django_assert_num_queries(0):
+        assert str(contatos[0]) == 'Profissional 1 - joao.silva@exemplo.com'
+        assert str(consultas[0]).startswith('Consulta de Profissional 1 em')
+    assert str(Contato.objects.select_related('profissional').get()) == 'Dr. João Silva - joao.silva@exemplo.com'
+
+# Teste: PRAGMAs do perfil de produção aplicados em cada nova conexão
+@pytest.mark.django_db
+def test_pragmas_sqlite(settings):
+    from django.db import connection
+    from api_root import settings_producao
+    from .sqlite import aplicar_pragmas
+
+    settings.LACREI_SQLITE_PRAGMAS = {'cache_size': -32000, 'busy_timeout': 1234}
+    aplicar_pragmas(sender=None, connection=connection)
+
+    # Verificações
+    with connection.cursor() as cursor:
+        assert cursor.execute('PRAGMA cache_size').fetchone() == (-32000,)
+        assert cursor.execute('PRAGMA busy_timeout').fetchone() == (1234,)
+    assert settings_producao.LACREI_SQLITE_PRAGMAS['journal_mode'] == 'WAL'
+    assert settings_producao.DATABASES['default']['OPTIONS']['transaction_mode'] == 'IMMEDIATE'
+    assert settings_producao.DATABASES['default']['CONN_MAX_AGE'] > 0
+
+# Teste: Gerador de dados dos benchmarks (esquema atual) e comparação de resultados
+@pytest.mark.django_db
+def test_gerador_e_comparacao_de_benchmarks():
+    from benchmarks.comparar import comparar
+    from benchmarks.gerar_dados import gerar
+    from .busca import buscar_profissionais
+    from .models import HorarioAtendimento
+
+    contagem = gerar(profissionais=20, contatos=50, consultas=200, verbose=False)
+
+    def resultado(p50, erros=0):
+        return {'cenarios': [{'model': 'consultas', 'method': 'GET', 'p50_ms': p50, 'p95_ms': 10.0, 'req_s': 100.0, 'erros': erros}]}
+
+    # Verificações
+    assert contagem == {'Profissional': 20, 'Contato': 50, 'Consulta': 200, 'HorarioAtendimento': 10}
+    assert Consulta.objects.filter(profissional=1).count() == 10
+    assert Profissional.objects.get(id_profissional=3).versao == 1
+    assert HorarioAtendimento.objects.filter(profissional=1).count() == 5
+    # A carga suspende os gatilhos da busca e reconstrói o índice no fim
+    assert [p['id_profissional'] for p in buscar_profissionais('maria ')] == [1]
+    assert comparar(resultado(5.0), resultado(5.5))[0][2] == []
+    assert comparar(resultado(5.0), resultado(8.0))[0][2] == ['p50_ms']
+    assert comparar(resultado(5.0), resultado(5.0, erros=3))[0][2] == ['erros']
+
+# Teste: Cada cenário do bench_api roda sem erro no esquema e nas regras atuais (duas
+# iterações com um único profissional: as consultas criadas não podem se sobrepor)
+@pytest.mark.django_db
+def test_cenarios_do_bench_api():
+    import random
+    from benchmarks.bench_api import TransporteLocal, cenarios
+    from benchmarks.gerar_dados import gerar
+
+    gerar(profissionais=1, contatos=2, consultas=5, verbose=False)
+    transporte = TransporteLocal()
+    falhas = []
+    for cenario in cenarios(profissionais=1, base=0):
+        for i in range(2):
+            status_code, dados = transporte.executar(cenario.preparar(transporte, i, random.Random(i)))
+            if status_code >= 400:
+                falhas.append((cenario.nome, status_code, dados))
+
+    # Verificações
+    assert falhas == []
+
+# Teste: O lote é conferido contra o banco só nas janelas dos próprios itens, mesmo
+# quando eles cobrem anos
+@pytest.mark.django_db
+def test_conflitos_do_lote_por_janela(profissional_data):
+    import datetime
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from .agenda import _janelas, conflitos_com_o_banco
+
+    profissional = Profissional.objects.create(**profissional_data)
+    utc = datetime.timezone.utc
+    # Um ano de consultas entre os dois itens do lote, que não deve ser lido
+    for dia in range(0, 360, 3):
+        Consulta.objects.create(profissional=profissional, data_consulta=datetime.datetime(2025, 1, 1, 10, tzinfo=utc) + datetime.timedelta(days=dia))
+    primeira = Consulta.objects.create(profissional=profissional, data_consulta=datetime.datetime(2024, 6, 1, 10, tzinfo=utc))
+
+    def item(inicio):
+        return {'profissional_id': profissional.id_profissional, 'data_consulta': inicio, 'data_fim': inicio + datetime.timedelta(minutes=30)}
+
+    lote = [
+        (0, item(datetime.datetime(2024, 6, 1, 10, 15, tzinfo=utc))),  # Sobrepõe `primeira`
+        (1, item(datetime.datetime(2024, 6, 1, 10, 45, tzinfo=utc))),
+        (2, item(datetime.datetime(2026, 6, 1, 10, tzinfo=utc))),
+    ]
+    with CaptureQueriesContext(connection) as consultas:
+        conflitos = conflitos_com_o_banco(lote)
+
+    # Verificações
+    assert conflitos == {0: primeira.id_consulta}
+    assert [(janela[1].year, janela[2].year) for janela in _janelas(lote)] == [(2024, 2024), (2026, 2026)]
+    # Uma consulta por tabela (as janelas no passado também são buscadas no arquivo), com
+    # as janelas unidas por OR
+    assert len(consultas.captured_queries) == 2
+    assert ' OR ' in consultas.captured_queries[0]['sql']
+
+# Teste: Consultas com duração; sobreposições recusadas no POST/PUT, no lote e na disponibilidade
+@pytest.mark.django_db
+def test_sobreposicao_de_consultas(api_client, profissional_data):
+    import datetime
+    from django.utils import timezone
+    from .availability import slots_livres
+    from .query_budget import assert_query_budget
+
+    Profissional.objects.create(**profissional_data)
+    url = reverse('handle_request', args=['consultas'])
+
+    with assert_query_budget('consultas', 'POST'):
+        longa = api_client.post(url, {'profissional': 1, 'data_consulta': '2024-09-12T10:00:00Z', 'duracao': 60}, format='json')
+    sobreposta = api_client.post(url, {'profissional': 1, 'data_consulta': '2024-09-12T10:15:00Z'}, format='json')
+    duplicada = api_client.post(url, {'profissional': 1, 'data_consulta': '2024-09-12T10:00:00Z'}, format='json')
+    seguinte = api_client.post(url, {'profissional': 1, 'data_consulta': '2024-09-12T11:00:00Z'}, format='json')
+    longa_demais = api_client.post(url, {'profissional': 1, 'data_consulta': '2024-09-13T10:00:00Z', 'duracao': 600}, format='json')
+    with assert_query_budget('consultas', 'PUT'):
+        antecipada = api_client.put(url, {'id_consulta': seguinte.data['id_consulta'], 'data_consulta': '2024-09-12T10:30:00Z'}, format='json')
+    estendida = api_client.put(url, {'id_consulta': seguinte.data['id_consulta'], 'duracao': 90}, format='json')
+
+    lote = api_client.post(url, [
+        {'profissional': 1, 'data_consulta': '2024-09-12T14:00:00Z'},
+        {'profissional': 1, 'data_consulta': '2024-09-12T14:15:00Z'},
+        {'profissional': 1, 'data_consulta': '2024-09-12T11:30:00Z'},
+        {'profissional': 1, 'data_consulta': '2024-09-12T10:00:00Z', 'duracao': 45},
+    ], format='json')
+
+    inicio = timezone.make_aware(datetime.datetime(2024, 9, 12, 9), datetime.timezone.utc)
+    hora = datetime.timedelta(hours=1)
+    livres = slots_livres([(inicio, inicio + 4 * hora)], [(inicio + hora, inicio + 3 * hora)], hora)
+
+    # Verificações
+    assert longa.status_code == status.HTTP_201_CREATED
+    assert longa.data['data_fim'] == '2024-09-12T11:00:00Z'
+    assert sobreposta.status_code == duplicada.status_code == status.HTTP_409_CONFLICT
+    assert sobreposta.data['conflicting_id'] == longa.data['id_consulta']
+    assert seguinte.status_code == status.HTTP_201_CREATED
+    assert 'duracao' in longa_demais.data
+    assert antecipada.status_code == status.HTTP_409_CONFLICT
+    # A tentativa recusada não altera a consulta
+    assert Consulta.objects.get(id_consulta=seguinte.data['id_consulta']).data_consulta.hour == 11
+    assert estendida.status_code == status.HTTP_200_OK
+    assert estendida.data['data_fim'] == '2024-09-12T12:30:00Z'
+    assert [r['status'] for r in lote.data['results']] == ['created', 'error', 'error', 'updated']
+    assert 'índice 0' in lote.data['results'][1]['errors']['non_field_errors'][0]
+    assert Consulta.objects.get(id_consulta=longa.data['id_consulta']).duracao == 45
+    assert livres == [inicio, inicio + 3 * hora]
+
+# Teste: Busca textual por relevância, por prefixo e sem acentos, sincronizada com as escritas
+@pytest.mark.django_db
+def test_busca_profissionais(api_client, profissional_data):
+    from django.db import connection
+    from .busca import expressao_fts
+    from .exclusao import expurgar
+    from .query_budget import assert_query_budget
+
+    url_profissionais = reverse('handle_request', args=['profissionais'])
+    api_client.post(url_profissionais, profissional_data, format='json')
+    api_client.post(url_profissionais, {**profissional_data, 'id_profissional': 2, 'nome_completo': 'Maria Souza',
+                                        'nome_social': '', 'endereco': 'Rua João Pessoa, 10'}, format='json')
+    api_client.post(url_profissionais, {**profissional_data, 'id_profissional': 3, 'nome_completo': 'Joana Araújo',
+                                        'nome_social': '', 'profissao': 'Pediatra'}, format='json')
+    url = reverse('busca')
+
+    def ids(q, **params):
+        response = api_client.get(url, {'q': q, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return [r['id_profissional'] for r in response.data['results']]
+
+    with assert_query_budget('busca', 'GET'):
+        ranking = ids('joao ')
+    prefixo = ids('jo')
+    sem_acento = ids('ARAUJO pedi')
+    por_profissao = ids('jo', profissao='Pediatra')
+    api_client.put(url_profissionais, {'id_profissional': 1, 'nome_completo': 'Pedro Lima', 'nome_social': 'Pedro'}, format='json')
+    depois_do_put = ids('joao ')
+    api_client.delete(url_profissionais, {'id_profissional': 3}, format='json')
+
+    # Verificações
+    # O nome pesa mais que o endereço
+    assert ranking == [1, 2]
+    assert sorted(prefixo) == [1, 2, 3]
+    assert sem_acento == [3]
+    assert por_profissao == [3]
+    assert depois_do_put == [2] and ids('pedro lima') == [1]
+    assert ids('joana') == []
+    # Operadores do FTS5 digitados pelo usuário viram termos comuns
+    assert expressao_fts('joão OR "xy') == '"joão" "OR" "xy"*'
+    assert expressao_fts('maria s') == '"maria" "s"'
+    assert ids('maria NEAR(') == []
+    assert api_client.get(url, {'q': ' ,. '}).status_code == status.HTTP_400_BAD_REQUEST
+    # O índice confere com a tabela depois que o expurgo remove o profissional excluído
+    list(expurgar())
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO api_lacrei_profissional_fts(api_lacrei_profissional_fts, rank) VALUES ('integrity-check', 1)")
+
+# Teste: Profissionais mais próximos (k e raio), por profissão, pelas células de geohash
+@pytest.mark.django_db
+def test_proximos(api_client, profissional_data):
+    from .query_budget import assert_query_budget
+
+    url_profissionais = reverse('handle_request', args=['profissionais'])
+    locais = {
+        1: ('Médico', -23.5614, -46.6559),    # Av. Paulista
+        2: ('Médico', -23.5670, -46.6940),    # Pinheiros, ~4 km
+        3: ('Médico', -23.9608, -46.3336),    # Santos, ~55 km
+        4: ('Pediatra', -23.5614, -46.6559),
+        5: ('Médico', 0.0, 179.999),          # Antimeridiano
+        6: ('Médico', 0.0, -179.999),
+    }
+    for id_profissional, (profissao, latitude, longitude) in locais.items():
+        api_client.post(url_profissionais, {**profissional_data, 'id_profissional': id_profissional, 'profissao': profissao,
+                                            'latitude': latitude, 'longitude': longitude}, format='json')
+    api_client.post(url_profissionais, {**profissional_data, 'id_profissional': 7}, format='json')
+    sem_par = api_client.post(url_profissionais, {**profissional_data, 'id_profissional': 8, 'latitude': -23.5}, format='json')
+    url = reverse('proximos')
+
+    def ids(**params):
+        response = api_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        return [r['id_profissional'] for r in response.data['results']]
+
+    ponto = {'lat': -23.5613, 'lon': -46.6565}
+    dois_mais_proximos = api_client.get(url, {**ponto, 'profissao': 'Médico', 'limit': 2})
+    with assert_query_budget('proximos', 'GET'):
+        no_raio = ids(**ponto, raio=10)
+    antes_do_put = ids(**ponto, profissao='Médico', raio=10)
+    tres_mais_proximos = ids(**ponto, profissao='Médico', limit=3)
+    api_client.put(url_profissionais, {'id_profissional': 3, 'latitude': -23.5620, 'longitude': -46.6570}, format='json')
+
+    # Verificações
+    assert [r['id_profissional'] for r in dois_mais_proximos.data['results']] == [1, 2]
+    distancias = [r['distancia_km'] for r in dois_mais_proximos.data['results']]
+    assert distancias[0] < 0.1 and 3.5 < distancias[1] < 4.5
+    assert tres_mais_proximos == [1, 2, 3]
+    assert no_raio == [1, 4, 2]
+    assert antes_do_put == [1, 2]
+    assert ids(**ponto, profissao='Médico', raio=10) == [1, 3, 2]
+    assert sorted(ids(lat=0, lon=179.9995, raio=5)) == [5, 6]
+    assert Profissional.objects.get(id_profissional=7).geohash is None
+    assert sem_par.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'geohash' not in dois_mais_proximos.data['results'][0]
+    assert api_client.get(url, {'lat': 91, 'lon': 0}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(url, {**ponto, 'raio': 0}).status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: Exclusão lógica esconde o profissional na hora; o expurgo e o DELETE definitivo removem as linhas
+@pytest.mark.django_db
+def test_exclusao_profissional(api_client, profissional_data, contato_data):
+    import datetime
+    from django.core.management import call_command
+    from .models import HorarioAtendimento
+    from .query_budget import assert_query_budget
+    from .serializers import MSG_PROFISSIONAL_EXCLUIDO
+
+    inicio = datetime.datetime(2024, 9, 12, 8, tzinfo=datetime.timezone.utc)
+    for id_profissional in (1, 2):
+        profissional = Profissional.objects.create(**{**profissional_data, 'id_profissional': id_profissional,
+                                                      'latitude': -23.5614, 'longitude': -46.6559})
+        for numero in range(3):
+            Contato.objects.create(profissional=profissional, tipo='email', contato=f'p{id_profissional}-{numero}@exemplo.com')
+        Consulta.objects.bulk_create(Consulta(profissional=profissional, data_consulta=inicio + datetime.timedelta(hours=horas))
+                                     for horas in range(5))
+        HorarioAtendimento.objects.create(profissional=profissional, dia_semana=0, hora_inicio='08:00', hora_fim='12:00')
+
+    url = reverse('handle_request', args=['profissionais'])
+    params = {'id_profissional': 1}
+    with assert_query_budget('profissionais', 'DELETE'):
+        excluido = api_client.delete(url, params, format='json')
+    contato = api_client.post(reverse('handle_request', args=['contatos']), {**contato_data, 'profissional': 1}, format='json')
+    lote = api_client.post(url, [{**profissional_data, 'nome_completo': 'Outro Nome'}], format='json')
+    proximos = api_client.get(reverse('proximos'), {'lat': -23.5614, 'lon': -46.6559, 'raio': 1})
+    exportados = b''.join(api_client.get(reverse('export_request', args=['contatos'])).streaming_content).decode()
+    linhas_antes = Contato.objects.filter(profissional_id=1).count(), Consulta.objects.filter(profissional_id=1).count()
+
+    call_command('expurgar', lote=2)
+
+    with assert_query_budget('profissionais', 'DELETE', budget=7):
+        definitivo = api_client.delete(url + '?hard=true', {'id_profissional': 2}, format='json')
+
+    # Verificações
+    assert excluido.status_code == status.HTTP_204_NO_CONTENT
+    # Some de todas as leituras antes do expurgo
+    assert api_client.get(url, params).status_code == status.HTTP_404_NOT_FOUND
+    assert api_client.get(reverse('handle_request', args=['contatos']), params).data == []
+    assert api_client.get(reverse('handle_request', args=['horarios']), params).data == []
+    assert api_client.get(reverse('handle_request', args=['consultas']), params).status_code == status.HTTP_404_NOT_FOUND
+    assert api_client.get(reverse('perfil'), params).status_code == status.HTTP_404_NOT_FOUND
+    assert [r['id_profissional'] for r in proximos.data['results']] == [2]
+    assert '"profissional": 1' not in exportados and exportados.count('\n') == 3
+    assert contato.status_code == status.HTTP_400_BAD_REQUEST
+    assert lote.data['results'][0]['errors'] == {'non_field_errors': [MSG_PROFISSIONAL_EXCLUIDO]}
+    assert api_client.delete(url, params, format='json').status_code == status.HTTP_404_NOT_FOUND
+    # As linhas ficam até o expurgo, que remove só as do profissional excluído
+    assert linhas_antes == (3, 5)
+    assert not Profissional.todos.filter(id_profissional=1).exists()
+    assert not Contato.objects.filter(profissional_id=1).exists() and not Consulta.objects.filter(profissional_id=1).exists()
+    assert not HorarioAtendimento.objects.filter(profissional_id=1).exists()
+    # O DELETE definitivo remove tudo na hora
+    assert definitivo.status_code == status.HTTP_204_NO_CONTENT
+    assert not Profissional.todos.exists() and not Contato.objects.exists() and not Consulta.objects.exists()
+
+# Teste: Feed de alterações em ordem, paginado por cursor, com exclusões e compactação
+@pytest.mark.django_db
+def test_feed_de_alteracoes(api_client, profissional_data, contato_data, consulta_data):
+    import datetime
+    from django.core.management import call_command
+    from .alteracoes import cursor_atual
+    from .models import Alteracao
+    from .query_budget import assert_query_budget
+
+    url = reverse('changes')
+    profissionais = reverse('handle_request', args=['profissionais'])
+    consultas = reverse('handle_request', args=['consultas'])
+    api_client.post(profissionais, profissional_data, format='json')
+    contato = api_client.post(reverse('handle_request', args=['contatos']), {**contato_data, 'profissional': 1}, format='json')
+    consulta = api_client.post(consultas, {**consulta_data, 'profissional': 1}, format='json')
+    api_client.put(consultas, {'id_consulta': consulta.data['id_consulta'], 'data_consulta': '2024-09-12T11:00:00Z'}, format='json')
+    api_client.put(profissionais, {'id_profissional': 1, 'nome_completo': 'Dr. João Souza'}, format='json')
+    api_client.delete(reverse('handle_request', args=['contatos']), {'id_contato': contato.data['id_contato']}, format='json')
+
+    with assert_query_budget('changes', 'GET'):
+        primeira = api_client.get(url, {'limit': 4})
+    segunda = api_client.get(url, {'since': primeira.data['next_cursor']})
+
+    # Um segundo profissional, com consultas gravadas em lote, excluído logo depois
+    api_client.post(profissionais, {**profissional_data, 'id_profissional': 2}, format='json')
+    inicio = datetime.datetime(2024, 9, 13, 8, tzinfo=datetime.timezone.utc)
+    api_client.post(consultas, [{'profissional': 2, 'data_consulta': (inicio + datetime.timedelta(hours=horas)).isoformat()}
+                                for horas in range(3)], format='json')
+    registros_antes = Alteracao.objects.count()
+    api_client.delete(profissionais, {'id_profissional': 2}, format='json')
+    call_command('expurgar')
+    registros_exclusao = Alteracao.objects.count() - registros_antes
+    terceira = api_client.get(url, {'since': segunda.data['next_cursor']})
+    exportacao = api_client.get(reverse('export_request', args=['profissionais']))
+
+    # Compactação sem retenção: o feed inteiro fica atrás do novo horizonte
+    call_command('compactar_alteracoes', retencao_dias=0)
+    antigo = api_client.get(url, {'since': segunda.data['next_cursor']})
+    atual = api_client.get(url, {'since': cursor_atual()})
+
+    # Verificações
+    assert primeira.status_code == status.HTTP_200_OK
+    assert primeira.data['has_more'] and not segunda.data['has_more']
+    # Um objeto por página, com o estado atual; o contato já excluído sai sem dados
+    assert [(r['model'], r['op']) for r in primeira.data['results']] == [
+        ('profissionais', 'created'), ('contatos', 'deleted'), ('consultas', 'updated'),
+    ]
+    assert primeira.data['results'][0]['data']['nome_completo'] == 'Dr. João Souza'
+    assert primeira.data['results'][1]['data'] is None
+    assert primeira.data['results'][2]['data']['data_consulta'] == '2024-09-12T11:00:00Z'
+    assert [(r['model'], r['op']) for r in segunda.data['results']] == [('profissionais', 'updated'), ('contatos', 'deleted')]
+    assert [r['seq'] for r in segunda.data['results']] == sorted(r['seq'] for r in segunda.data['results'])
+    # A exclusão do profissional gera um registro só, mesmo com o expurgo das consultas
+    assert registros_exclusao == 1
+    assert [(r['model'], r['op']) for r in terceira.data['results']] == [('consultas', 'deleted')] * 3 + [('profissionais', 'deleted')]
+    assert exportacao['X-Changes-Cursor'] == str(terceira.data['next_cursor'])
+    assert antigo.status_code == status.HTTP_410_GONE
+    assert atual.status_code == status.HTTP_200_OK and atual.data['results'] == []
+    assert not Alteracao.objects.exists()
+    assert api_client.get(url, {'since': 'x'}).status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: JSON pelo orjson com a mesma saída do DRF; compressão negociada pelo Accept-Encoding
+@pytest.mark.django_db
+def test_json_rapido_e_compressao(api_client, profissional_data, monkeypatch):
+    import datetime
+    import decimal
+    import gzip
+    import io
+    import zoneinfo
+    from django.utils.translation import gettext_lazy
+    from rest_framework import renderers, parsers as drf_parsers
+    from rest_framework.exceptions import ErrorDetail, ParseError
+    from . import compressao
+    from .parsers import JSONParser
+    from .renderers import JSONRenderer, JSON_RAPIDO
+
+    dados = {
+        'utc': datetime.datetime(2024, 9, 12, 10, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+        'sao_paulo': datetime.datetime(2024, 9, 12, 7, tzinfo=zoneinfo.ZoneInfo('America/Sao_Paulo')),
+        'ingenuo': datetime.datetime(2024, 9, 12, 10), 'data': datetime.date(2024, 9, 12), 'hora': datetime.time(8, 30),
+        'decimais': [decimal.Decimal('12.50'), decimal.Decimal('0.1')], 'texto': 'São Paulo\u2028<b>\u2029',
+        1: None, 'erro': ErrorDetail('Campo obrigatório.', code='required'), 'lazy': gettext_lazy('Nome'),
+        'grande': 2 ** 70, 'real': -23.5614,
+    }
+    renderer = JSONRenderer()
+    corpo = '{"nome": "Dr. João", "ids": [1, 2, 1180591620717411303424], "lat": -23.5614}'.encode()
+
+    api_client.post(reverse('handle_request', args=['profissionais']), profissional_data, format='json')
+    url = reverse('handle_request', args=['profissionais'])
+    params = {'id_profissional': 1}
+    simples = api_client.get(url, params)
+    monkeypatch.setattr(compressao, 'COMPRESSAO_MINIMO', 100)
+    comprimida = api_client.get(url, params, HTTP_ACCEPT_ENCODING='br;q=0.5, gzip')
+    recusada = api_client.get(url, params, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+    revalidada = api_client.get(url, params, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=comprimida['ETag'])
+    exportada = api_client.get(reverse('export_request', args=['profissionais']), HTTP_ACCEPT_ENCODING='gzip')
+    monkeypatch.setattr(compressao, 'COMPRESSAO_MINIMO', 1024)
+    pequena = api_client.get(url, params, HTTP_ACCEPT_ENCODING='gzip')
+
+    # Verificações
+    assert JSON_RAPIDO
+    assert renderer.render(dados) == renderers.JSONRenderer().render(dados)
+    assert renderer.render(None) == b''
+    assert JSONParser().parse(io.BytesIO(corpo)) == drf_parsers.JSONParser().parse(io.BytesIO(corpo))
+    with pytest.raises(ParseError) as rapido:
+        JSONParser().parse(io.BytesIO(b'{"nome": '))
+    with pytest.raises(ParseError) as padrao:
+        drf_parsers.JSONParser().parse(io.BytesIO(b'{"nome": '))
+    assert str(rapido.value) == str(padrao.value)
+    # A resposta da view é a mesma do renderer do DRF, comprimida ou não
+    assert simples.content == renderers.JSONRenderer().render(simples.data)
+    assert comprimida['Content-Encoding'] == 'gzip' and gzip.decompress(comprimida.content) == simples.content
+    assert 'Accept-Encoding' in comprimida['Vary']
+    assert comprimida['ETag'] == 'W/' + simples['ETag']
+    assert not recusada.has_header('Content-Encoding') and recusada.content == simples.content
+    assert revalidada.status_code == status.HTTP_304_NOT_MODIFIED
+    assert gzip.decompress(b''.join(exportada.streaming_content)).decode().count('\n') == 1
+    assert not pequena.has_header('Content-Encoding')
+
+# Teste: GETs leem da réplica (copiada pelo `replicar`); escritas e leituras depois delas ficam no primário
+@pytest.mark.django_db(transaction=True)
+def test_replicas_de_leitura(api_client, profissional_data, monkeypatch, tmp_path):
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.db import connections, router
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+    from . import replicas
+    from .cache import CACHE_ALIAS
+
+    # Uma réplica em outro arquivo SQLite, só durante o teste
+    configuracao = connections.configure_settings({
+        'default': connections.settings['default'],
+        'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(tmp_path / 'replica.sqlite3')},
+    })['replica']
+    connections['replica'] = DatabaseWrapper(configuracao, alias='replica')
+    monkeypatch.setattr(replicas, 'REPLICAS', ['replica'])
+    try:
+        url = reverse('handle_request', args=['profissionais'])
+        params = {'id_profissional': 1}
+        call_command('replicar')
+
+        criado = api_client.post(url, profissional_data, format='json')
+        fixado = api_client.get(url, params)
+        leitor = APIClient()
+        atrasado = leitor.get(url, params)
+        busca_atrasada = leitor.get(reverse('busca'), {'q': 'João'})
+        exportacao_atrasada = b''.join(leitor.get(reverse('export_request', args=['profissionais'])).streaming_content)
+        call_command('replicar')
+        replicado = leitor.get(url, params)
+        busca = leitor.get(reverse('busca'), {'q': 'João'})
+
+        # Depois do PUT, os GETs desse profissional ficam no primário mesmo sem o cookie
+        api_client.put(url, {'id_profissional': 1, 'nome_completo': 'Dr. João Souza'}, format='json')
+        sem_cookie = leitor.get(url, params)
+        busca_sem_id = leitor.get(reverse('busca'), {'q': 'Souza'})
+
+        # Por modelo: com a lista vazia, profissionais são lidos do primário
+        caches[CACHE_ALIAS].delete(replicas._chave_fixacao(1))
+        antes = leitor.get(url, params)
+        monkeypatch.setattr(replicas, 'REPLICAS_POR_MODELO', {'api_lacrei.profissional': []})
+        primario = leitor.get(url, params)
+        fora_da_requisicao = router.db_for_read(Profissional)
+        with replicas.roteamento(liberado=True):
+            leitura = router.db_for_read(Contato)
+            router.db_for_write(Contato)
+            depois_da_escrita = router.db_for_read(Contato)
+    finally:
+        connections['replica'].close()
+        del connections['replica']
+
+    # Verificações
+    assert criado.status_code == status.HTTP_201_CREATED
+    assert criado.cookies[replicas.COOKIE_FIXACAO]['max-age'] == replicas.REPLICA_FIXACAO
+    # Quem escreveu lê do primário; os demais, da réplica, que ainda não tem a escrita
+    assert fixado.status_code == status.HTTP_200_OK
+    assert atrasado.status_code == status.HTTP_404_NOT_FOUND
+    assert busca_atrasada.data['results'] == [] and exportacao_atrasada == b''
+    assert replicado.status_code == status.HTTP_200_OK
+    assert [r['id_profissional'] for r in busca.data['results']] == [1]
+    assert replicas.COOKIE_FIXACAO not in replicado.cookies
+    # Outro cliente lê do primário o profissional alterado; as leituras sem id seguem na réplica
+    assert sem_cookie.data['nome_completo'] == 'Dr. João Souza'
+    assert busca_sem_id.data['results'] == []
+    assert antes.data['nome_completo'] == 'Dr. João Silva'
+    assert primario.data['nome_completo'] == 'Dr. João Souza'
+    assert fora_da_requisicao == 'default'
+    assert (leitura, depois_da_escrita) == ('replica', 'default')
+
+# Teste: Consultas antigas vão para o arquivo em lotes; as leituras de histórico juntam as duas tabelas
+@pytest.mark.django_db
+def test_arquivamento_de_consultas(api_client, profissional_data):
+    import datetime
+    import io
+    import json
+    from django.core.management import call_command
+    from django.utils import timezone
+    from .alteracoes import cursor_atual
+    from .arquivo import arquivar
+    from .models import ConsultaArquivada
+    from .query_budget import assert_query_budget
+
+    url = reverse('handle_request', args=['consultas'])
+    api_client.post(reverse('handle_request', args=['profissionais']), profissional_data, format='json')
+    amanha = (timezone.now() + datetime.timedelta(days=1)).replace(microsecond=0)
+    antigas = ['2024-01-01T10:00:00Z', '2024-01-02T10:00:00Z', '2024-01-03T10:00:00Z']
+    futuras = [(amanha + datetime.timedelta(hours=horas)).isoformat() for horas in range(2)]
+    criadas = api_client.post(url, [{'profissional': 1, 'data_consulta': data} for data in antigas + futuras], format='json')
+    ids = [resultado['id'] for resultado in criadas.data['results']]
+    antes = cursor_atual()
+
+    saida = io.StringIO()
+    call_command('arquivar', horizonte_dias=30, lote=2, stderr=saida)
+    tabelas = Consulta.objects.count(), ConsultaArquivada.objects.count()
+    lotes = list(arquivar(datetime.timedelta(days=30)))
+
+    with assert_query_budget('consultas', 'GET'):
+        primeira = api_client.get(url, {'id_profissional': 1, 'limit': 2})
+    paginas = [primeira.data]
+    while paginas[-1]['next_cursor']:
+        paginas.append(api_client.get(url, {'id_profissional': 1, 'limit': 2, 'cursor': paginas[-1]['next_cursor']}).data)
+    # Um período que começa agora não precisa do arquivo
+    with assert_query_budget('consultas', 'GET', budget=2):
+        proximas = api_client.get(url, {'id_profissional': 1, 'from': timezone.now().isoformat()})
+
+    with assert_query_budget('consultas', 'POST'):
+        sobreposta = api_client.post(url, {'profissional': 1, 'data_consulta': '2024-01-01T10:15:00Z'}, format='json')
+    lote = api_client.post(url, [{'profissional': 1, 'data_consulta': '2024-01-02T10:00:00Z'}], format='json')
+    alterada = api_client.put(url, {'id_consulta': ids[0], 'duracao': 60}, format='json')
+    removida = api_client.delete(url, {'id_consulta': ids[0]}, format='json')
+    inexistente = api_client.delete(url, {'id_consulta': 999}, format='json')
+
+    feed_depois = api_client.get(reverse('changes'), {'since': antes})
+    feed_completo = api_client.get(reverse('changes'), {'since': 0})
+    exportadas = b''.join(api_client.get(reverse('export_request', args=['consultas'])).streaming_content).decode()
+    api_client.delete(reverse('handle_request', args=['profissionais']) + '?hard=true', {'id_profissional': 1}, format='json')
+
+    # Verificações
+    assert 'Consultas arquivadas: 3 em 2 lotes' in saida.getvalue()
+    assert tabelas == (2, 3)
+    assert lotes == []  # Nada mais a arquivar
+    # O histórico inteiro, na ordem e com os ids originais, atravessando as duas tabelas
+    assert [c['id_consulta'] for pagina in paginas for c in pagina['results']] == ids
+    assert [len(pagina['results']) for pagina in paginas] == [2, 2, 1]
+    assert [c['id_consulta'] for c in proximas.data['results']] == ids[3:]
+    assert sobreposta.status_code == status.HTTP_409_CONFLICT
+    assert sobreposta.data['conflicting_id'] == ids[0]
+    # A consulta arquivada não é atualizada pelo upsert do lote
+    assert lote.data['results'][0]['status'] == 'error'
+    assert alterada.status_code == removida.status_code == status.HTTP_409_CONFLICT
+    assert inexistente.status_code == status.HTTP_404_NOT_FOUND
+    # O arquivamento não aparece no feed, que continua entregando os dados das arquivadas
+    assert feed_depois.data['results'] == []
+    consultas_no_feed = [r for r in feed_completo.data['results'] if r['model'] == 'consultas']
+    assert [(r['id'], r['op']) for r in consultas_no_feed] == [(id_consulta, 'created') for id_consulta in ids]
+    assert consultas_no_feed[0]['data']['data_consulta'] == antigas[0]
+    assert [json.loads(linha)['id_consulta'] for linha in exportadas.splitlines()] == ids
+    # A exclusão definitiva também esvazia o arquivo
+    assert not ConsultaArquivada.objects.exists()
+
+# Teste: Resumo diário mantido nas escritas de consultas; estatísticas por dia, semana e profissão
+@pytest.mark.django_db
+def test_estatisticas_de_consultas(api_client, profissional_data):
+    import datetime
+    import io
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+    from .estatisticas import divergencias
+    from .models import ResumoDiario
+    from .query_budget import assert_query_budget
+
+    url = reverse('estatisticas')
+    consultas = reverse('handle_request', args=['consultas'])
+    profissionais = reverse('handle_request', args=['profissionais'])
+    api_client.post(profissionais, profissional_data, format='json')
+    api_client.post(profissionais, {**profissional_data, 'id_profissional': 2, 'profissao': 'Pediatra'}, format='json')
+    api_client.post(profissionais, {**profissional_data, 'id_profissional': 3}, format='json')
+
+    primeira = api_client.post(consultas, {'profissional': 1, 'data_consulta': '2024-09-02T10:00:00Z'}, format='json')
+    api_client.post(consultas, [
+        {'profissional': 1, 'data_consulta': '2024-09-02T14:00:00Z'},
+        {'profissional': 1, 'data_consulta': '2024-09-03T23:30:00Z'},
+        {'profissional': 2, 'data_consulta': '2024-09-09T09:00:00Z'},
+        {'profissional': 3, 'data_consulta': '2024-09-10T09:00:00Z'},
+    ], format='json')
+    # Muda de dia; depois só a duração (o resumo não muda); por fim, a exclusão
+    api_client.put(consultas, {'id_consulta': primeira.data['id_consulta'], 'data_consulta': '2024-09-04T10:00:00Z'}, format='json')
+    api_client.put(consultas, {'id_consulta': primeira.data['id_consulta'], 'duracao': 60}, format='json')
+    removida = api_client.post(consultas, {'profissional': 2, 'data_consulta': '2024-09-10T09:00:00Z'}, format='json')
+    api_client.delete(consultas, {'id_consulta': removida.data['id_consulta']}, format='json')
+
+    periodo = {'from': '2024-09-01', 'to': '2024-09-30'}
+    with assert_query_budget('estatisticas', 'GET'):
+        por_dia = api_client.get(url, {**periodo, 'id_profissional': 1})
+    por_semana = api_client.get(url, {**periodo, 'periodo': 'semana'})
+    por_profissao = api_client.get(url, {**periodo, 'periodo': 'mes', 'agrupar': 'profissao'})
+    pediatras = api_client.get(url, {**periodo, 'agrupar': 'profissao', 'profissao': 'Pediatra'})
+
+    # O arquivamento não muda o resumo; a exclusão lógica tira o profissional das estatísticas
+    call_command('arquivar', horizonte_dias=30, stderr=io.StringIO())
+    arquivadas = api_client.get(url, {**periodo, 'id_profissional': 1})
+    api_client.delete(profissionais, {'id_profissional': 3}, format='json')
+    sem_excluido = api_client.get(url, {**periodo, 'agrupar': 'profissao', 'periodo': 'mes'})
+    divergencias_mantidas = divergencias()
+
+    # Um resumo corrompido é encontrado pela verificação e corrigido pela reconstrução
+    ResumoDiario.objects.filter(profissional_id=2).update(total=7)
+    with pytest.raises(CommandError):
+        call_command('reconstruir_resumo', verificar=True, stderr=io.StringIO())
+    call_command('reconstruir_resumo', stderr=io.StringIO())
+    reconstruidas = api_client.get(url, {**periodo, 'id_profissional': 2})
+    api_client.delete(profissionais + '?hard=true', {'id_profissional': 1}, format='json')
+
+    # Verificações
+    assert por_dia.status_code == status.HTTP_200_OK
+    assert por_dia.data['results'] == [
+        {'id_profissional': 1, 'period': datetime.date(2024, 9, 2), 'count': 1},
+        {'id_profissional': 1, 'period': datetime.date(2024, 9, 3), 'count': 1},
+        {'id_profissional': 1, 'period': datetime.date(2024, 9, 4), 'count': 1},
+    ]
+    # Semanas começam na segunda-feira
+    assert [(r['id_profissional'], str(r['period']), r['count']) for r in por_semana.data['results']] == [
+        (1, '2024-09-02', 3), (2, '2024-09-09', 1), (3, '2024-09-09', 1),
+    ]
+    assert [(r['profissao'], r['count']) for r in por_profissao.data['results']] == [('Médico', 4), ('Pediatra', 1)]
+    assert [(r['profissao'], r['count']) for r in pediatras.data['results']] == [('Pediatra', 1)]
+    assert arquivadas.data == por_dia.data
+    assert [(r['profissao'], r['count']) for r in sem_excluido.data['results']] == [('Médico', 3), ('Pediatra', 1)]
+    assert divergencias_mantidas == []
+    assert [r['count'] for r in reconstruidas.data['results']] == [1]
+    assert not ResumoDiario.objects.filter(profissional_id=1).exists()
+    assert api_client.get(url, {'from': '2024-09-01'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(url, {'from': '2024-01-01', 'to': '2025-12-31'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(url, {**periodo, 'periodo': 'ano'}).status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: Importação de CSV e NDJSON com as regras do lote, registros rejeitados e retomada
+@pytest.mark.django_db
+def test_importacao_de_arquivos(api_client, tmp_path):
+    import io
+    import json
+    import os
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+    from .importacao import importar
+    from .query_budget import BULK_QUERIES_PER_CHUNK, assert_query_budget
+
+    profissionais = tmp_path / 'profissionais.csv'
+    profissionais.write_text(
+        'id_profissional,nome_completo,nome_social,profissao,endereco\n'
+        '1,Dr. João Silva,,Médico,"Rua 123, São Paulo"\n'
+        '2,Dra. Ana Souza,Dra. Ana,Pediatra,Rua 456\n'
+        '3,,,Médico,Rua 789\n',
+        encoding='utf-8',
+    )
+    saida = io.StringIO()
+    call_command('importar', 'profissionais', str(profissionais), stderr=saida)
+
+    consultas = tmp_path / 'consultas.ndjson'
+    linhas = [
+        {'profissional': 1, 'data_consulta': '2024-09-02T10:00:00Z'},
+        {'profissional': 1, 'data_consulta': '2024-09-02T10:15:00Z'},  # Sobrepõe a anterior
+        {'profissional': 2, 'data_consulta': '2024-09-02T10:00:00Z'},
+        {'profissional': 9, 'data_consulta': '2024-09-03T10:00:00Z'},  # Profissional inexistente
+        {'profissional': 2, 'data_consulta': '2024-09-04T10:00:00Z'},
+        {'profissional': 1, 'data_consulta': '2024-09-05T10:00:00Z'},
+    ]
+    texto = [json.dumps(linha) for linha in linhas]
+    texto.insert(3, '{"profissional": 1,')  # Linha 4: JSON inválido
+    consultas.write_text('\n'.join(texto) + '\n', encoding='utf-8')
+    rejeitados = f'{consultas}.rejeitados.ndjson'
+
+    # Interrompida depois do primeiro bloco confirmado; a segunda execução continua dele
+    importacao = importar('consultas', str(consultas), lote=3)
+    primeiro_bloco = next(importacao)
+    importacao.close()
+    estado_salvo = json.loads(open(f'{consultas}.progresso').read())
+    # Os profissionais são carregados uma vez: sem consulta por registro na checagem da chave
+    with assert_query_budget('consultas', 'importar', budget=1 + 2 * BULK_QUERIES_PER_CHUNK['consultas']):
+        blocos = list(importar('consultas', str(consultas), lote=3))
+    recusados = [json.loads(linha) for linha in open(rejeitados, encoding='utf-8')]
+
+    # Repetir a importação inteira não duplica as consultas (o upsert as atualiza)
+    repetida = list(importar('consultas', str(consultas), lote=50))
+    invalido = tmp_path / 'consultas.xml'
+    invalido.write_text('<consultas/>', encoding='utf-8')
+
+    # Exportação (CSV com gzip) importada de volta com ja_escapado, com uma interrupção: os
+    # valores sanitizados na gravação voltam iguais, sem um segundo escape
+    api_client.post(reverse('handle_request', args=['profissionais']), {
+        'id_profissional': 4, 'nome_completo': 'Ana & Bia <Clínica>', 'profissao': 'Médico', 'endereco': 'Rua "A", 1',
+    }, format='json')
+    nomes = dict(Profissional.objects.values_list('id_profissional', 'nome_completo'))
+    exportado = tmp_path / 'profissionais_exportados.csv.gz'
+    exportado.write_bytes(b''.join(api_client.get(
+        reverse('export_request', args=['profissionais']), {'format': 'csv', 'gzip': '1'}
+    ).streaming_content))
+    Profissional.objects.filter(id_profissional__gt=1).update(nome_completo='x')
+    retomada = importar('profissionais', str(exportado), lote=2, ja_escapado=True)
+    next(retomada)
+    retomada.close()
+    posicao_exportado = json.loads(open(f'{exportado}.progresso').read())['posicao']
+    # A retomada pelo comando, com --ja-escapado
+    saida_exportado = io.StringIO()
+    call_command('importar', 'profissionais', str(exportado), '--lote', '2', '--ja-escapado', stderr=saida_exportado)
+
+    # Sem a opção, o texto é sanitizado como no POST, mesmo que pareça escapado
+    texto_cru = {'id_profissional': 5, 'nome_completo': 'A &amp; B &lt;', 'profissao': 'Médico', 'endereco': 'Rua 1'}
+    cru = tmp_path / 'profissionais_crus.ndjson'
+    cru.write_text(json.dumps(texto_cru) + '\n', encoding='utf-8')
+    list(importar('profissionais', str(cru)))
+    importado_cru = Profissional.objects.get(id_profissional=5).nome_completo
+    pela_api = api_client.post(reverse('handle_request', args=['profissionais']), {**texto_cru, 'id_profissional': 6}, format='json')
+
+    # Verificações
+    assert 'Importação concluída: 3 registros (3 gravados, 0 rejeitados)' in saida.getvalue()
+    assert list(Profissional.objects.filter(id_profissional__lte=3).values_list('id_profissional', 'nome_social')) == [
+        (1, ''), (2, 'Dra. Ana'), (3, ''),
+    ]
+    assert not os.path.exists(f'{profissionais}.rejeitados.ndjson')
+    assert estado_salvo['registros'] == 3 and estado_salvo['rejeitados'] == 1
+    # A retomada continua do byte depois do terceiro registro, sem reler as linhas anteriores
+    assert (estado_salvo['linhas'], estado_salvo['posicao']) == (3, len('\n'.join(texto[:3]).encode()) + 1)
+    assert (primeiro_bloco.registros, primeiro_bloco.importados) == (3, 2)
+    assert [(p.registros, p.importados, p.rejeitados, p.retomado_em) for p in blocos] == [(6, 3, 3, 3), (7, 4, 3, 3)]
+    assert not os.path.exists(f'{consultas}.progresso')
+    # Cada recusa uma vez, mesmo com o primeiro bloco escrito antes da interrupção
+    assert [(r['line'], list(r['errors'])) for r in recusados] == [
+        (2, ['non_field_errors']), (4, ['non_field_errors']), (5, ['profissional']),
+    ]
+    assert recusados[2]['item'] == linhas[3]
+    assert list(Consulta.objects.order_by('id_consulta').values_list('profissional_id', 'data_consulta__day')) == [
+        (1, 2), (2, 2), (2, 4), (1, 5),
+    ]
+    assert repetida[-1].importados == 4 and Consulta.objects.count() == 4
+    with pytest.raises(CommandError):
+        call_command('importar', 'consultas', str(invalido), stderr=io.StringIO())
+    assert nomes[4] == 'Ana &amp; Bia &lt;Clínica&gt;'
+    assert posicao_exportado > 0
+    assert 'Importação concluída: 4 registros (4 gravados, 0 rejeitados)' in saida_exportado.getvalue()
+    assert dict(Profissional.objects.filter(id_profissional__lte=4).values_list('id_profissional', 'nome_completo')) == nomes
+    assert importado_cru == pela_api.data['nome_completo'] == 'A &amp;amp; B &amp;lt;'
+
+# Teste: Importação de NDJSON sem o orjson (ou com LACREI_JSON_RAPIDO = False)
+@pytest.mark.django_db
+def test_importacao_sem_orjson(tmp_path, monkeypatch, profissional_data):
+    from . import parsers
+    from .importacao import importar
+
+    monkeypatch.setattr(parsers, 'orjson', None)
+    monkeypatch.setattr(parsers, 'JSON_RAPIDO', False)
+    Profissional.objects.create(**profissional_data)
+    consultas = tmp_path / 'consultas.ndjson'
+    consultas.write_text(
+        '{"profissional": 1, "data_consulta": "2024-09-02T10:00:00Z"}\n{"profissional": 1,\n', encoding='utf-8'
+    )
+
+    progresso = list(importar('consultas', str(consultas)))[-1]
+
+    # Verificações
+    assert (progresso.importados, progresso.rejeitados) == (1, 1)
+    assert Consulta.objects.count() == 1
+
+# Teste: ?fields= lê só as colunas pedidas; ?ids= busca vários registros em uma consulta, na ordem pedida
+@pytest.mark.django_db
+def test_campos_e_ids(api_client, profissional_data):
+    import io
+    from asgiref.sync import async_to_sync
+    from django.core.management import call_command
+    from django.test import AsyncClient
+    from .models import HorarioAtendimento
+    from .projecao import IDS_MAX
+    from .query_budget import assert_query_budget
+
+    profissionais = reverse('handle_request', args=['profissionais'])
+    contatos = reverse('handle_request', args=['contatos'])
+    consultas = reverse('handle_request', args=['consultas'])
+    for id_profissional in (1, 2, 3):
+        api_client.post(profissionais, {**profissional_data, 'id_profissional': id_profissional, 'nome_completo': f'Pessoa {id_profissional}'}, format='json')
+    contato = api_client.post(contatos, {'profissional': 1, 'tipo': 'email', 'contato': 'a@exemplo.com'}, format='json')
+    criadas = api_client.post(consultas, [
+        {'profissional': 1, 'data_consulta': '2024-01-01T10:00:00Z'},
+        {'profissional': 1, 'data_consulta': '2099-01-01T10:00:00Z'},
+        {'profissional': 1, 'data_consulta': '2099-01-02T10:00:00Z'},
+    ], format='json')
+    ids_consultas = [resultado['id'] for resultado in criadas.data['results']]
+    horario = HorarioAtendimento.objects.create(profissional_id=1, dia_semana=1, hora_inicio='08:00', hora_fim='12:00')
+    call_command('arquivar', horizonte_dias=30, stderr=io.StringIO())
+    api_client.delete(profissionais, {'id_profissional': 2}, format='json')
+
+    with assert_query_budget('profissionais', 'GET') as leitura:
+        um = api_client.get(profissionais, {'id_profissional': 1, 'fields': 'nome_completo'})
+    # O log de consultas recomeça a cada requisição: o SQL é guardado antes da próxima
+    sql = ' '.join(query['sql'] for query in leitura.captured_queries)
+    with assert_query_budget('profissionais', 'GET', budget=1):
+        varios = api_client.get(profissionais, {'ids': '3,1,99,2,1', 'fields': 'nome_completo,id_profissional'})
+    completos = api_client.get(profissionais, {'ids': '1'})
+    # A consulta arquivada vem do arquivo, lido só para os ids que faltaram
+    with assert_query_budget('consultas', 'GET', budget=2):
+        por_id = api_client.get(consultas, {'ids': ','.join(map(str, reversed(ids_consultas)))})
+    paginas = [api_client.get(consultas, {'id_profissional': 1, 'fields': 'duracao', 'limit': 2})]
+    paginas.append(api_client.get(consultas, {'id_profissional': 1, 'fields': 'duracao', 'limit': 2, 'cursor': paginas[0].data['next_cursor']}))
+    lista_contatos = api_client.get(contatos, {'id_profissional': 1, 'fields': 'contato'})
+    contatos_por_id = api_client.get(contatos, {'ids': str(contato.data['id_contato'])})
+    horarios = api_client.get(reverse('handle_request', args=['horarios']), {'ids': str(horario.id_horario), 'fields': 'dia_semana'})
+    url_async = reverse('handle_request_async', args=['profissionais'])
+    assincrono = async_to_sync(AsyncClient().get)(url_async, {'ids': '3,1,99,2,1', 'fields': 'nome_completo,id_profissional'})
+
+    # Verificações
+    assert um.data == {'nome_completo': 'Pessoa 1'}
+    assert '"nome_completo"' in sql and '"endereco"' not in sql
+    # Na ordem pedida, sem repetições; inexistentes e excluídos vão em missing
+    assert varios.data == {
+        'results': [{'id_profissional': 3, 'nome_completo': 'Pessoa 3'}, {'id_profissional': 1, 'nome_completo': 'Pessoa 1'}],
+        'missing': [99, 2],
+    }
+    assert completos.data['results'][0] == api_client.get(profissionais, {'id_profissional': 1}).data
+    assert [c['id_consulta'] for c in por_id.data['results']] == list(reversed(ids_consultas))
+    assert [pagina.data['results'] for pagina in paginas] == [[{'duracao': 30}, {'duracao': 30}], [{'duracao': 30}]]
+    assert paginas[1].data['next_cursor'] is None
+    assert lista_contatos.data == [{'contato': 'a@exemplo.com'}]
+    assert contatos_por_id.data['results'][0]['id_contato'] == contato.data['id_contato']
+    assert horarios.data == {'results': [{'dia_semana': 1}], 'missing': []}
+    assert assincrono.status_code == status.HTTP_200_OK
+    assert assincrono.json() == varios.data
+    assert api_client.get(profissionais, {'id_profissional': 1, 'fields': 'senha'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(profissionais, {'ids': 'a,b'}).status_code == status.HTTP_400_BAD_REQUEST
+    muitos = ','.join(map(str, range(1, IDS_MAX + 2)))
+    assert api_client.get(consultas, {'ids': muitos}).status_code == status.HTTP_400_BAD_REQUEST
+
+# Teste: O perfil enxuto (settings_api) atende a API sem admin, autenticação, sessões e templates
+def test_perfil_enxuto(tmp_path):
+    import json
+    import os
+    import subprocess
+    import sys
+    from django.conf import settings
+
+    # O perfil é carregado em outro processo: as settings de um processo não mudam depois do setup
+    codigo = '''
+import json
+import django
+django.setup()
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client
+
+call_command('migrate', verbosity=0)
+client = Client()
+profissional = {'id_profissional': 1, 'nome_completo': 'Ana', 'profissao': 'Pediatra', 'endereco': 'Rua 1'}
+respostas = {
+    'post': client.post('/api/profissionais/', profissional, content_type='application/json').status_code,
+    'ndjson': client.post(
+        '/api/consultas/', '{"profissional": 1, "data_consulta": "2030-01-01T10:00:00Z"}\\n', content_type='application/x-ndjson'
+    ).status_code,
+    'get': client.get('/api/profissionais/', {'id_profissional': 1, 'fields': 'nome_completo'}).json(),
+    'async': client.get('/api/async/profissionais/', {'ids': '1', 'fields': 'profissao'}).json(),
+    'export': client.get('/api/export/consultas/').status_code,
+    'metrics': client.get('/metrics').status_code,
+    'admin': client.get('/admin/').status_code,
+    'apps': [app.label for app in django.apps.apps.get_app_configs()],
+}
+print(json.dumps(respostas))
+'''
+    ambiente = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'api_root.settings_api',
+        'LACREI_SQLITE_PATH': str(tmp_path / 'db.sqlite3'),
+        'LACREI_ALLOWED_HOSTS': 'testserver',
+    }
+    saida = subprocess.run([sys.executable, '-c', codigo], env=ambiente, cwd=settings.BASE_DIR, capture_output=True, text=True)
+
+    # Verificações
+    assert saida.returncode == 0, saida.stderr
+    respostas = json.loads(saida.stdout)
+    assert respostas['post'] == 201 and respostas['ndjson'] == 200
+    assert respostas['get'] == {'nome_completo': 'Ana'}
+    assert respostas['async'] == {'results': [{'profissao': 'Pediatra'}], 'missing': []}
+    assert respostas['export'] == respostas['metrics'] == 200
+    assert respostas['admin'] == 404
+    assert respostas['apps'] == ['api_lacrei']
@@ -1,9 +1,22 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 
+# Com LACREI_ASYNC_VIEWS a rota principal usa a versão assíncrona (ASGI) dos CRUDs;
+# a rota async/ fica sempre disponível
+handle_request = async_views.handle_request_async if getattr(settings, 'LACREI_ASYNC_VIEWS', False) else views.handle_request
+
 urlpatterns = [
-    path('<str:model_name>/', views.handle_request, name='handle_request'),
-] 
\ No newline at end of file
+    path('export/<str:model_name>/', views.export_request, name='export_request'),
+    path('disponibilidade/', views.availability_request, name='availability_request'),
+    path('perfil/', views.perfil_request, name='perfil'),
+    path('busca/', views.busca_request, name='busca'),
+    path('proximos/', views.proximos_request, name='proximos'),
+    path('changes/', views.changes_request, name='changes'),
+    path('estatisticas/', views.estatisticas_request, name='estatisticas'),
+    path('cache/', views.cache_stats_request, name='cache_stats_request'),
+    path('async/<str:model_name>/', async_views.handle_request_async, name='handle_request_async'),
+    path('<str:model_name>/', handle_request, name='handle_request'),
+] 
@@ -0,0 +1,52 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.html import escape
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .metrics import medir
+
+
+# Campos CharField sanitizados em cada modelo antes de chegar ao serializer
+CAMPOS_PROFISSIONAL = ('nome_completo', 'endereco', 'nome_social', 'profissao')
+CAMPOS_CONTATO = ('tipo', 'contato')
+
+
+def sanitizar(dados, campos):
+    """Aplica `escape` nos valores string dos campos vulneráveis."""
+    with medir('sanitize'):
+        return {
+            key: escape(value) if key in campos and isinstance(value, str) else value
+            for key, value in dados.items()
+        }
+
+
+def datetime_formatter():
+    """
+    Retorna uma função que formata datetimes exatamente como o DateTimeField do DRF,
+    mas resolvendo o fuso e o formato uma única vez (útil para listas grandes).
+    """
+    if api_settings.DATETIME_FORMAT is None or api_settings.DATETIME_FORMAT.lower() != ISO_8601:
+        return serializers.DateTimeField().to_representation
+
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    # Com o fuso em UTC, valores que o banco já entrega em UTC dispensam a conversão
+    tz_utc = tz is datetime.timezone.utc or getattr(tz, 'key', None) in ('UTC', 'Etc/UTC')
+
+    def formatar(valor):
+        if not valor:
+            return None
+        if tz_utc and valor.tzinfo is datetime.timezone.utc:
+            return valor.isoformat()[:-6] + 'Z'
+        if tz is not None:
+            valor = valor.astimezone(tz) if timezone.is_aware(valor) else timezone.make_aware(valor, tz)
+        elif timezone.is_aware(valor):
+            valor = timezone.make_naive(valor, datetime.timezone.utc)
+        texto = valor.isoformat()
+        if texto.endswith('+00:00'):
+            texto = texto[:-6] + 'Z'
+        return texto
+
+    return formatar
@@ -0,0 +1,84 @@
+import datetime
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .cache import ainvalidar, invalidar
+from .models import Profissional
+
+
+_EPOCA = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def touch(*ids_profissionais):
+    """
+    Registra uma escrita nos dados dos profissionais: incrementa a versão e a data de
+    atualização (base do ETag/Last-Modified) e descarta as leituras em cache.
+
+    Retorna quantos profissionais foram atualizados: as escritas de contatos e consultas
+    usam o valor para confirmar que o profissional existe, sem um SELECT a mais.
+    """
+    ids = {id_profissional for id_profissional in ids_profissionais if id_profissional is not None}
+    if not ids:
+        return 0
+    atualizados = Profissional.objects.filter(id_profissional__in=ids).update(versao=F('versao') + 1, atualizado_em=timezone.now())
+    if atualizados:
+        invalidar(*ids)
+    return atualizados
+
+
+async def atouch(*ids_profissionais):
+    """Versão assíncrona de `touch`."""
+    ids = {id_profissional for id_profissional in ids_profissionais if id_profissional is not None}
+    if not ids:
+        return 0
+    atualizados = await Profissional.objects.filter(id_profissional__in=ids).aupdate(versao=F('versao') + 1, atualizado_em=timezone.now())
+    if atualizados:
+        await ainvalidar(*ids)
+    return atualizados
+
+
+def incrementar_versao(profissional):
+    """
+    Prepara o próximo save() do profissional para também incrementar a versão, no
+    mesmo UPDATE dos dados (o PUT não precisa de um `touch` separado).
+    """
+    profissional.versao = F('versao') + 1
+    profissional.atualizado_em = timezone.now()
+
+
+def versao_atual(id_profissional):
+    """Retorna (versao, atualizado_em) do profissional, ou None se ele não existir."""
+    return Profissional.objects.filter(id_profissional=id_profissional).values_list('versao', 'atualizado_em').first()
+
+
+async def aversao_atual(id_profissional):
+    return await Profissional.objects.filter(id_profissional=id_profissional).values_list('versao', 'atualizado_em').afirst()
+
+
+def validadores(id_profissional, versao, atualizado_em):
+    """
+    ETag forte e Last-Modified (timestamp) derivados da versão do profissional. O ETag
+    leva também `atualizado_em` em microssegundos: um profissional removido e recriado com
+    o mesmo id recomeça da versão 1, e só a data distingue as duas encarnações.
+    """
+    microssegundos = (atualizado_em - _EPOCA) // datetime.timedelta(microseconds=1)
+    return f'"{id_profissional}-{versao}-{microssegundos:x}"', int(atualizado_em.timestamp())
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Avalia If-None-Match/If-Modified-Since. Retorna a resposta 304 quando o cliente
+    já tem a versão atual, sem que o queryset ou o serializer precisem rodar.
+    """
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validadores(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Intermediários podem guardar a resposta, mas devem revalidá-la a cada uso
+    patch_cache_control(response, no_cache=True)
+    return response
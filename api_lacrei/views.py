@@ -1,16 +1,140 @@
-from rest_framework.decorators import api_view
+import datetime
+import math
+
+from rest_framework.decorators import api_view, parser_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import status
 
-from django.utils.html import escape
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, router, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+
+from .agenda import consulta_em_conflito
+from .arquivo import pagina_pode_ter_arquivadas
+from .alteracoes import ALTERACOES_LIMITE, CursorExpirado, cursor_atual, listar_alteracoes
+from .availability import MAX_DIAS_BUSCA, buscar_disponibilidade
+from .bulk import BULK_MAX_ITEMS, bulk_upsert
+from .busca import BUSCA_LIMITE, BUSCA_MAX_LIMITE, buscar_profissionais, termos
+from .cache import cache_stats, cached_payload, invalidar
+from .estatisticas import ESTATISTICAS_MAX_DIAS, agregar
+from .exclusao import DEPENDENTES, excluir_definitivamente, excluir_profissional
+from .export import EXPORT_FORMATS, EXPORT_MODELS, export_stream
+from .metrics import exportar_prometheus
+from .models import Profissional, Contato, Consulta, ConsultaArquivada, HorarioAtendimento
+from .pagination import paginar_consultas, parse_instante, parse_limit
+from .parsers import NDJSONParser
+from .perfil import carregar_perfis
+from .projecao import POR_IDS, buscar_por_ids, parse_campos, parse_ids
+from .proximidade import GEO_LIMITE, GEO_MAX_LIMITE, GEO_MAX_TENTATIVAS, GEO_RAIO_MAXIMO, buscar_proximos
+from .query_budget import declarar_orcamento
+from .serializers import (
+    ProfissionalSerializer, ConsultaSerializer, ContatoSerializer, HorarioAtendimentoSerializer,
+    ProfissionalBulkSerializer, ConsultaBulkSerializer, ContatoBulkSerializer,
+    ProfissionalPerfilSerializer, CONSULTA_LEVE, CONTATO_LEVE, HORARIO_LEVE, PROFISSIONAL_LEVE, MSG_UNICO,
+    consulta_sobreposta, profissional_duplicado, profissional_inexistente,
+)
+from .utils import CAMPOS_PROFISSIONAL, CAMPOS_CONTATO, sanitizar
+from .versioning import incrementar_versao, not_modified, set_validadores, touch, validadores, versao_atual
+
+
+# Inserção/atualização em lote: o corpo é uma lista JSON ou NDJSON
+def bulk_response(model_name, itens):
+    if len(itens) > BULK_MAX_ITEMS:
+        return Response({'error': f'O lote aceita no máximo {BULK_MAX_ITEMS} itens'}, status=status.HTTP_400_BAD_REQUEST)
+
+    relatorio = bulk_upsert(model_name, itens)
+    status_code = status.HTTP_200_OK if not relatorio['failed'] else status.HTTP_207_MULTI_STATUS
+    return Response(relatorio, status=status_code)
+
+
+# POST de Contato/Consulta em duas consultas: o UPDATE da versão do profissional confirma
+# que ele existe (e já invalida o cache) e o INSERT grava a linha. A unicidade é verificada
+# pela restrição do banco, sem o SELECT do UniqueTogetherValidator.
+# `verificar(objeto)` roda na mesma transação, depois do UPDATE. No SQLite não há lock por
+# linha: o UPDATE pega o lock RESERVED do banco inteiro, e com `transaction_mode="IMMEDIATE"`
+# (settings_producao) a transação já começa com ele. É esse lock de escrita, e não uma trava
+# na linha do profissional, que faz duas verificações de agenda rodarem uma após a outra.
+# Sem o IMMEDIATE (uma transação que leu antes de escrever pode falhar ou ver um snapshot
+# antigo) ou em outro banco (a garantia passa a depender do isolamento e dos locks de
+# linha dele), a serialização deixa de valer e precisa ser revista.
+def criar_vinculado(model, bulk_serializer_class, serializer_class, data, verificar=None):
+    serializer = bulk_serializer_class(data=data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    profissional_id = serializer.validated_data['profissional_id']
+    objeto = model(**serializer.validated_data)
+    try:
+        with transaction.atomic():
+            if not touch(profissional_id):
+                return Response(profissional_inexistente(profissional_id), status=status.HTTP_400_BAD_REQUEST)
+            erro = verificar(objeto) if verificar else None
+            if erro is not None:
+                transaction.set_rollback(True)
+                return erro
+            objeto.save(force_insert=True)
+    except IntegrityError:
+        return Response({'non_field_errors': [MSG_UNICO[model]]}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(serializer_class(objeto).data, status=status.HTTP_201_CREATED)
+
+
+# PUT de Contato/Consulta: leitura + UPDATE das versões (anterior e novo profissional) + UPDATE da linha
+def atualizar_vinculado(objeto, bulk_serializer_class, serializer_class, data, verificar=None):
+    profissional_anterior = objeto.profissional_id
+    serializer = bulk_serializer_class(objeto, data=data, partial=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    for campo, valor in serializer.validated_data.items():
+        setattr(objeto, campo, valor)
+
+    ids = {profissional_anterior, objeto.profissional_id}
+    try:
+        with transaction.atomic():
+            if touch(*ids) < len(ids):
+                # O novo profissional não existe: desfaz o incremento da versão do anterior
+                transaction.set_rollback(True)
+                return Response(profissional_inexistente(objeto.profissional_id), status=status.HTTP_400_BAD_REQUEST)
+            erro = verificar(objeto) if verificar else None
+            if erro is not None:
+                transaction.set_rollback(True)
+                return erro
+            objeto.save()
+    except IntegrityError:
+        return Response({'non_field_errors': [MSG_UNICO[type(objeto)]]}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(serializer_class(objeto).data, status=status.HTTP_200_OK)
+
+
+# Recusa consultas que se sobrepõem a outra do mesmo profissional (uma consulta ao índice)
+def conflito_consulta(consulta):
+    consulta.preencher_fim()
+    conflito = consulta_em_conflito(consulta.profissional_id, consulta.data_consulta, consulta.data_fim, excluir=consulta.pk)
+    if conflito is not None:
+        return Response(consulta_sobreposta(conflito), status=status.HTTP_409_CONFLICT)
+    return None
+
+
+# GET com ?ids=: vários registros em uma consulta, na ordem pedida, com os ids inexistentes
+# em `missing`. Não passa pelo cache, que é por profissional
+def resposta_por_ids(model_name, params):
+    try:
+        ids = parse_ids(params.get('ids'))
+        leve = parse_campos(params.get('fields'), POR_IDS[model_name][0])
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-from .models import Profissional, Contato, Consulta
-from .serializers import ProfissionalSerializer, ConsultaSerializer, ContatoSerializer
+    resultados, ausentes = buscar_por_ids(model_name, ids, leve)
+    return Response({'results': resultados, 'missing': ausentes}, status=status.HTTP_200_OK)
 
 
 # Função central para manipular diferentes modelos (Profissionais, Contatos, Consultas) com base na URL
 @api_view(['GET', 'POST', 'PUT', 'DELETE'])
+@parser_classes(api_settings.DEFAULT_PARSER_CLASSES + [NDJSONParser])
 def handle_request(request, model_name):
     # Verifica qual modelo foi passado como argumento para direcionar à função correta
     if model_name == 'profissionais':
@@ -19,6 +143,8 @@ def handle_request(request, model_name):
         return contato_crud(request)
     elif model_name == 'consultas':
         return consulta_crud(request)
+    elif model_name == 'horarios':
+        return horario_crud(request)
     else:
         return Response({'error': 'Model não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -26,19 +152,23 @@ def handle_request(request, model_name):
 def profissional_crud(request):
     # Inserir novo Profissional (POST)
     if request.method == 'POST':
+        if isinstance(request.data, list):
+            return bulk_response('profissionais', request.data)
+
         # Sanitizar campos vulneráveis
-        data_sanitized = {
-            key: escape(value) if key in ['nome_completo', 'endereco', 'nome_social', 'profissao'] and isinstance(value, str) else value 
-            for key, value in request.data.items()
-        }
-        try:
-            profissional = ProfissionalSerializer(data=data_sanitized)
-            if not profissional.is_valid():
-                return Response(profissional.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Salva o novo profissional no banco de dados
-            profissional.save()
-            return Response(profissional.data, status=status.HTTP_201_CREATED)
+        data_sanitized = sanitizar(request.data, CAMPOS_PROFISSIONAL)
+        try:
+            serializer = ProfissionalBulkSerializer(data=data_sanitized)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            # Salva o novo profissional no banco de dados; um id repetido viola a chave primária
+            try:
+                with transaction.atomic():
+                    profissional = Profissional.objects.create(**serializer.validated_data)
+            except IntegrityError:
+                return Response(profissional_duplicado(), status=status.HTTP_400_BAD_REQUEST)
+            return Response(ProfissionalSerializer(profissional).data, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -54,20 +184,21 @@ def profissional_crud(request):
             profissional = Profissional.objects.get(id_profissional=id_profissional)
             
             # Sanitizar campos vulneráveis
-            data_sanitized = {
-                key: escape(value) if key in ['nome_completo', 'endereco', 'nome_social', 'profissao'] and isinstance(value, str) else value
-                for key, value in request.data.items()
-            }
+            data_sanitized = sanitizar(request.data, CAMPOS_PROFISSIONAL)
 
-            # Serializa os novos dados (parcialmente, apenas os fornecidos)
-            serializer = ProfissionalSerializer(profissional, data=data_sanitized, partial=True)
+            # Valida os novos dados (parcialmente, apenas os fornecidos)
+            serializer = ProfissionalBulkSerializer(profissional, data=data_sanitized, partial=True)
 
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Salva as alterações no banco de dados
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+
+            # Salva as alterações e incrementa a versão no mesmo UPDATE
+            for campo, valor in serializer.validated_data.items():
+                setattr(profissional, campo, valor)
+            incrementar_versao(profissional)
+            profissional.save()
+            invalidar(profissional.id_profissional)
+            return Response(ProfissionalSerializer(profissional).data, status=status.HTTP_200_OK)
 
         except Profissional.DoesNotExist:
             return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
@@ -82,16 +213,55 @@ def profissional_crud(request):
     elif request.method == 'DELETE':
         try:
             id_profissional = request.data.get('id_profissional')
-            profissional = Profissional.objects.get(id_profissional=id_profissional)
-            
-            # Deleta o profissional do banco de dados
-            profissional.delete()
+
+            # Exclusão lógica em um UPDATE; os contatos e consultas são removidos depois, em
+            # lotes, pelo comando `expurgar`. Com ?hard=true, tudo é removido na hora, com
+            # um DELETE por tabela
+            if request.query_params.get('hard', '').lower() in ('1', 'true'):
+                declarar_orcamento(len(DEPENDENTES) + 2)
+                excluido = excluir_definitivamente([id_profissional]) > 0
+            else:
+                excluido = excluir_profissional(id_profissional)
+            if not excluido:
+                return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
             return Response({'message': 'Profissional deletado com sucesso'}, status=status.HTTP_204_NO_CONTENT)
-        except Profissional.DoesNotExist:
-            return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    # Dados de um Profissional (GET), ou de vários com ?ids=
+    elif request.method == 'GET':
+        if 'ids' in request.query_params:
+            return resposta_por_ids('profissionais', request.query_params)
+        try:
+            id_profissional = int(request.query_params.get('id_profissional'))
+        except (TypeError, ValueError):
+            return Response({'error': 'ID do profissional é necessário'}, status=status.HTTP_400_BAD_REQUEST)
+        # ?fields=: só as colunas pedidas são lidas e representadas
+        try:
+            leve = parse_campos(request.query_params.get('fields'), PROFISSIONAL_LEVE)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # GET condicional: a versão do profissional decide o 304 antes de qualquer leitura
+        versao = versao_atual(id_profissional)
+        if versao is None:
+            return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        etag, last_modified = validadores(id_profissional, *versao)
+        resposta_304 = not_modified(request, etag, last_modified)
+        if resposta_304 is not None:
+            return resposta_304
+
+        def serializar():
+            linhas = list(leve.linhas(Profissional.objects.filter(id_profissional=id_profissional)))
+            return leve.representar(linhas)[0] if linhas else None
+
+        # Leitura pelo cache; a entrada é descartada quando o profissional ou seus dados mudam.
+        # A versão lida entra na chave: dados de uma réplica atrasada não ocupam a entrada da versão nova
+        data = cached_payload('profissional', id_profissional, {'versao': versao[0], 'fields': leve.nomes}, serializar)
+        if data is None:
+            return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return set_validadores(Response(data, status=status.HTTP_200_OK), etag, last_modified)
+
     else:
         return Response({'error': 'Método não suportado'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
@@ -100,28 +270,14 @@ def profissional_crud(request):
 def contato_crud(request):
     # Inserir novo Contato (POST)
     if request.method == 'POST':
-        # Sanitizar campos vulneráveis
-        data_sanitized = {
-            key: escape(value) if key in ['tipo', 'contato'] and isinstance(value, str) else value 
-            for key, value in request.data.items()
-        }
+        if isinstance(request.data, list):
+            return bulk_response('contatos', request.data)
 
-        contato = ContatoSerializer(data=data_sanitized)
-        
-        if not contato.is_valid():
-            return Response(contato.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verifica se o profissional associado ao contato existe
-        try:
-            profissional_id = contato.validated_data['profissional'].id_profissional
-            Profissional.objects.get(id_profissional=profissional_id)
-        except Profissional.DoesNotExist:
-            return Response({'error': 'Não existe profissional vinculado ao id passado'}, status=status.HTTP_404_NOT_FOUND)
+        # Sanitizar campos vulneráveis
+        data_sanitized = sanitizar(request.data, CAMPOS_CONTATO)
 
         try:
-            # Salva o contato no banco de dados
-            contato.save()
-            return Response(contato.data, status=status.HTTP_201_CREATED)
+            return criar_vinculado(Contato, ContatoBulkSerializer, ContatoSerializer, data_sanitized)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -132,24 +288,13 @@ def contato_crud(request):
         if not id_contato:
             return Response({'error': 'ID do contato é necessário'}, status=status.HTTP_400_BAD_REQUEST)
         
-        data_sanitized = {
-            key: escape(value) if key in ['tipo', 'contato'] and isinstance(value, str) else value 
-            for key, value in request.data.items()
-        }
+        data_sanitized = sanitizar(request.data, CAMPOS_CONTATO)
 
         try:
-            # Busca o contato a ser atualizado
+            # Busca o contato a ser atualizado e salva as alterações
             contato = Contato.objects.get(id_contato=id_contato)
-            serializer = ContatoSerializer(contato, data=data_sanitized, partial=True)
-            
-            # Valida os novos dados
-            if not serializer.is_valid():
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Salva as alterações
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
+            return atualizar_vinculado(contato, ContatoBulkSerializer, ContatoSerializer, data_sanitized)
+
         except Contato.DoesNotExist:
             return Response({'error': 'Contato não encontrado'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -163,53 +308,64 @@ def contato_crud(request):
             
             # Deleta o contato do banco de dados
             contato.delete()
+            touch(contato.profissional_id)
             return Response({'message': 'Contato deletado com sucesso'}, status=status.HTTP_204_NO_CONTENT)
         except Contato.DoesNotExist:
             return Response({'error': 'Contato não encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
+    # Contatos pelo id do profissional (GET), ou pelos próprios ids com ?ids=
+    elif request.method == 'GET':
+        if 'ids' in request.query_params:
+            return resposta_por_ids('contatos', request.query_params)
+        try:
+            id_profissional = int(request.query_params.get('id_profissional'))
+        except (TypeError, ValueError):
+            return Response({'error': 'ID do profissional é necessário'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            leve = parse_campos(request.query_params.get('fields'), CONTATO_LEVE)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Os contatos de um profissional excluído somem com ele, antes do expurgo
+        contatos = Contato.objects.filter(profissional=id_profissional, profissional__excluido_em__isnull=True).order_by('id_contato')
+        return Response(leve.representar(leve.linhas(contatos)), status=status.HTTP_200_OK)
+
     else:
         return Response({'error': 'Método não suportado'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
+def consulta_nao_encontrada(id_consulta):
+    """404, ou 409 para uma consulta arquivada (o arquivo é somente leitura)."""
+    try:
+        arquivada = ConsultaArquivada.objects.filter(id_consulta=id_consulta).exists()
+    except (TypeError, ValueError):
+        arquivada = False
+    if arquivada:
+        return Response({'error': 'Consulta arquivada: somente leitura'}, status=status.HTTP_409_CONFLICT)
+    return Response({'error': 'Consulta não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+
+
 # CRUD - Consultas
 def consulta_crud(request):
     # Inserir nova Consulta (POST)
     if request.method == 'POST':
-        consulta = ConsultaSerializer(data=request.data)
+        if isinstance(request.data, list):
+            return bulk_response('consultas', request.data)
 
-        if not consulta.is_valid():
-            return Response(consulta.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        # Verifica se o profissional associado à consulta existe
-        try:
-            profissional_id = consulta.validated_data['profissional'].id_profissional
-            Profissional.objects.get(id_profissional=profissional_id)
-        except Profissional.DoesNotExist:
-            return Response({'error': 'Não existe profissional vinculado ao id passado'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Salva a consulta no banco de dados
-        consulta.save()
-        return Response(consulta.data, status=status.HTTP_201_CREATED)
+        # Salva a consulta no banco de dados (o profissional precisa existir)
+        return criar_vinculado(Consulta, ConsultaBulkSerializer, ConsultaSerializer, request.data, verificar=conflito_consulta)
     
     # Atualizar Consulta (PUT)
     elif request.method == 'PUT':
         id_consulta = request.data.get('id_consulta')
         
         try:
-            # Busca a consulta a ser atualizada
+            # Busca a consulta a ser atualizada e salva as alterações
             consulta = Consulta.objects.get(id_consulta=id_consulta)
-            serializer = ConsultaSerializer(consulta, data=request.data, partial=True)
-            
-            # Valida os novos dados
-            if not serializer.is_valid():
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Salva as alterações
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
+            return atualizar_vinculado(consulta, ConsultaBulkSerializer, ConsultaSerializer, request.data, verificar=conflito_consulta)
+
         except Consulta.DoesNotExist:
-            return Response({'error': 'Consulta não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+            return consulta_nao_encontrada(id_consulta)
 
     # Deletar Consulta (DELETE)
     elif request.method == 'DELETE':
@@ -219,26 +375,315 @@ def consulta_crud(request):
             
             # Deleta a consulta do banco de dados
             consulta.delete()
+            touch(consulta.profissional_id)
             return Response({'message': 'Consulta deletada com sucesso'}, status=status.HTTP_204_NO_CONTENT)
         except Consulta.DoesNotExist:
-            return Response({'error': 'Consulta não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+            return consulta_nao_encontrada(id_consulta)
     
-    # Consulta pelo id do profissional (GET)
+    # Consulta pelo id do profissional (GET), paginada por cursor, ou pelos próprios ids com ?ids=
     elif request.method == 'GET':
-        id_profissional = request.data.get('id_profissional')
+        if 'ids' in request.query_params:
+            return resposta_por_ids('consultas', request.query_params)
         try:
-            # Busca todas as consultas relacionadas ao profissional
-            consulta = Consulta.objects.filter(profissional=id_profissional)
+            id_profissional = int(request.query_params.get('id_profissional'))
+        except (TypeError, ValueError):
+            return Response({'error': 'ID do profissional é necessário'}, status=status.HTTP_400_BAD_REQUEST)
+        # O cursor da paginação usa data_consulta e id_consulta, lidos mesmo fora de ?fields=
+        try:
+            leve = parse_campos(request.query_params.get('fields'), CONSULTA_LEVE, ocultas=('data_consulta',))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            if not consulta.exists():
-                return Response({'error': 'Consulta não encontrada'}, status=status.HTTP_404_NOT_FOUND)
-            
-            # Serializa as consultas e retorna os dados
-            serializer = ConsultaSerializer(consulta, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        except Profissional.DoesNotExist:
-            return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        # GET condicional: a versão do profissional decide o 304 antes de qualquer leitura
+        versao = versao_atual(id_profissional)
+        if versao is None:
+            return Response({'error': 'Consulta não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        etag, last_modified = validadores(id_profissional, *versao)
+        resposta_304 = not_modified(request, etag, last_modified)
+        if resposta_304 is not None:
+            return resposta_304
+
+        def serializar():
+            # Busca uma página das consultas do profissional, filtrada pelo período (from/to),
+            # já no formato do ConsultaSerializer (sem instanciar os modelos). Períodos que
+            # começam no passado incluem as consultas arquivadas
+            arquivo = None
+            if pagina_pode_ter_arquivadas(request.query_params):
+                arquivo = ConsultaArquivada.objects.filter(profissional=id_profissional)
+            consultas, proximo = paginar_consultas(
+                Consulta.objects.filter(profissional=id_profissional), request.query_params, leve=leve, arquivo=arquivo
+            )
+            if not consultas and not request.query_params.get('cursor'):
+                return None
+
+            return {'results': consultas, 'next_cursor': proximo}
+
+        filtros = {nome: request.query_params.get(nome) for nome in ('from', 'to', 'limit', 'cursor')}
+        try:
+            data = cached_payload('consultas', id_profissional, {**filtros, 'versao': versao[0], 'fields': leve.nomes}, serializar)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if data is None:
+            return Response({'error': 'Consulta não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        return set_validadores(Response(data, status=status.HTTP_200_OK), etag, last_modified)
+
+    else:
+        return Response({'error': 'Método não suportado'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+
+# Exportação completa de um modelo em NDJSON ou CSV, enviada em blocos (sem montar a resposta na memória)
+@require_GET
+def export_request(request, model_name):
+    if model_name not in EXPORT_MODELS:
+        return JsonResponse({'error': 'Model não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
+
+    formato = request.GET.get('format', 'ndjson')
+    if formato not in EXPORT_FORMATS:
+        return JsonResponse({'error': 'Formato não suportado'}, status=status.HTTP_400_BAD_REQUEST)
+
+    gzip = request.GET.get('gzip', '').lower() in ('1', 'true')
+    nome_arquivo = f'{model_name}.{formato}' + ('.gz' if gzip else '')
+
+    response = StreamingHttpResponse(
+        # O banco é escolhido agora: os blocos são lidos depois que a view retorna
+        export_stream(model_name, formato, gzip, using=router.db_for_read(EXPORT_MODELS[model_name])),
+        content_type='application/gzip' if gzip else EXPORT_FORMATS[formato],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    # Posição do feed de alterações antes da leitura: quem importa a exportação continua
+    # a sincronização por api/changes/?since=<cursor> (o que mudar durante a exportação
+    # é entregue de novo, e aplicar o feed é idempotente)
+    response['X-Changes-Cursor'] = str(cursor_atual())
+    return response
+
+
+# CRUD - Horários de atendimento
+def horario_crud(request):
+    # Inserir novo Horário (POST)
+    if request.method == 'POST':
+        horario = HorarioAtendimentoSerializer(data=request.data)
+
+        if not horario.is_valid():
+            return Response(horario.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        horario.save()
+        return Response(horario.data, status=status.HTTP_201_CREATED)
+
+    # Horários pelo id do profissional (GET), ou pelos próprios ids com ?ids=
+    elif request.method == 'GET':
+        if 'ids' in request.query_params:
+            return resposta_por_ids('horarios', request.query_params)
+        id_profissional = request.query_params.get('id_profissional')
+        try:
+            leve = parse_campos(request.query_params.get('fields'), HORARIO_LEVE)
+            horarios = HorarioAtendimento.objects.filter(
+                profissional=id_profissional, profissional__excluido_em__isnull=True
+            ).order_by('dia_semana', 'hora_inicio')
+            return Response(leve.representar(leve.linhas(horarios)), status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Deletar Horário (DELETE)
+    elif request.method == 'DELETE':
+        try:
+            id_horario = request.data.get('id_horario')
+            horario = HorarioAtendimento.objects.get(id_horario=id_horario)
+
+            horario.delete()
+            return Response({'message': 'Horário deletado com sucesso'}, status=status.HTTP_204_NO_CONTENT)
+        except HorarioAtendimento.DoesNotExist:
+            return Response({'error': 'Horário não encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
     else:
         return Response({'error': 'Método não suportado'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+# Busca de horários livres entre profissionais, paginada pelo id do profissional
+@api_view(['GET'])
+def availability_request(request):
+    params = request.query_params
+    try:
+        inicio = parse_instante(params.get('from'))
+        fim = parse_instante(params.get('to'), fim_do_dia=True)
+        if inicio is None or fim is None:
+            raise ValueError('Os parâmetros from e to são obrigatórios')
+        if fim <= inicio or fim - inicio > datetime.timedelta(days=MAX_DIAS_BUSCA):
+            raise ValueError(f'O período deve ser positivo e ter no máximo {MAX_DIAS_BUSCA} dias')
+
+        duracao = int(params.get('duracao', 30))
+        if not 5 <= duracao <= 480:
+            raise ValueError('A duração do slot deve estar entre 5 e 480 minutos')
+
+        cursor = params.get('cursor')
+        resultados, proximo = buscar_disponibilidade(
+            inicio,
+            fim,
+            datetime.timedelta(minutes=duracao),
+            profissao=params.get('profissao'),
+            limit=parse_limit(params.get('limit')),
+            cursor=int(cursor) if cursor else None,
+            max_slots=parse_limit(params.get('slots')),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'results': resultados, 'next_cursor': proximo}, status=status.HTTP_200_OK)
+
+
+# Perfil completo (profissional com contatos e próximas consultas) em um número fixo de consultas:
+# uma para os profissionais e uma para cada relação, qualquer que seja o tamanho da página
+@api_view(['GET'])
+def perfil_request(request):
+    params = request.query_params
+    id_profissional = params.get('id_profissional')
+
+    # Um profissional: o 304 é decidido pela versão, antes de carregar as relações
+    if id_profissional is not None:
+        try:
+            profissional = Profissional.objects.filter(id_profissional=int(id_profissional)).first()
+        except ValueError:
+            return Response({'error': 'ID do profissional é necessário'}, status=status.HTTP_400_BAD_REQUEST)
+        if profissional is None:
+            return Response({'error': 'Profissional não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        etag, last_modified = validadores(profissional.id_profissional, profissional.versao, profissional.atualizado_em)
+        resposta_304 = not_modified(request, etag, last_modified)
+        if resposta_304 is not None:
+            return resposta_304
+
+        carregar_perfis([profissional])
+        data = ProfissionalPerfilSerializer(profissional).data
+        return set_validadores(Response(data, status=status.HTTP_200_OK), etag, last_modified)
+
+    # Página de profissionais (opcionalmente de uma profissão), paginada pelo id
+    try:
+        limite = parse_limit(params.get('limit'))
+        cursor = params.get('cursor')
+        profissionais = Profissional.objects.order_by('id_profissional')
+        if cursor:
+            profissionais = profissionais.filter(id_profissional__gt=int(cursor))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if params.get('profissao'):
+        profissionais = profissionais.filter(profissao=params['profissao'])
+
+    pagina = list(profissionais[:limite + 1])
+    proximo = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        proximo = pagina[-1].id_profissional
+
+    carregar_perfis(pagina)
+    data = ProfissionalPerfilSerializer(pagina, many=True).data
+    return Response({'results': data, 'next_cursor': proximo}, status=status.HTTP_200_OK)
+
+
+# Busca textual de profissionais (nome, nome social, profissão e endereço), por relevância
+@api_view(['GET'])
+def busca_request(request):
+    params = request.query_params
+    texto = params.get('q', '')
+    if not termos(texto):
+        return Response({'error': 'O parâmetro q é necessário'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limite = min(parse_limit(params.get('limit', BUSCA_LIMITE)), BUSCA_MAX_LIMITE)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    resultados = buscar_profissionais(texto, params.get('profissao'), limite)
+    return Response({'results': resultados}, status=status.HTTP_200_OK)
+
+
+def _coordenada(params, nome, limite):
+    try:
+        valor = float(params[nome])
+    except (KeyError, ValueError):
+        raise ValueError(f'O parâmetro {nome} é necessário e deve ser um número')
+    if not math.isfinite(valor) or abs(valor) > limite:
+        raise ValueError(f'O parâmetro {nome} deve estar entre -{limite} e {limite}')
+    return valor
+
+
+# Profissionais mais próximos de um ponto (opcionalmente de uma profissão e dentro de um raio em km)
+@api_view(['GET'])
+def proximos_request(request):
+    params = request.query_params
+    try:
+        latitude = _coordenada(params, 'lat', 90)
+        longitude = _coordenada(params, 'lon', 180)
+        limite = min(parse_limit(params.get('limit', GEO_LIMITE)), GEO_MAX_LIMITE)
+        raio = params.get('raio')
+        if raio is not None:
+            raio = float(raio)
+            if not 0 < raio <= GEO_RAIO_MAXIMO:
+                raise ValueError(f'O parâmetro raio deve estar entre 0 e {GEO_RAIO_MAXIMO:g} km')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if raio is None:
+        # Os k mais próximos: uma consulta por raio tentado, mais a leitura das linhas
+        declarar_orcamento(GEO_MAX_TENTATIVAS + 1)
+    resultados = buscar_proximos(latitude, longitude, params.get('profissao'), raio, limite)
+    return Response({'results': resultados}, status=status.HTTP_200_OK)
+
+
+# Feed de alterações de profissionais, contatos e consultas depois de um cursor, em ordem
+@api_view(['GET'])
+def changes_request(request):
+    params = request.query_params
+    try:
+        desde = int(params.get('since', 0))
+        if desde < 0:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'O parâmetro since deve ser um cursor do feed'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limite = parse_limit(params.get('limit', ALTERACOES_LIMITE))
+        resultados, proximo, ha_mais = listar_alteracoes(desde, limite)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except CursorExpirado as e:
+        return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+
+    return Response({'results': resultados, 'next_cursor': proximo, 'has_more': ha_mais}, status=status.HTTP_200_OK)
+
+
+# Consultas por dia, semana ou mês de cada profissional ou profissão, lidas do resumo diário
+@api_view(['GET'])
+def estatisticas_request(request):
+    params = request.query_params
+    try:
+        inicio, fim = parse_date(params.get('from') or ''), parse_date(params.get('to') or '')
+        if inicio is None or fim is None:
+            raise ValueError('Os parâmetros from e to são obrigatórios (AAAA-MM-DD)')
+        if fim < inicio or (fim - inicio).days >= ESTATISTICAS_MAX_DIAS:
+            raise ValueError(f'O período deve ser positivo e ter no máximo {ESTATISTICAS_MAX_DIAS} dias')
+        id_profissional = params.get('id_profissional')
+        if id_profissional is not None and not id_profissional.isdigit():
+            raise ValueError('O parâmetro id_profissional deve ser um número')
+        resultados = agregar(
+            inicio,
+            fim,
+            periodo=params.get('periodo', 'dia'),
+            agrupar=params.get('agrupar', 'profissional'),
+            id_profissional=int(id_profissional) if id_profissional else None,
+            profissao=params.get('profissao'),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'results': resultados}, status=status.HTTP_200_OK)
+
+
+# Contadores do cache de leitura (acertos, faltas e invalidações)
+@api_view(['GET'])
+def cache_stats_request(request):
+    return Response(cache_stats(), status=status.HTTP_200_OK)
+
+
+# Métricas no formato de texto do Prometheus (latência, SQL e serializers por modelo/método)
+@require_GET
+def metrics_request(request):
+    return HttpResponse(exportar_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
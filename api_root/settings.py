@@ -41,6 +41,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_lacrei.metrics.ServerTimingMiddleware',
+    'api_lacrei.compressao.CompressaoMiddleware',
+    'api_lacrei.replicas.RoteamentoMiddleware',
+    'api_lacrei.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,6 +74,33 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_root.wsgi.application'
 
+# Quando True, api/<model>/ usa as views assíncronas (api_lacrei/async_views.py), indicadas
+# para rodar sob ASGI (ex.: uvicorn api_root.asgi:application). api/async/<model>/ sempre usa.
+LACREI_ASYNC_VIEWS = False
+
+# Instrumentação por requisição: header Server-Timing e histogramas em /metrics
+LACREI_METRICS = True
+
+# Em desenvolvimento, uma requisição que passar do orçamento de consultas SQL do endpoint
+# (api_lacrei/query_budget.py) falha com QueryBudgetExceeded em vez de ficar mais lenta em silêncio
+LACREI_QUERY_BUDGET_STRICT = DEBUG
+
+
+# Django REST framework
+# JSON pelo orjson quando instalado (api_lacrei/renderers.py), com a mesma saída do DRF
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api_lacrei.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api_lacrei.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -82,6 +113,30 @@ DATABASES = {
 }
 
 
+# Leituras dos GETs em réplicas (api_lacrei/replicas.py): aliases de DATABASES com cópias do
+# `default`, e réplicas por modelo ('api_lacrei.consulta': [...]). Ver settings_replicas.py
+
+DATABASE_ROUTERS = ['api_lacrei.replicas.ReplicaRouter']
+LACREI_REPLICAS = []
+LACREI_REPLICAS_POR_MODELO = {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Guarda as leituras de profissionais e consultas (api_lacrei/cache.py). Qualquer backend
+# configurado aqui funciona; LACREI_CACHE_ALIAS escolhe qual deles é usado.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-lacrei',
+    }
+}
+
+LACREI_CACHE_ALIAS = 'default'
+LACREI_CACHE_TIMEOUT = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,51 @@
+"""
+Perfil de produção enxuto, só com a API: sem admin, autenticação, sessões, mensagens,
+templates e arquivos estáticos. A API não guarda estado entre requisições, então esses
+apps e middlewares só custavam tempo de boot e uma passagem por requisição.
+
+    DJANGO_SETTINGS_MODULE=api_root.settings_api gunicorn api_root.wsgi -w 4
+
+Herda o banco e os PRAGMAs de settings_producao. O admin continua disponível pelo perfil
+completo (api_root.settings), apontando para o mesmo banco.
+"""
+from .settings_producao import *  # noqa: F401,F403
+
+
+INSTALLED_APPS = [
+    'api_lacrei',
+]
+
+# Sem o orçamento de consultas (só age com LACREI_QUERY_BUDGET_STRICT, em desenvolvimento)
+# e sem sessão, CSRF, autenticação, mensagens e X-Frame-Options: as views do DRF e a rota
+# assíncrona já dispensam o CSRF, e as demais views só respondem a GET
+MIDDLEWARE = [
+    'api_lacrei.metrics.ServerTimingMiddleware',
+    'api_lacrei.compressao.CompressaoMiddleware',
+    'api_lacrei.replicas.RoteamentoMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'api_root.urls_api'
+
+# Nenhuma view renderiza templates (as páginas de erro do Django têm um texto padrão)
+TEMPLATES = []
+
+# As mensagens da API são fixas: sem carregar os catálogos de tradução
+USE_I18N = False
+
+# Só JSON: sem a API navegável (que precisa de templates e estáticos) e sem formulários.
+# Sem autenticação: request.user fica None e o DRF não importa django.contrib.auth
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api_lacrei.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api_lacrei.parsers.JSONParser',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
+
+AUTH_PASSWORD_VALIDATORS = []
@@ -0,0 +1,50 @@
+"""
+Perfil de produção com SQLite: WAL, PRAGMAs por conexão, conexões persistentes e
+transações de escrita com BEGIN IMMEDIATE.
+
+    DJANGO_SETTINGS_MODULE=api_root.settings_producao gunicorn api_root.wsgi -w 4
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+
+DEBUG = False
+ALLOWED_HOSTS = os.environ.get('LACREI_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+SECRET_KEY = os.environ.get('LACREI_SECRET_KEY', SECRET_KEY)  # noqa: F405
+
+LACREI_QUERY_BUDGET_STRICT = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('LACREI_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),  # noqa: F405
+        # Cada processo reaproveita a conexão entre requisições (e os PRAGMAs aplicados nela)
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Toda transação (transaction.atomic) reserva a escrita no BEGIN. Com o BEGIN
+            # padrão (DEFERRED), uma transação que lê e depois escreve pode receber
+            # "database is locked" na hora da escrita, sem que o busy_timeout ajude.
+            'transaction_mode': 'IMMEDIATE',
+            # Espera pelo lock do sqlite3, em segundos (o mesmo valor do busy_timeout abaixo)
+            'timeout': 5,
+        },
+    }
+}
+
+# Aplicados em cada nova conexão por api_lacrei/sqlite.py
+LACREI_SQLITE_PRAGMAS = {
+    # Leitores não bloqueiam o escritor e vice-versa; persiste no arquivo do banco
+    'journal_mode': 'WAL',
+    # Em WAL, NORMAL só sincroniza o disco nos checkpoints: seguro contra corrupção,
+    # podendo perder as últimas transações em uma queda de energia
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Valor negativo = KiB: 64 MiB de cache de páginas por conexão
+    'cache_size': -64000,
+    # Leituras por mmap de até 256 MiB do arquivo
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
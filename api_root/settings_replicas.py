@@ -0,0 +1,27 @@
+"""
+Perfil local com uma réplica de leitura: dois arquivos SQLite, com o primário copiado
+para a réplica pelo comando `replicar` (o atraso da réplica é o intervalo da cópia).
+
+    DJANGO_SETTINGS_MODULE=api_root.settings_replicas python manage.py migrate
+    DJANGO_SETTINGS_MODULE=api_root.settings_replicas python manage.py replicar --intervalo 1
+    DJANGO_SETTINGS_MODULE=api_root.settings_replicas python manage.py runserver
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('LACREI_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),  # noqa: F405
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('LACREI_SQLITE_REPLICA_PATH', BASE_DIR / 'db_replica.sqlite3'),  # noqa: F405
+        # Nos testes, a réplica é o próprio banco de teste do primário
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+LACREI_REPLICAS = ['replica']
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from api_lacrei.views import metrics_request
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('api_lacrei.urls'), name='api_lacrei_urls')
+    path('api/', include('api_lacrei.urls'), name='api_lacrei_urls'),
+    path('metrics', metrics_request, name='metrics'),
 ]
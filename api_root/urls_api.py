@@ -0,0 +1,10 @@
+from django.urls import path, include
+
+from api_lacrei.views import metrics_request
+
+
+# Rotas do perfil enxuto (settings_api): as de urls.py, sem o admin
+urlpatterns = [
+    path('api/', include('api_lacrei.urls'), name='api_lacrei_urls'),
+    path('metrics', metrics_request, name='metrics'),
+]
@@ -0,0 +1,295 @@
+"""
+Latência e vazão de cada combinação de modelo e método de `handle_request`, com
+resultados em JSON para comparação entre execuções (benchmarks/comparar.py).
+
+Em processo (padrão), sobre um banco gerado por benchmarks/gerar_dados.py:
+
+    python -m benchmarks.bench_api --escala 0.01 --requisicoes 200
+    python -m benchmarks.bench_api --db /tmp/lacrei.sqlite3          (banco já gerado)
+
+Contra um servidor local (o banco é o do servidor, gerado com a mesma escala):
+
+    python -m benchmarks.gerar_dados --db /tmp/lacrei.sqlite3 --escala 1
+    LACREI_SQLITE_PATH=/tmp/lacrei.sqlite3 DJANGO_SETTINGS_MODULE=api_root.settings_producao gunicorn api_root.wsgi -w 4
+    python -m benchmarks.bench_api --url http://localhost:8000 --escala 1 --concorrencia 16
+
+Cada cenário é determinístico (semente fixa). Preparações que o cenário precisa
+(ex.: criar o contato que o PUT vai alterar) ficam fora das latências, mas entram no
+tempo total usado no req/s desses cenários.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from benchmarks.common import percentil, setup_django
+from benchmarks.gerar_dados import CONSULTAS, CONTATOS, PROFISSIONAIS, gerar
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(__file__), 'resultados')
+
+# Duração máxima de uma consulta, em minutos (LACREI_DURACAO_MAXIMA; no modo --url, a do
+# servidor deve ser a padrão ou informada em --duracao-maxima)
+DURACAO_MAXIMA = 480
+
+
+@dataclass
+class Requisicao:
+    metodo: str
+    caminho: str
+    params: dict = None
+    corpo: object = None
+
+
+class TransporteLocal:
+    """Executa as requisições pelo handler completo do Django (middlewares e roteamento)."""
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def executar(self, requisicao):
+        caminho = '/api/' + requisicao.caminho
+        if requisicao.metodo == 'GET':
+            response = self.client.get(caminho, requisicao.params or {})
+        else:
+            response = self.client.generic(
+                requisicao.metodo, caminho, json.dumps(requisicao.corpo), content_type='application/json'
+            )
+        corpo = response.content
+        return response.status_code, json.loads(corpo) if corpo and response.get('Content-Type', '').startswith('application/json') else None
+
+
+class TransporteHTTP:
+    """Executa as requisições em um servidor real, com uma conexão persistente por thread."""
+
+    def __init__(self, url):
+        partes = urllib.parse.urlsplit(url)
+        self.conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=60)
+
+    def executar(self, requisicao):
+        caminho = '/api/' + requisicao.caminho
+        if requisicao.params:
+            caminho += '?' + urllib.parse.urlencode(requisicao.params)
+        corpo = json.dumps(requisicao.corpo) if requisicao.corpo is not None else None
+        self.conexao.request(requisicao.metodo, caminho, body=corpo, headers={'Content-Type': 'application/json'})
+        response = self.conexao.getresponse()
+        dados = response.read()
+        conteudo = json.loads(dados) if dados and response.getheader('Content-Type', '').startswith('application/json') else None
+        return response.status, conteudo
+
+
+class Cenario:
+    """
+    Um modelo e um método. `preparar(transporte, i, aleatorio)` roda fora da medição e
+    devolve a Requisicao medida; `base` separa ids novos de execuções diferentes.
+    """
+
+    def __init__(self, model_name, metodo, preparar):
+        self.model_name = model_name
+        self.metodo = metodo
+        self.preparar = preparar
+
+    @property
+    def nome(self):
+        return f'{self.model_name} {self.metodo}'
+
+
+def cenarios(profissionais, base, duracao_maxima=DURACAO_MAXIMA):
+    aleatorio_id = lambda aleatorio: aleatorio.randint(1, profissionais)
+    # Datas e ids novos caem fora do intervalo dos dados gerados e variam com `base`
+    novo_id = lambda i: 10_000_000 + base * 100_000 + i
+    # Cada consulta criada ocupa um intervalo próprio de `duracao_maxima` minutos (nenhuma
+    # consulta dura mais), então duas delas nunca se sobrepõem, mesmo no mesmo profissional.
+    # Cada execução usa 100 mil intervalos a partir de 2100; o espaço até 9000 comporta um
+    # número limitado de execuções, e `base` é reduzido a ele
+    intervalo = datetime.timedelta(minutes=duracao_maxima)
+    execucoes = max(1, (datetime.datetime(9000, 1, 1) - datetime.datetime(2100, 1, 1)) // (intervalo * 100_000))
+    nova_data = lambda i: (datetime.datetime(2100, 1, 1) + intervalo * ((base % execucoes) * 100_000 + i)).isoformat() + 'Z'
+
+    def profissional(id_profissional):
+        return {'id_profissional': id_profissional, 'nome_completo': f'Bench {id_profissional}', 'profissao': 'Pediatra', 'endereco': 'Rua X'}
+
+    def criar(transporte, caminho, corpo, campo):
+        status_code, dados = transporte.executar(Requisicao('POST', caminho, corpo=corpo))
+        if status_code != 201:
+            raise RuntimeError(f'Falha na preparação ({caminho} {status_code}): {dados}')
+        return dados[campo]
+
+    def criar_profissional(transporte, i):
+        return criar(transporte, 'profissionais/', profissional(novo_id(i)), 'id_profissional')
+
+    return [
+        Cenario('profissionais', 'GET', lambda t, i, a: Requisicao('GET', 'profissionais/', {'id_profissional': aleatorio_id(a)})),
+        Cenario('profissionais', 'POST', lambda t, i, a: Requisicao('POST', 'profissionais/', corpo=profissional(novo_id(i)))),
+        Cenario('profissionais', 'PUT', lambda t, i, a: Requisicao(
+            'PUT', 'profissionais/', corpo={'id_profissional': aleatorio_id(a), 'endereco': f'Rua {i}'})),
+        Cenario('profissionais', 'DELETE', lambda t, i, a: Requisicao(
+            'DELETE', 'profissionais/', corpo={'id_profissional': criar_profissional(t, 50_000 + i)})),
+
+        Cenario('contatos', 'GET', lambda t, i, a: Requisicao('GET', 'contatos/', {'id_profissional': aleatorio_id(a)})),
+        Cenario('contatos', 'POST', lambda t, i, a: Requisicao(
+            'POST', 'contatos/', corpo={'profissional': aleatorio_id(a), 'tipo': 'email', 'contato': f'bench{base}.{i}@exemplo.com'})),
+        Cenario('contatos', 'PUT', lambda t, i, a: Requisicao('PUT', 'contatos/', corpo={
+            'id_contato': criar(t, 'contatos/', {'profissional': aleatorio_id(a), 'tipo': 'email', 'contato': f'put{base}.{i}@exemplo.com'}, 'id_contato'),
+            'tipo': 'telefone',
+        })),
+        Cenario('contatos', 'DELETE', lambda t, i, a: Requisicao('DELETE', 'contatos/', corpo={
+            'id_contato': criar(t, 'contatos/', {'profissional': aleatorio_id(a), 'tipo': 'email', 'contato': f'del{base}.{i}@exemplo.com'}, 'id_contato'),
+        })),
+
+        Cenario('consultas', 'GET', lambda t, i, a: Requisicao('GET', 'consultas/', {'id_profissional': aleatorio_id(a), 'limit': 50})),
+        Cenario('consultas', 'POST', lambda t, i, a: Requisicao(
+            'POST', 'consultas/', corpo={'profissional': aleatorio_id(a), 'data_consulta': nova_data(i)})),
+        Cenario('consultas', 'PUT', lambda t, i, a: Requisicao('PUT', 'consultas/', corpo={
+            'id_consulta': criar(t, 'consultas/', {'profissional': aleatorio_id(a), 'data_consulta': nova_data(20_000 + i)}, 'id_consulta'),
+            'data_consulta': nova_data(40_000 + i),
+        })),
+        Cenario('consultas', 'DELETE', lambda t, i, a: Requisicao('DELETE', 'consultas/', corpo={
+            'id_consulta': criar(t, 'consultas/', {'profissional': aleatorio_id(a), 'data_consulta': nova_data(60_000 + i)}, 'id_consulta'),
+        })),
+
+        Cenario('horarios', 'GET', lambda t, i, a: Requisicao('GET', 'horarios/', {'id_profissional': aleatorio_id(a)})),
+        Cenario('horarios', 'POST', lambda t, i, a: Requisicao('POST', 'horarios/', corpo={
+            'profissional': criar_profissional(t, 70_000 + i), 'dia_semana': 0, 'hora_inicio': '08:00', 'hora_fim': '12:00',
+        })),
+        Cenario('horarios', 'DELETE', lambda t, i, a: Requisicao('DELETE', 'horarios/', corpo={
+            'id_horario': criar(t, 'horarios/', {
+                'profissional': criar_profissional(t, 80_000 + i), 'dia_semana': 0, 'hora_inicio': '08:00', 'hora_fim': '12:00',
+            }, 'id_horario'),
+        })),
+    ]
+
+
+def rodar_cenario(cenario, novo_transporte, requisicoes, concorrencia, semente, aquecimento=10):
+    """
+    Executa `requisicoes` iterações divididas entre `concorrencia` threads, depois de
+    `aquecimento` iterações descartadas (com índices próprios, para não repetir ids).
+    """
+    local = threading.local()
+    tempos, erros = [], []
+    lock = threading.Lock()
+
+    def iteracao(i, medir=True):
+        if not hasattr(local, 'transporte'):
+            local.transporte = novo_transporte()
+        aleatorio = random.Random(semente * 1_000_003 + i)
+        requisicao = cenario.preparar(local.transporte, i, aleatorio)
+        inicio = time.perf_counter()
+        status_code, _ = local.transporte.executar(requisicao)
+        tempo = (time.perf_counter() - inicio) * 1000
+        if not medir:
+            return
+        with lock:
+            tempos.append(tempo)
+            if status_code >= 400:
+                erros.append(status_code)
+
+    for i in range(requisicoes, requisicoes + aquecimento):
+        iteracao(i, medir=False)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concorrencia) as pool:
+        list(pool.map(iteracao, range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+
+    tempos.sort()
+    return {
+        'model': cenario.model_name,
+        'method': cenario.metodo,
+        'requisicoes': len(tempos),
+        'erros': len(erros),
+        'req_s': len(tempos) / duracao,
+        'media_ms': sum(tempos) / len(tempos),
+        'p50_ms': percentil(tempos, 0.50),
+        'p95_ms': percentil(tempos, 0.95),
+        'p99_ms': percentil(tempos, 0.99),
+        'max_ms': tempos[-1],
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='URL base de um servidor local (ex.: http://localhost:8000)')
+    parser.add_argument('--db', help='Banco SQLite já gerado (em processo)')
+    parser.add_argument('--escala', type=float, default=0.01, help='Escala dos dados (ver gerar_dados.py)')
+    parser.add_argument('--requisicoes', type=int, default=200, help='Requisições por cenário')
+    parser.add_argument('--aquecimento', type=int, default=10, help='Iterações descartadas por cenário')
+    parser.add_argument('--concorrencia', type=int, default=1)
+    parser.add_argument('--cenario', action='append', help='Filtra cenários (ex.: "consultas GET")')
+    parser.add_argument('--semente', type=int, default=7)
+    parser.add_argument('--duracao-maxima', type=int, help='LACREI_DURACAO_MAXIMA do servidor, em minutos (modo --url)')
+    parser.add_argument('--com-cache', action='store_true', help='Mantém o cache de leitura ligado')
+    parser.add_argument('--saida', help='Arquivo JSON de resultado (padrão: benchmarks/resultados/<data>.json)')
+    args = parser.parse_args()
+
+    profissionais = max(1, int(PROFISSIONAIS * args.escala))
+    if args.url:
+        modo = 'http'
+        novo_transporte = lambda: TransporteHTTP(args.url)
+        duracao_maxima = args.duracao_maxima or DURACAO_MAXIMA
+    else:
+        modo = 'local'
+        overrides = {'DEBUG': False, 'ALLOWED_HOSTS': ['testserver'], 'LACREI_QUERY_BUDGET_STRICT': False}
+        if not args.com_cache:
+            overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        gerado = args.db is not None and os.path.exists(args.db)
+        setup_django(args.db, **overrides)
+        if not gerado:
+            gerar(profissionais, int(CONTATOS * args.escala), int(CONSULTAS * args.escala))
+        novo_transporte = TransporteLocal
+        from api_lacrei.agenda import DURACAO_MAXIMA as duracao_maxima
+
+    # `base` separa os ids criados por execuções diferentes contra o mesmo banco
+    base = int(time.time()) % 10_000
+    resultados = []
+    print(f'{"cenário":<24}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"erros":>8}')
+    for cenario in cenarios(profissionais, base, duracao_maxima):
+        if args.cenario and cenario.nome not in args.cenario:
+            continue
+        resultado = rodar_cenario(
+            cenario, novo_transporte, args.requisicoes, args.concorrencia, args.semente, args.aquecimento
+        )
+        resultados.append(resultado)
+        print(f'{cenario.nome:<24}{resultado["req_s"]:>10.1f}{resultado["p50_ms"]:>10.2f}'
+              f'{resultado["p95_ms"]:>10.2f}{resultado["p99_ms"]:>10.2f}{resultado["erros"]:>8}')
+
+    import django
+    import sqlite3
+    relatorio = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'modo': modo,
+        'escala': args.escala,
+        'requisicoes': args.requisicoes,
+        'concorrencia': args.concorrencia,
+        'cache': args.com_cache,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'cenarios': resultados,
+    }
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f'{modo}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as arquivo:
+        json.dump(relatorio, arquivo, indent=2)
+    print(f'Resultado: {saida}')
+
+
+if __name__ == '__main__':
+    main()
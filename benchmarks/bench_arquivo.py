@@ -0,0 +1,137 @@
+"""
+Benchmark do arquivamento de consultas: um histórico de vários anos (por padrão 200
+profissionais com uma consulta por dia durante 3 anos, mais os próximos 60 dias) antes e
+depois de mover as consultas antigas para ConsultaArquivada. Mede o tamanho da tabela de
+consultas e de seus índices (tabela virtual dbstat do SQLite), a leitura das próximas
+consultas, a busca por sobreposição de um agendamento e a leitura do histórico (que
+passa a juntar as duas tabelas), além do tempo do arquivamento e do lote mais lento.
+
+    python -m benchmarks.bench_arquivo [--profissionais 200] [--anos 3] [--horizonte-dias 180] [--lote 1000]
+"""
+import argparse
+import datetime
+import time
+
+from benchmarks.common import medir, setup_django
+
+TABELAS = ('api_lacrei_consulta', 'api_lacrei_consultaarquivada')
+
+
+def popular(profissionais, anos):
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from api_lacrei.models import Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao='Pediatra', endereco=f'Rua {i}')
+        for i in range(1, profissionais + 1)
+    )
+    hoje = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    dias = [hoje + datetime.timedelta(days=dia) for dia in range(-365 * anos, 60)]
+    # Em ordem de data, como as consultas chegam: as antigas têm os menores ids
+    linhas = []
+    for dia in dias:
+        for i in range(1, profissionais + 1):
+            inicio = dia + datetime.timedelta(hours=8 + i % 10)
+            linhas.append((i, inicio.isoformat(' '), (inicio + datetime.timedelta(minutes=30)).isoformat(' ')))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO api_lacrei_consulta (profissional_id, data_consulta, duracao, data_fim) VALUES (%s, %s, 30, %s)',
+            linhas,
+        )
+    return len(linhas)
+
+
+def tamanhos():
+    """{tabela ou índice: bytes} das tabelas de consultas, pela tabela virtual dbstat."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name, SUM(pgsize) FROM dbstat WHERE name IN '
+            "(SELECT name FROM sqlite_master WHERE tbl_name IN (%s, %s)) GROUP BY name",
+            TABELAS,
+        )
+        return dict(cursor.fetchall())
+
+
+def leituras(profissionais, repeticoes):
+    from django.utils import timezone
+    from api_lacrei.agenda import consulta_em_conflito
+    from api_lacrei.arquivo import pagina_pode_ter_arquivadas
+    from api_lacrei.models import Consulta, ConsultaArquivada
+    from api_lacrei.pagination import paginar_consultas
+    from api_lacrei.serializers import CONSULTA_LEVE
+
+    agora = timezone.now()
+    amanha = agora.replace(hour=8, minute=15) + datetime.timedelta(days=1)
+    cenarios = {
+        'próximas consultas (from=agora)': {'from': agora.isoformat()},
+        'histórico (2 anos atrás)': {'from': (agora - datetime.timedelta(days=730)).isoformat()},
+    }
+    tempos = {}
+    for nome, params in cenarios.items():
+        def listar(params=params):
+            for id_profissional in (1, profissionais // 2, profissionais):
+                arquivo = None
+                if pagina_pode_ter_arquivadas(params):
+                    arquivo = ConsultaArquivada.objects.filter(profissional=id_profissional)
+                paginar_consultas(Consulta.objects.filter(profissional=id_profissional), params, leve=CONSULTA_LEVE, arquivo=arquivo)
+        tempos[nome] = medir(listar, repeticoes=repeticoes)['mediana_ms'] / 3
+
+    def conflito():
+        for id_profissional in (1, profissionais // 2, profissionais):
+            consulta_em_conflito(id_profissional, amanha, amanha + datetime.timedelta(minutes=30))
+    tempos['sobreposição de um agendamento'] = medir(conflito, repeticoes=repeticoes)['mediana_ms'] / 3
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=200)
+    parser.add_argument('--anos', type=int, default=3)
+    parser.add_argument('--horizonte-dias', type=float, default=180)
+    parser.add_argument('--lote', type=int, default=1000)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from api_lacrei.arquivo import arquivar
+    from api_lacrei.models import Consulta, ConsultaArquivada
+
+    total = popular(args.profissionais, args.anos)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f'{total:,} consultas de {args.profissionais} profissionais ({args.anos} anos + 60 dias)\n')
+
+    antes_tamanhos, antes = tamanhos(), leituras(args.profissionais, args.repeticoes)
+
+    lotes = []
+    inicio = time.perf_counter()
+    marca = inicio
+    for _ in arquivar(datetime.timedelta(days=args.horizonte_dias), args.lote):
+        agora = time.perf_counter()
+        lotes.append((agora - marca) * 1000)
+        marca = agora
+    duracao = time.perf_counter() - inicio
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute('ANALYZE')
+    print(f'Arquivamento (horizonte de {args.horizonte_dias:g} dias, lotes de {args.lote}): '
+          f'{ConsultaArquivada.objects.count():,} consultas em {len(lotes)} lotes, {duracao:.2f}s; '
+          f'lote mais lento {max(lotes, default=0):.1f} ms, mediana {sorted(lotes)[len(lotes) // 2] if lotes else 0:.1f} ms')
+    print(f'Consultas na tabela principal: {total:,} -> {Consulta.objects.count():,}\n')
+
+    depois_tamanhos, depois = tamanhos(), leituras(args.profissionais, args.repeticoes)
+
+    print(f"{'Tamanho (KiB)':<72} {'antes':>9} {'depois':>10}")
+    for nome in sorted(set(antes_tamanhos) | set(depois_tamanhos)):
+        print(f'  {nome:<72} {antes_tamanhos.get(nome, 0) / 1024:>9,.0f} {depois_tamanhos.get(nome, 0) / 1024:>10,.0f}')
+    print(f"\n{'Mediana por requisição (ms)':<72} {'antes':>9} {'depois':>10}")
+    for nome in antes:
+        print(f'  {nome:<72} {antes[nome]:>9.3f} {depois[nome]:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Carga concorrente nas rotas síncrona (WSGI) e assíncrona (ASGI) dos CRUDs.
+
+Em processo (padrão), cada requisição passa pelo handler completo do Django: o caminho
+WSGI é exercitado com `django.test.Client` em um pool de threads e o caminho ASGI com
+`django.test.AsyncClient` em um único event loop:
+
+    python -m benchmarks.bench_async --concorrencia 64 --requisicoes 2000
+
+Contra servidores reais, informe as URLs base (o banco é o dos servidores):
+
+    gunicorn api_root.wsgi -w 4 -b :8000
+    uvicorn api_root.asgi:application --workers 4 --port 8001   (com LACREI_ASYNC_VIEWS = True)
+    python -m benchmarks.bench_async --wsgi-url http://localhost:8000 --asgi-url http://localhost:8001
+
+Com SQLite, as consultas do ORM assíncrono são executadas em uma única thread
+(thread_sensitive): o ganho do caminho ASGI aparece no custo por requisição e na
+latência de cauda, não em consultas sobrepostas ao banco.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentil, setup_django
+
+
+def popular(total_profissionais, consultas_por_profissional):
+    import datetime
+    from django.utils import timezone
+    from api_lacrei.models import Profissional, Consulta
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao='Cardiologista', endereco=f'Rua {i}')
+        for i in range(1, total_profissionais + 1)
+    )
+    inicio = timezone.make_aware(datetime.datetime(2024, 1, 1, 8))
+    Consulta.objects.bulk_create(
+        (
+            Consulta(profissional_id=i, data_consulta=inicio + datetime.timedelta(hours=j))
+            for i in range(1, total_profissionais + 1)
+            for j in range(consultas_por_profissional)
+        ),
+        batch_size=5000,
+    )
+
+
+def resumo(nome, tempos, duracao, erros):
+    tempos.sort()
+    print(
+        f'{nome:<6} {len(tempos) / duracao:9.1f} req/s   p50 {percentil(tempos, 0.50):8.2f} ms'
+        f'   p99 {percentil(tempos, 0.99):8.2f} ms   erros {erros}'
+    )
+
+
+def caminhos(total_profissionais, requisicoes, base):
+    aleatorio = random.Random(7)
+    return [
+        f'{base}consultas/?id_profissional={aleatorio.randint(1, total_profissionais)}&limit=50'
+        for _ in range(requisicoes)
+    ]
+
+
+def rodar_wsgi(urls, concorrencia):
+    from django.db import connection
+    from django.test import Client
+
+    local = threading.local()
+
+    def requisitar(url):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        inicio = time.perf_counter()
+        status_code = local.client.get(url).status_code
+        return (time.perf_counter() - inicio) * 1000, status_code
+
+    def fechar_conexao(_):
+        connection.close()
+
+    with ThreadPoolExecutor(concorrencia) as pool:
+        inicio = time.perf_counter()
+        resultados = list(pool.map(requisitar, urls))
+        duracao = time.perf_counter() - inicio
+        list(pool.map(fechar_conexao, range(concorrencia)))
+    return resultados, duracao
+
+
+def rodar_asgi(urls, concorrencia):
+    from django.test import AsyncClient
+
+    async def principal():
+        client = AsyncClient()
+        semaforo = asyncio.Semaphore(concorrencia)
+
+        async def requisitar(url):
+            async with semaforo:
+                inicio = time.perf_counter()
+                response = await client.get(url)
+                return (time.perf_counter() - inicio) * 1000, response.status_code
+
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(requisitar(url) for url in urls))
+        return resultados, time.perf_counter() - inicio
+
+    return asyncio.run(principal())
+
+
+def rodar_http(urls, concorrencia):
+    def requisitar(url):
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url) as response:
+                response.read()
+                status_code = response.status
+        except urllib.error.HTTPError as exc:
+            status_code = exc.code
+        return (time.perf_counter() - inicio) * 1000, status_code
+
+    with ThreadPoolExecutor(concorrencia) as pool:
+        inicio = time.perf_counter()
+        resultados = list(pool.map(requisitar, urls))
+        return resultados, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=200)
+    parser.add_argument('--consultas', type=int, default=100, help='Consultas por profissional')
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--concorrencia', type=int, default=64)
+    parser.add_argument('--com-cache', action='store_true', help='Mantém o cache de leitura ligado')
+    parser.add_argument('--wsgi-url', help='URL base de um servidor WSGI (ex.: http://localhost:8000)')
+    parser.add_argument('--asgi-url', help='URL base de um servidor ASGI (ex.: http://localhost:8001)')
+    args = parser.parse_args()
+
+    if args.wsgi_url or args.asgi_url:
+        for nome, base in (('WSGI', args.wsgi_url), ('ASGI', args.asgi_url)):
+            if base:
+                urls = caminhos(args.profissionais, args.requisicoes, base.rstrip('/') + '/api/')
+                resultados, duracao = rodar_http(urls, args.concorrencia)
+                erros = sum(1 for _, status_code in resultados if status_code >= 400)
+                resumo(nome, [tempo for tempo, _ in resultados], duracao, erros)
+        return
+
+    overrides = {}
+    if not args.com_cache:
+        overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    setup_django(ALLOWED_HOSTS=['testserver'], **overrides)
+    popular(args.profissionais, args.consultas)
+
+    print(f'{args.requisicoes} GETs de consultas, concorrência {args.concorrencia}')
+    for nome, base, rodar in (('WSGI', '/api/', rodar_wsgi), ('ASGI', '/api/async/', rodar_asgi)):
+        urls = caminhos(args.profissionais, args.requisicoes, base)
+        resultados, duracao = rodar(urls, args.concorrencia)
+        erros = sum(1 for _, status_code in resultados if status_code >= 400)
+        resumo(nome, [tempo for tempo, _ in resultados], duracao, erros)
+
+
+if __name__ == '__main__':
+    main()
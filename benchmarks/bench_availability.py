@@ -0,0 +1,91 @@
+"""
+Benchmark da busca de horários livres com 1.000 profissionais e 100.000 consultas.
+
+    python -m benchmarks.bench_availability [--profissionais 1000] [--consultas 100000]
+"""
+import argparse
+import datetime
+import random
+import time
+
+from benchmarks.common import imprimir, medir, setup_django
+
+PROFISSOES = ['Cardiologista', 'Dermatologista', 'Pediatra', 'Psicólogo', 'Ginecologista',
+              'Ortopedista', 'Neurologista', 'Endocrinologista', 'Psiquiatra', 'Clínico Geral']
+
+
+def popular(total_profissionais, total_consultas, dias):
+    from django.utils import timezone
+    from api_lacrei.models import Profissional, Consulta
+
+    Profissional.objects.bulk_create(
+        Profissional(
+            id_profissional=i,
+            nome_completo=f'Profissional {i}',
+            profissao=PROFISSOES[i % len(PROFISSOES)],
+            endereco=f'Rua {i}',
+        )
+        for i in range(1, total_profissionais + 1)
+    )
+
+    # Consultas em horários de 30 minutos dentro do expediente padrão (8h às 18h)
+    inicio = timezone.make_aware(datetime.datetime(2024, 1, 1))
+    por_profissional = total_consultas // total_profissionais
+    aleatorio = random.Random(42)
+    consultas = []
+    for id_profissional in range(1, total_profissionais + 1):
+        horarios = aleatorio.sample(range(dias * 20), por_profissional)
+        for horario in horarios:
+            dia, slot = divmod(horario, 20)
+            consultas.append(Consulta(
+                profissional_id=id_profissional,
+                data_consulta=inicio + datetime.timedelta(days=dia, hours=8, minutes=30 * slot),
+            ))
+    Consulta.objects.bulk_create(consultas, batch_size=5000)
+    return inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--profissionais', type=int, default=1000)
+    parser.add_argument('--consultas', type=int, default=100_000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from api_lacrei.availability import buscar_disponibilidade
+
+    inicio_carga = time.perf_counter()
+    inicio = popular(args.profissionais, args.consultas, args.dias)
+    print(f'{args.profissionais} profissionais e {args.consultas} consultas gerados em '
+          f'{time.perf_counter() - inicio_carga:.1f}s')
+
+    meio_do_ano = inicio + datetime.timedelta(days=args.dias // 2)
+    semana = (meio_do_ano, meio_do_ano + datetime.timedelta(days=7))
+    mes = (meio_do_ano, meio_do_ano + datetime.timedelta(days=30))
+    slot = datetime.timedelta(minutes=30)
+
+    def todas_as_paginas(periodo):
+        cursor = None
+        while True:
+            _, cursor = buscar_disponibilidade(*periodo, slot, profissao='Cardiologista', limit=20, cursor=cursor)
+            if cursor is None:
+                break
+
+    cenarios = [
+        ('primeira página, 1 semana, Cardiologista',
+         lambda: buscar_disponibilidade(*semana, slot, profissao='Cardiologista', limit=20)),
+        ('primeira página, 30 dias, Cardiologista',
+         lambda: buscar_disponibilidade(*mes, slot, profissao='Cardiologista', limit=20)),
+        ('primeira página, 1 semana, todas as profissões',
+         lambda: buscar_disponibilidade(*semana, slot, limit=20)),
+        ('todas as páginas, 1 semana, Cardiologista',
+         lambda: todas_as_paginas(semana)),
+    ]
+    for nome, funcao in cenarios:
+        imprimir(nome, medir(funcao, args.repeticoes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Custo fixo de cada perfil de settings: tempo de boot de um processo (django.setup, a
+pilha de middlewares e o primeiro GET, que carrega as rotas e as views), memória do
+processo depois do boot e tempo por requisição da pilha completa (WSGIHandler chamado
+direto, sem servidor). Cada perfil roda em processos próprios, sobre o mesmo banco.
+
+    python -m benchmarks.bench_boot [--perfis api_root.settings_producao api_root.settings_api]
+                                    [--processos 10] [--requisicoes 5000]
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+INICIO = time.perf_counter()
+
+# /api/cache/ não lê o banco: o tempo é o dos middlewares, do roteamento e do DRF.
+# O GET de um profissional sai do cache de leitura depois da primeira vez
+CAMINHOS = (
+    ('GET /api/cache/', '/api/cache/', ''),
+    ('GET /api/profissionais/ (cache)', '/api/profissionais/', 'id_profissional=1'),
+)
+
+
+def requisitar(handler, caminho, query):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': caminho, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+    }
+    status = []
+    resposta = handler(environ, lambda codigo, headers, exc_info=None: status.append(codigo))
+    try:
+        b''.join(resposta)
+    finally:
+        resposta.close()
+    assert status[0].startswith('200'), f'{caminho}: {status[0]}'
+
+
+def trabalhador(modo, requisicoes):
+    """Roda dentro do processo filho, com DJANGO_SETTINGS_MODULE já definido."""
+    from django.core.wsgi import get_wsgi_application
+
+    handler = get_wsgi_application()
+    requisitar(handler, *CAMINHOS[0][1:])
+    if modo == 'boot':
+        return {
+            'boot_ms': (time.perf_counter() - INICIO) * 1000,
+            # ru_maxrss em KiB no Linux
+            'rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'modulos': len(sys.modules),
+        }
+
+    tempos = {}
+    for nome, caminho, query in CAMINHOS:
+        for _ in range(200):
+            requisitar(handler, caminho, query)
+        inicio = time.perf_counter()
+        for _ in range(requisicoes):
+            requisitar(handler, caminho, query)
+        tempos[nome] = (time.perf_counter() - inicio) / requisicoes * 1e6
+    return tempos
+
+
+def _ambiente(perfil, banco):
+    # Só o banco é o do benchmark. Os processos usam os .pyc, como os workers em produção
+    ambiente = {**os.environ, 'DJANGO_SETTINGS_MODULE': perfil, 'LACREI_SQLITE_PATH': banco}
+    ambiente.pop('PYTHONDONTWRITEBYTECODE', None)
+    return ambiente
+
+
+def rodar(perfil, modo, banco, requisicoes=0):
+    ambiente = _ambiente(perfil, banco)
+    saida = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_boot', '--trabalhador', modo, '--requisicoes', str(requisicoes)],
+        env=ambiente, check=True, capture_output=True, text=True,
+    )
+    return json.loads(saida.stdout)
+
+
+def preparar(banco, perfil):
+    codigo = (
+        'import django; django.setup()\n'
+        'from django.core.management import call_command\n'
+        'call_command("migrate", verbosity=0)\n'
+        'from api_lacrei.models import Profissional\n'
+        'Profissional.objects.create(id_profissional=1, nome_completo="Profissional 1", profissao="Pediatra", endereco="Rua 1")\n'
+    )
+    subprocess.run([sys.executable, '-c', codigo], env=_ambiente(perfil, banco), check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--perfis', nargs='+', default=['api_root.settings_producao', 'api_root.settings_api'])
+    parser.add_argument('--processos', type=int, default=10, help='Processos medidos no boot de cada perfil')
+    parser.add_argument('--requisicoes', type=int, default=5000)
+    parser.add_argument('--trabalhador', choices=('boot', 'requisicoes'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trabalhador:
+        print(json.dumps(trabalhador(args.trabalhador, args.requisicoes)))
+        return
+
+    banco = os.path.join(tempfile.mkdtemp(prefix='lacrei-bench-'), 'bench.sqlite3')
+    preparar(banco, args.perfis[0])
+    for perfil in args.perfis:
+        rodar(perfil, 'boot', banco)  # Aquecimento do cache de arquivos do sistema
+        boots = [rodar(perfil, 'boot', banco) for _ in range(args.processos)]
+        requisicoes = rodar(perfil, 'requisicoes', banco, args.requisicoes)
+        print(perfil)
+        print(f'  {"boot até o primeiro GET":<34} {statistics.median(b["boot_ms"] for b in boots):8.1f} ms')
+        print(f'  {"memória depois do boot":<34} {statistics.median(b["rss_mib"] for b in boots):8.1f} MiB')
+        print(f'  {"módulos carregados":<34} {boots[0]["modulos"]:8d}')
+        for nome, microssegundos in requisicoes.items():
+            print(f'  {nome:<34} {microssegundos:8.1f} µs/requisição')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark da busca textual de profissionais (FTS5) em 1 milhão de profissionais gerados
+por `gerar_dados`: termos frequentes e raros, prefixos curtos (busca enquanto digita),
+termos sem acento e filtro por profissão. Como referência, a mesma busca rara com
+`icontains` (LIKE '%termo%'), que percorre a tabela inteira.
+
+    python -m benchmarks.bench_busca [--profissionais 1000000] [--db /tmp/busca.sqlite3]
+
+Com `--db` apontando para um banco já gerado, a carga é pulada.
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import imprimir, medir, setup_django
+
+BUSCAS = [
+    ('termo frequente ("silva")', 'silva ', None),
+    ('nome e sobrenome ("maria araujo")', 'maria araujo ', None),
+    ('prefixo de 2 letras ("ma")', 'ma', None),
+    ('digitando ("joao sil")', 'joao sil', None),
+    ('sem acento ("conceicao")', 'conceicao ', None),
+    ('termos raros ("icaro falcao brandao")', 'icaro falcao brandao ', None),
+    ('prefixo + profissão ("fab", Pediatra)', 'fab', 'Pediatra'),
+    ('endereço ("paulista sao paulo")', 'paulista sao paulo ', None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=1_000_000)
+    parser.add_argument('--db', help='Banco SQLite (reaproveitado se já existir)')
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    existente = args.db is not None and os.path.exists(args.db)
+    db_path = setup_django(args.db)
+    from django.db import connection
+    from api_lacrei.busca import _buscar_sem_indice, buscar_profissionais, expressao_fts
+    from api_lacrei.models import Profissional
+
+    if not existente:
+        from benchmarks.gerar_dados import gerar
+        inicio = time.perf_counter()
+        gerar(profissionais=args.profissionais, contatos=0, consultas=0)
+        print(f'Carga com índice FTS5: {time.perf_counter() - inicio:.1f}s')
+
+    total = Profissional.objects.count()
+    print(f'Banco: {db_path} ({total:,} profissionais)\n')
+
+    for nome, texto, profissao in BUSCAS:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM api_lacrei_profissional_fts WHERE api_lacrei_profissional_fts MATCH %s', [expressao_fts(texto)])
+            encontrados = cursor.fetchone()[0]
+        resultado = medir(lambda: buscar_profissionais(texto, profissao, 20), repeticoes=args.repeticoes)
+        imprimir(f'{nome} [{encontrados:,}]', resultado)
+
+    resultado = medir(lambda: _buscar_sem_indice('Ícaro Falcão Brandão', None, 20), repeticoes=max(3, args.repeticoes // 10), aquecimento=1)
+    imprimir('referência: icontains, termos raros', resultado)
+
+
+if __name__ == '__main__':
+    main()
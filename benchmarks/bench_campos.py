@@ -0,0 +1,78 @@
+"""
+Benchmark das leituras por ids e dos campos esparsos, pela API (django.test.Client, sem
+cache): 200 profissionais lidos com 200 GETs por id_profissional contra um GET com
+?ids=, com e sem ?fields=nome_completo, e uma página de 1000 consultas com todos os
+campos contra ?fields=data_consulta. Mostra o tempo e o tamanho de cada resposta.
+
+    python -m benchmarks.bench_campos [--profissionais 200] [--repeticoes 10]
+"""
+import argparse
+import datetime
+
+from benchmarks.common import medir, setup_django
+
+
+def popular(profissionais):
+    from django.utils import timezone
+    from api_lacrei.models import Consulta, Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(
+            id_profissional=i, nome_completo=f'Profissional {i}', nome_social=f'Prof. {i}', profissao='Pediatra',
+            endereco=f'Rua {i}, {i * 7} - Bairro {i % 30}, São Paulo - SP', latitude=-23.5, longitude=-46.6,
+        )
+        for i in range(1, profissionais + 1)
+    )
+    inicio = timezone.now() + datetime.timedelta(days=2)
+    Consulta.objects.bulk_create(
+        (Consulta(profissional_id=1, data_consulta=inicio + datetime.timedelta(hours=i)) for i in range(1000)),
+        batch_size=1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=200)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django(
+        DEBUG=False, ALLOWED_HOSTS=['testserver'], LACREI_QUERY_BUDGET_STRICT=False,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    )
+    from django.test import Client
+
+    popular(args.profissionais)
+    client = Client()
+    ids = ','.join(str(i) for i in range(1, args.profissionais + 1))
+    agora = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def um_por_um(campos=None):
+        tamanho = 0
+        for i in range(1, args.profissionais + 1):
+            params = {'id_profissional': i, **({'fields': campos} if campos else {})}
+            tamanho += len(client.get('/api/profissionais/', params).content)
+        return tamanho
+
+    def por_ids(campos=None):
+        return len(client.get('/api/profissionais/', {'ids': ids, **({'fields': campos} if campos else {})}).content)
+
+    def pagina(campos=None):
+        params = {'id_profissional': 1, 'limit': 1000, 'from': agora, **({'fields': campos} if campos else {})}
+        return len(client.get('/api/consultas/', params).content)
+
+    for nome, funcao, campos in (
+        (f'{args.profissionais} GETs por id', um_por_um, None),
+        (f'{args.profissionais} GETs por id, fields', um_por_um, 'nome_completo'),
+        (f'GET ?ids= ({args.profissionais} ids)', por_ids, None),
+        (f'GET ?ids= ({args.profissionais} ids), fields', por_ids, 'nome_completo'),
+        ('1000 consultas', pagina, None),
+        ('1000 consultas, fields', pagina, 'data_consulta'),
+    ):
+        tamanho = funcao(campos)
+        resultado = medir(lambda: funcao(campos), repeticoes=args.repeticoes, aquecimento=1)
+        print(f'{nome:<36} {resultado["mediana_ms"]:9.2f} ms  {tamanho:>9,} bytes')
+
+
+if __name__ == '__main__':
+    main()
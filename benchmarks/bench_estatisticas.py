@@ -0,0 +1,120 @@
+"""
+Benchmark das estatísticas de consultas (por padrão 200 profissionais com 8 consultas por
+dia útil durante 2 anos). Compara, para um mês e um ano por profissão e semana: a
+agregação no cliente (todas as consultas do período lidas e somadas em Python), o GROUP
+BY sobre as consultas e a soma do resumo diário (`agregar`). Mede também quanto os
+gatilhos do resumo somam a uma carga por `bulk_create` e o tempo de `reconstruir`.
+
+    python -m benchmarks.bench_estatisticas [--profissionais 200] [--anos 2] [--por-dia 8]
+"""
+import argparse
+import datetime
+import time
+from collections import Counter
+
+from benchmarks.common import medir, setup_django
+
+INICIO = datetime.date(2023, 1, 2)
+GATILHOS = ('api_lacrei_consulta_resumo_ai', 'api_lacrei_consulta_resumo_au', 'api_lacrei_consulta_resumo_ad')
+
+
+def consultas(profissionais, anos, por_dia):
+    from django.utils import timezone
+    from api_lacrei.models import Consulta
+
+    for dia in range(365 * anos):
+        data = INICIO + datetime.timedelta(days=dia)
+        if data.weekday() >= 5:
+            continue
+        base = timezone.make_aware(datetime.datetime.combine(data, datetime.time(8)), datetime.timezone.utc)
+        for i in range(1, profissionais + 1):
+            for slot in range(por_dia):
+                yield Consulta(profissional_id=i, data_consulta=base + datetime.timedelta(minutes=45 * slot))
+
+
+def popular(profissionais):
+    from api_lacrei.models import Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao=('Pediatra', 'Psicóloga', 'Dentista')[i % 3],
+                     endereco=f'Rua {i}')
+        for i in range(1, profissionais + 1)
+    )
+
+
+def carga(linhas):
+    """Tempo do bulk_create (s) de `linhas`, com os gatilhos do resumo ativos."""
+    from api_lacrei.models import Consulta
+
+    inicio = time.perf_counter()
+    Consulta.objects.bulk_create(linhas, batch_size=5000)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=200)
+    parser.add_argument('--anos', type=int, default=2)
+    parser.add_argument('--por-dia', type=int, default=8)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.db.models import Count
+    from django.db.models.functions import TruncWeek
+    from api_lacrei.estatisticas import agregar, reconstruir
+    from api_lacrei.models import Consulta, ResumoDiario
+
+    popular(args.profissionais)
+    linhas = list(consultas(args.profissionais, args.anos, args.por_dia))
+    amostra = len(linhas) // 10
+
+    # Carga de 10% das consultas sem os gatilhos (guardados e recriados) e o restante com eles
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", GATILHOS)
+        gatilhos = cursor.fetchall()
+        for nome, _ in gatilhos:
+            cursor.execute(f'DROP TRIGGER {nome}')
+    sem_gatilhos = carga(linhas[:amostra])
+    Consulta.objects.all().delete()
+    with connection.cursor() as cursor:
+        for _, sql in gatilhos:
+            cursor.execute(sql)
+    com_gatilhos = carga(linhas[:amostra])
+    carga(linhas[amostra:])
+    print(f'{len(linhas):,} consultas, {ResumoDiario.objects.count():,} linhas no resumo diário')
+    print(f'bulk_create de {amostra:,} consultas: {sem_gatilhos:.2f}s sem os gatilhos, {com_gatilhos:.2f}s com '
+          f'(+{com_gatilhos / sem_gatilhos - 1:.0%})')
+    inicio = time.perf_counter()
+    reconstruir()
+    print(f'reconstruir: {time.perf_counter() - inicio:.2f}s\n')
+
+    for dias in (30, 365):
+        fim = INICIO + datetime.timedelta(days=dias - 1)
+        comeco = datetime.datetime.combine(INICIO, datetime.time(), datetime.timezone.utc)
+        periodo = Consulta.objects.filter(data_consulta__gte=comeco, data_consulta__lt=comeco + datetime.timedelta(days=dias))
+
+        def no_cliente():
+            # O que o painel faz hoje: lê todas as consultas do período e soma
+            contagem = Counter()
+            profissoes = dict(Consulta.profissional.field.related_model.objects.values_list('id_profissional', 'profissao'))
+            for profissional_id, data in periodo.values_list('profissional_id', 'data_consulta').iterator(chunk_size=5000):
+                contagem[profissoes[profissional_id], data.date() - datetime.timedelta(days=data.weekday())] += 1
+            return contagem
+
+        def group_by():
+            return list(periodo.values_list('profissional__profissao', TruncWeek('data_consulta')).annotate(total=Count('pk')).order_by())
+
+        def resumo():
+            return agregar(INICIO, fim, periodo='semana', agrupar='profissao')
+
+        total = sum(item['count'] for item in resumo())
+        assert total == periodo.count() == sum(no_cliente().values()), 'contagens diferentes'
+        print(f'{dias} dias por profissão e semana ({total:,} consultas)')
+        for nome, funcao in (('agregação no cliente', no_cliente), ('GROUP BY nas consultas', group_by), ('resumo diário', resumo)):
+            print(f'  {nome:<24} {medir(funcao, repeticoes=args.repeticoes, aquecimento=1)["mediana_ms"]:10.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
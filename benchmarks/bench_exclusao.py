@@ -0,0 +1,121 @@
+"""
+Benchmark da exclusão de um profissional com muitas consultas (por padrão 100 mil e 500
+contatos), em um banco com outros 1.000 profissionais. Compara o `delete()` do Django
+(sem e com um receptor de post_delete em Consulta, que obriga o coletor a carregar as
+linhas), o DELETE definitivo por tabela, a exclusão lógica e o expurgo em lotes. O que
+importa para as demais requisições é quanto tempo cada transação segura o lock de
+escrita do banco.
+
+    python -m benchmarks.bench_exclusao [--consultas 100000] [--lote 1000]
+"""
+import argparse
+import datetime
+import time
+
+from benchmarks.common import setup_django
+
+INICIO = datetime.datetime(2020, 1, 1, 8)
+ID_EXCLUIDO = 1
+
+
+def _datas(quantidade):
+    # Uma consulta de 30 minutos por slot, sem sobreposição
+    for indice in range(quantidade):
+        inicio = INICIO + datetime.timedelta(minutes=30 * indice)
+        yield inicio.isoformat(' '), (inicio + datetime.timedelta(minutes=30)).isoformat(' ')
+
+
+def popular_fundo(profissionais, consultas_por_profissional):
+    from django.db import connection, transaction
+    from api_lacrei.models import Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao='Pediatra', endereco=f'Rua {i}')
+        for i in range(2, profissionais + 2)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO api_lacrei_consulta (profissional_id, data_consulta, duracao, data_fim) VALUES (%s, %s, 30, %s)',
+            [(i, inicio, fim) for i in range(2, profissionais + 2) for inicio, fim in _datas(consultas_por_profissional)],
+        )
+
+
+def popular_excluido(consultas, contatos):
+    from django.db import connection, transaction
+    from api_lacrei.models import Profissional
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        Profissional.objects.create(id_profissional=ID_EXCLUIDO, nome_completo='Dra. Ana Lima', profissao='Pediatra', endereco='Rua 1')
+        cursor.executemany(
+            'INSERT INTO api_lacrei_consulta (profissional_id, data_consulta, duracao, data_fim) VALUES (%s, %s, 30, %s)',
+            [(ID_EXCLUIDO, inicio, fim) for inicio, fim in _datas(consultas)],
+        )
+        cursor.executemany(
+            'INSERT INTO api_lacrei_contato (profissional_id, tipo, contato) VALUES (%s, %s, %s)',
+            [(ID_EXCLUIDO, 'email', f'ana{i}@exemplo.com') for i in range(contatos)],
+        )
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--consultas', type=int, default=100_000)
+    parser.add_argument('--contatos', type=int, default=500)
+    parser.add_argument('--lote', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import transaction
+    from django.db.models.signals import post_delete
+    from api_lacrei.exclusao import excluir_definitivamente, excluir_profissional, expurgar
+    from api_lacrei.models import Profissional, Consulta
+
+    popular_fundo(1000, 50)
+    print(f'{args.consultas:,} consultas e {args.contatos} contatos no profissional excluído\n')
+
+    def coletor():
+        with transaction.atomic():
+            Profissional.objects.get(id_profissional=ID_EXCLUIDO).delete()
+
+    def receptor(sender, **kwargs):
+        pass
+
+    def coletor_com_receptor():
+        post_delete.connect(receptor, sender=Consulta)
+        try:
+            coletor()
+        finally:
+            post_delete.disconnect(receptor, sender=Consulta)
+
+    cenarios = [
+        ('delete() do Django', coletor),
+        ('delete() com post_delete em Consulta', coletor_com_receptor),
+        ('DELETE definitivo por tabela', lambda: excluir_definitivamente([ID_EXCLUIDO])),
+    ]
+    for nome, funcao in cenarios:
+        popular_excluido(args.consultas, args.contatos)
+        print(f'{nome:<45} {cronometrar(funcao):10.1f} ms em uma transação')
+
+    popular_excluido(args.consultas, args.contatos)
+    print(f'{"exclusão lógica":<45} {cronometrar(lambda: excluir_profissional(ID_EXCLUIDO)):10.1f} ms em uma transação')
+
+    transacoes = []
+    inicio = time.perf_counter()
+    lotes = expurgar(args.lote)
+    while True:
+        antes = time.perf_counter()
+        if next(lotes, None) is None:
+            break
+        transacoes.append((time.perf_counter() - antes) * 1000)
+    total = (time.perf_counter() - inicio) * 1000
+    print(f'{f"expurgo (lotes de {args.lote})":<45} {total:10.1f} ms em {len(transacoes)} transações de até {max(transacoes):.1f} ms')
+    assert not Consulta.objects.filter(profissional_id=ID_EXCLUIDO).exists()
+
+
+if __name__ == '__main__':
+    main()
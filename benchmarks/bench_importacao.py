@@ -0,0 +1,105 @@
+"""
+Benchmark da importação de arquivos (por padrão 500 profissionais e 50 mil consultas em
+NDJSON, 1% delas recusadas). Compara a importação registro a registro (um serializer e
+um save por consulta, cada um na sua transação) com `importar` em blocos de tamanhos
+diferentes. No fim, mostra o pico de memória do processo.
+
+    python -m benchmarks.bench_importacao [--profissionais 500] [--consultas 50000]
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.common import setup_django
+
+INICIO = datetime.datetime(2024, 1, 1, 8, tzinfo=datetime.timezone.utc)
+
+
+def gerar(diretorio, profissionais, consultas):
+    """Escreve profissionais.csv e consultas.ndjson (e a versão .gz). Retorna os caminhos."""
+    caminho_profissionais = os.path.join(diretorio, 'profissionais.csv')
+    with open(caminho_profissionais, 'w', encoding='utf-8') as arquivo:
+        arquivo.write('id_profissional,nome_completo,profissao,endereco\n')
+        for i in range(1, profissionais + 1):
+            arquivo.write(f'{i},Profissional {i},{("Pediatra", "Psicóloga", "Dentista")[i % 3]},Rua {i}\n')
+
+    caminho_consultas = os.path.join(diretorio, 'consultas.ndjson')
+    with open(caminho_consultas, 'w', encoding='utf-8') as arquivo:
+        for n in range(consultas):
+            # Cada profissional recebe uma consulta por hora; 1% aponta para um profissional inexistente
+            profissional = profissionais + 1 if n % 100 == 99 else n % profissionais + 1
+            data = INICIO + datetime.timedelta(hours=n // profissionais)
+            arquivo.write(json.dumps({'profissional': profissional, 'data_consulta': data.isoformat()}) + '\n')
+    with open(caminho_consultas, 'rb') as origem, gzip.open(caminho_consultas + '.gz', 'wb') as destino:
+        destino.write(origem.read())
+    return caminho_profissionais, caminho_consultas
+
+
+def limpar():
+    from api_lacrei.models import Consulta
+
+    Consulta.objects.all()._raw_delete('default')
+
+
+def registro_a_registro(caminho, limite):
+    """Como um script de carga faria sem o lote: valida e grava cada consulta isoladamente."""
+    from api_lacrei.serializers import ConsultaSerializer
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        for n, linha in enumerate(arquivo):
+            if n == limite:
+                return n
+            serializer = ConsultaSerializer(data=json.loads(linha))
+            if serializer.is_valid():
+                serializer.save()
+    return n + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=500)
+    parser.add_argument('--consultas', type=int, default=50_000)
+    parser.add_argument('--amostra', type=int, default=2000, help='Consultas da importação registro a registro')
+    args = parser.parse_args()
+
+    setup_django()
+    from api_lacrei.importacao import importar
+
+    diretorio = tempfile.mkdtemp(prefix='lacrei-importacao-')
+    caminho_profissionais, caminho_consultas = gerar(diretorio, args.profissionais, args.consultas)
+    for _ in importar('profissionais', caminho_profissionais):
+        pass
+
+    inicio = time.perf_counter()
+    lidas = registro_a_registro(caminho_consultas, args.amostra)
+    segundos = time.perf_counter() - inicio
+    print(f'{"registro a registro":<28} {lidas / segundos:10,.0f} registros/s  ({lidas:,} consultas)')
+    limpar()
+
+    for nome, caminho, lote in (
+        ('importar, lote 500', caminho_consultas, 500),
+        ('importar, lote 2000', caminho_consultas, 2000),
+        ('importar, lote 5000', caminho_consultas, 5000),
+        ('importar, lote 2000, .gz', caminho_consultas + '.gz', 2000),
+    ):
+        inicio = time.perf_counter()
+        for progresso in importar('consultas', caminho, lote=lote):
+            pass
+        segundos = time.perf_counter() - inicio
+        print(
+            f'{nome:<28} {progresso.registros / segundos:10,.0f} registros/s  '
+            f'({progresso.importados:,} gravadas, {progresso.rejeitados:,} rejeitadas)'
+        )
+        os.remove(f'{caminho}.rejeitados.ndjson')
+        limpar()
+    # ru_maxrss em KiB no Linux
+    print(f'pico de memória do processo: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB')
+
+
+if __name__ == '__main__':
+    main()
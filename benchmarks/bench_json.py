@@ -0,0 +1,69 @@
+"""
+Benchmark da resposta de uma lista de consultas em vários tamanhos: tempo de
+renderização do JSON (JSONRenderer do DRF contra o do api_lacrei, com o orjson) e bytes
+enviados sem compressão, com gzip e com brotli (se instalado), com o tempo de cada
+compressão. As duas renderizações são conferidas byte a byte.
+
+    python -m benchmarks.bench_json [--linhas 10 100 1000 10000] [--repeticoes 20]
+"""
+import argparse
+import datetime
+
+from benchmarks.common import medir, setup_django
+
+
+def popular(total):
+    from django.utils import timezone
+    from api_lacrei.models import Profissional, Consulta
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao='Pediatra', endereco=f'Rua {i}')
+        for i in range(1, 101)
+    )
+    inicio = timezone.make_aware(datetime.datetime(2024, 1, 1))
+    Consulta.objects.bulk_create(
+        (Consulta(profissional_id=1 + i % 100, data_consulta=inicio + datetime.timedelta(minutes=30 * i)) for i in range(total)),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10, 100, 1000, 10_000])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework import renderers
+    from api_lacrei import compressao
+    from api_lacrei.models import Consulta
+    from api_lacrei.renderers import JSONRenderer, json_rapido_disponivel
+    from api_lacrei.serializers import CONSULTA_LEVE
+
+    if not json_rapido_disponivel():
+        print('orjson não instalado: o renderer do api_lacrei usa o do DRF\n')
+    codificacoes = ['gzip'] + (['br'] if compressao.brotli is not None else [])
+    drf, rapido = renderers.JSONRenderer(), JSONRenderer()
+
+    popular(max(args.linhas))
+    for total in args.linhas:
+        queryset = Consulta.objects.order_by('data_consulta', 'id_consulta')[:total]
+        # A mesma representação da listagem de consultas (SerializerLeve)
+        dados = CONSULTA_LEVE.representar(CONSULTA_LEVE.linhas(queryset))
+        conteudo = rapido.render(dados)
+        assert conteudo == drf.render(dados), 'saídas diferentes'
+
+        print(f'{total} consultas: {len(conteudo):,} bytes sem compressão')
+        tempos = {}
+        for nome, renderer in (('JSONRenderer do DRF', drf), ('JSONRenderer com orjson', rapido)):
+            tempos[nome] = medir(lambda: renderer.render(dados), repeticoes=args.repeticoes)['mediana_ms']
+            print(f'  {nome:<26} {tempos[nome]:9.3f} ms')
+        print(f"  ganho na renderização: {tempos['JSONRenderer do DRF'] / tempos['JSONRenderer com orjson']:.1f}x")
+        for codificacao in codificacoes:
+            comprimido = compressao.comprimir(conteudo, codificacao)
+            tempo = medir(lambda: compressao.comprimir(conteudo, codificacao), repeticoes=args.repeticoes)['mediana_ms']
+            print(f'  {codificacao:<26} {len(comprimido):>11,} bytes ({len(comprimido) / len(conteudo):6.1%}) em {tempo:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark da busca por proximidade em 1 milhão de profissionais gerados por
+`gerar_dados` (90% com localização, espalhados em torno de 15 capitais): k mais
+próximos e raio, com e sem profissão. Como referência, o cálculo da distância para
+todos os profissionais da profissão, que é o que a busca evita.
+
+    python -m benchmarks.bench_proximos [--profissionais 1000000] [--db /tmp/proximos.sqlite3]
+
+Com `--db` apontando para um banco já gerado, a carga é pulada.
+"""
+import argparse
+import heapq
+import os
+
+from benchmarks.common import imprimir, medir, setup_django
+
+SAO_PAULO = (-23.55, -46.63)
+INTERIOR = (-18.92, -48.28)  # Uberlândia: a ~200 km da capital gerada mais próxima
+
+BUSCAS = [
+    ('20 mais próximos, Pediatra, São Paulo', SAO_PAULO, 'Pediatra', None),
+    ('20 mais próximos, todas, São Paulo', SAO_PAULO, None, None),
+    ('raio 2 km, Pediatra, São Paulo', SAO_PAULO, 'Pediatra', 2.0),
+    ('raio 10 km, Pediatra, São Paulo', SAO_PAULO, 'Pediatra', 10.0),
+    ('20 mais próximos, Pediatra, interior', INTERIOR, 'Pediatra', None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profissionais', type=int, default=1_000_000)
+    parser.add_argument('--db', help='Banco SQLite (reaproveitado se já existir)')
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    existente = args.db is not None and os.path.exists(args.db)
+    db_path = setup_django(args.db)
+    from django.db import connection
+    from api_lacrei.geohash import distancia_km
+    from api_lacrei.models import Profissional
+    from api_lacrei.proximidade import buscar_proximos
+
+    if not existente:
+        from benchmarks.gerar_dados import gerar
+        gerar(profissionais=args.profissionais, contatos=0, consultas=0)
+    print(f'Banco: {db_path} ({Profissional.objects.count():,} profissionais)\n')
+
+    for nome, (latitude, longitude), profissao, raio in BUSCAS:
+        with connection.execute_wrapper(lambda execute, sql, *a: consultas.append(sql) or execute(sql, *a)):
+            consultas = []
+            resultados = buscar_proximos(latitude, longitude, profissao, raio, 20)
+        resultado = medir(lambda: buscar_proximos(latitude, longitude, profissao, raio, 20), repeticoes=args.repeticoes)
+        imprimir(f'{nome} [{len(resultados)} em {len(consultas)} consultas]', resultado)
+
+    def varredura():
+        linhas = Profissional.objects.filter(profissao='Pediatra', latitude__isnull=False).values_list('id_profissional', 'latitude', 'longitude')
+        return heapq.nsmallest(20, ((distancia_km(*SAO_PAULO, lat, lon), id_) for id_, lat, lon in linhas))
+
+    assert [id_ for _, id_ in varredura()] == [r['id_profissional'] for r in buscar_proximos(*SAO_PAULO, 'Pediatra')], 'resultados diferentes'
+    imprimir('referência: distância para todos os Pediatras', medir(varredura, repeticoes=5, aquecimento=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark da representação de listas: ConsultaSerializer(many=True) contra o
+SerializerLeve (values_list + conversores), em linhas por segundo. Os dois caminhos
+incluem a leitura do banco e a saída é conferida byte a byte.
+
+    python -m benchmarks.bench_serializers [--linhas 10000 100000] [--repeticoes 5]
+"""
+import argparse
+import datetime
+
+from benchmarks.common import medir, setup_django
+
+
+def popular(total):
+    from django.utils import timezone
+    from api_lacrei.models import Profissional, Consulta
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao='Pediatra', endereco=f'Rua {i}')
+        for i in range(1, 101)
+    )
+    inicio = timezone.make_aware(datetime.datetime(2024, 1, 1))
+    Consulta.objects.bulk_create(
+        (
+            Consulta(profissional_id=1 + i % 100, data_consulta=inicio + datetime.timedelta(minutes=30 * i, microseconds=i % 7))
+            for i in range(total)
+        ),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from api_lacrei.models import Consulta, Profissional
+    from api_lacrei.serializers import CONSULTA_LEVE, ConsultaSerializer
+
+    for total in args.linhas:
+        Profissional.objects.all().delete()
+        popular(total)
+        queryset = Consulta.objects.order_by('data_consulta', 'id_consulta')
+
+        def model_serializer():
+            return ConsultaSerializer(list(queryset), many=True).data
+
+        def leve():
+            return CONSULTA_LEVE.representar(CONSULTA_LEVE.linhas(queryset))
+
+        renderer = JSONRenderer()
+        assert renderer.render(model_serializer()) == renderer.render(leve()), 'saídas diferentes'
+
+        print(f'{total} linhas')
+        resultados = {}
+        for nome, funcao in (('ModelSerializer', model_serializer), ('SerializerLeve', leve)):
+            resultado = medir(funcao, repeticoes=args.repeticoes, aquecimento=1)
+            resultados[nome] = resultado['mediana_ms']
+            linhas_por_segundo = total / (resultado['mediana_ms'] / 1000)
+            print(f"  {nome:<18} mediana {resultado['mediana_ms']:9.1f} ms  {linhas_por_segundo:12,.0f} linhas/s")
+        print(f"  ganho: {resultados['ModelSerializer'] / resultados['SerializerLeve']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
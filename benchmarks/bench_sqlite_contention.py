@@ -0,0 +1,104 @@
+"""
+Concorrência de escrita no SQLite com vários processos: configuração padrão
+(api_root.settings) contra o perfil de produção (api_root.settings_producao).
+
+Cada processo repete a escrita de um contato como a view faz, em uma transação:
+lê o profissional, incrementa a versão e insere o contato. O resultado mostra
+escritas por segundo e a taxa de erros ("database is locked").
+
+    python -m benchmarks.bench_sqlite_contention [--processos 8] [--escritas 300]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.common import setup_django
+
+PERFIS = {
+    'padrão': 'api_root.settings',
+    'produção': 'api_root.settings_producao',
+}
+
+
+def preparar(settings_module, db_path, processos):
+    setup_django(db_path, settings_module)
+    from api_lacrei.models import Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(id_profissional=i, nome_completo=f'Profissional {i}', profissao='Pediatra', endereco=f'Rua {i}')
+        for i in range(1, processos + 1)
+    )
+
+
+def trabalhador(settings_module, db_path, numero, escritas, largada, fila):
+    setup_django(db_path, settings_module, migrar=False)
+    from django.db import OperationalError, transaction
+    from api_lacrei.models import Contato, Profissional
+    from api_lacrei.versioning import touch
+
+    erros = 0
+    largada.wait()
+    inicio = time.perf_counter()
+    for indice in range(escritas):
+        # Todos disputam os mesmos profissionais
+        id_profissional = 1 + indice % 4
+        try:
+            with transaction.atomic():
+                Profissional.objects.filter(id_profissional=id_profissional).values_list('versao').first()
+                touch(id_profissional)
+                Contato.objects.create(profissional_id=id_profissional, tipo='email', contato=f'p{numero}-{indice}@exemplo.com')
+        except OperationalError:
+            erros += 1
+    fila.put((escritas - erros, erros, time.perf_counter() - inicio))
+
+
+def rodar(perfil, processos, escritas):
+    settings_module = PERFIS[perfil]
+    db_path = os.path.join(tempfile.mkdtemp(prefix='lacrei-bench-'), 'contencao.sqlite3')
+
+    contexto = multiprocessing.get_context('spawn')
+    preparacao = contexto.Process(target=preparar, args=(settings_module, db_path, processos))
+    preparacao.start()
+    preparacao.join()
+
+    largada = contexto.Event()
+    fila = contexto.Queue()
+    workers = [
+        contexto.Process(target=trabalhador, args=(settings_module, db_path, numero, escritas, largada, fila))
+        for numero in range(processos)
+    ]
+    for worker in workers:
+        worker.start()
+    # Dá tempo para todos os processos inicializarem o Django antes da largada
+    time.sleep(3)
+    largada.set()
+    resultados = [fila.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    sucessos = sum(r[0] for r in resultados)
+    erros = sum(r[1] for r in resultados)
+    duracao = max(r[2] for r in resultados)
+    total = sucessos + erros
+    print(
+        f'{perfil:<10} {sucessos / duracao:10.0f} escritas/s   erros {erros:6d} / {total} '
+        f'({100 * erros / total:5.1f}%)   {duracao:6.2f}s'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processos', type=int, default=8)
+    parser.add_argument('--escritas', type=int, default=300)
+    parser.add_argument('--perfil', choices=sorted(PERFIS), action='append')
+    args = parser.parse_args()
+
+    print(f'{args.processos} processos x {args.escritas} escritas')
+    for perfil in args.perfil or list(PERFIS):
+        rodar(perfil, args.processos, args.escritas)
+
+
+if __name__ == '__main__':
+    main()
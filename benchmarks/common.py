@@ -0,0 +1,69 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks rodam a partir da raiz do projeto, por exemplo:
+
+    python -m benchmarks.bench_availability
+"""
+import os
+import statistics
+import tempfile
+import time
+
+
+def setup_django(db_path=None, settings_module='api_root.settings', migrar=True, **overrides):
+    """
+    Inicializa o Django apontando o banco `default` para um arquivo SQLite próprio do
+    benchmark (temporário, se `db_path` não for informado) e aplica as migrations
+    (`migrar=False` em processos que usam um banco já preparado).
+    `overrides` substitui settings antes do primeiro uso (ex.: CACHES).
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='lacrei-bench-'), 'bench.sqlite3')
+    # Ainda não existe conexão aberta: a alteração vale para todo o processo
+    settings.DATABASES['default']['NAME'] = db_path
+    for nome, valor in overrides.items():
+        setattr(settings, nome, valor)
+
+    if migrar:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+    return db_path
+
+
+def medir(funcao, repeticoes=20, aquecimento=2):
+    """Executa `funcao` várias vezes e retorna as estatísticas de tempo em milissegundos."""
+    for _ in range(aquecimento):
+        funcao()
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    tempos.sort()
+    return {
+        'repeticoes': repeticoes,
+        'min_ms': tempos[0],
+        'mediana_ms': statistics.median(tempos),
+        'p95_ms': percentil(tempos, 0.95),
+        'max_ms': tempos[-1],
+    }
+
+
+def percentil(tempos_ordenados, fracao):
+    return tempos_ordenados[min(len(tempos_ordenados) - 1, int(len(tempos_ordenados) * fracao))]
+
+
+def imprimir(nome, resultado):
+    print(
+        f"{nome:<50} mediana {resultado['mediana_ms']:8.2f} ms"
+        f"  p95 {resultado['p95_ms']:8.2f} ms  (n={resultado['repeticoes']})"
+    )
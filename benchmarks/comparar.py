@@ -0,0 +1,76 @@
+"""
+Compara dois resultados de benchmarks/bench_api.py e aponta regressões.
+
+    python -m benchmarks.comparar benchmarks/resultados/base.json benchmarks/resultados/novo.json [--tolerancia 0.25]
+
+Um cenário regride quando p50 ou p95 pioram mais que a tolerância (relativa), quando o
+req/s cai mais que ela ou quando passam a existir erros. O código de saída é 1 se
+houver alguma regressão, para uso em CI.
+"""
+import argparse
+import json
+import sys
+
+# Métricas comparadas: (nome, maior_e_pior)
+METRICAS = (('p50_ms', True), ('p95_ms', True), ('req_s', False))
+
+
+def carregar(caminho):
+    with open(caminho) as arquivo:
+        return json.load(arquivo)
+
+
+def comparar(base, novo, tolerancia=0.25):
+    """
+    Retorna uma linha por cenário presente nos dois resultados:
+    (cenario, {metrica: (antes, depois, variacao)}, regressoes).
+    """
+    anteriores = {(c['model'], c['method']): c for c in base['cenarios']}
+    linhas = []
+    for atual in novo['cenarios']:
+        chave = (atual['model'], atual['method'])
+        anterior = anteriores.get(chave)
+        if anterior is None:
+            continue
+        variacoes = {}
+        regressoes = []
+        for metrica, maior_e_pior in METRICAS:
+            antes, depois = anterior[metrica], atual[metrica]
+            variacao = (depois - antes) / antes if antes else 0.0
+            variacoes[metrica] = (antes, depois, variacao)
+            if (variacao > tolerancia) if maior_e_pior else (variacao < -tolerancia):
+                regressoes.append(metrica)
+        if atual['erros'] > anterior['erros']:
+            regressoes.append('erros')
+        linhas.append((f'{chave[0]} {chave[1]}', variacoes, regressoes))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('novo')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Variação relativa aceita (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    base, novo = carregar(args.base), carregar(args.novo)
+    for campo in ('modo', 'escala', 'concorrencia', 'cache'):
+        if base.get(campo) != novo.get(campo):
+            print(f'Aviso: {campo} diferente ({base.get(campo)} x {novo.get(campo)})')
+    print(f'base {base.get("commit")} ({base["data"]})  x  novo {novo.get("commit")} ({novo["data"]})')
+
+    linhas = comparar(base, novo, args.tolerancia)
+    print(f'{"cenário":<24}' + ''.join(f'{metrica:>26}' for metrica, _ in METRICAS))
+    for nome, variacoes, regressoes in linhas:
+        colunas = ''.join(
+            f'{antes:>9.2f} → {depois:>8.2f} {variacao:+6.0%}' for antes, depois, variacao in variacoes.values()
+        )
+        print(f'{nome:<24}{colunas}' + (f'   REGRESSÃO: {", ".join(regressoes)}' if regressoes else ''))
+
+    total = sum(1 for _, _, regressoes in linhas if regressoes)
+    print(f'{total} cenário(s) com regressão (tolerância {args.tolerancia:.0%})')
+    sys.exit(1 if total else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Gerador de dados sintéticos em volume realista: por padrão 100 mil profissionais,
+500 mil contatos e 5 milhões de consultas (`--escala` multiplica as três quantidades).
+
+    python -m benchmarks.gerar_dados --db /tmp/lacrei.sqlite3 [--escala 0.1]
+
+As linhas são inseridas com `executemany` direto nas tabelas, em transações grandes e
+com o journal/sync do SQLite desligados durante a carga, na ordem das chaves dos índices.
+Os dados são determinísticos: a mesma escala gera sempre o mesmo banco.
+"""
+import argparse
+import datetime
+import random
+import time
+from contextlib import nullcontext
+
+from benchmarks.common import setup_django
+
+PROFISSIONAIS = 100_000
+CONTATOS = 500_000
+CONSULTAS = 5_000_000
+
+PROFISSOES = ['Cardiologista', 'Dermatologista', 'Pediatra', 'Psicólogo', 'Ginecologista',
+              'Ortopedista', 'Neurologista', 'Endocrinologista', 'Psiquiatra', 'Clínico Geral']
+TIPOS_CONTATO = ['email', 'telefone', 'whatsapp', 'site', 'instagram']
+
+# Nomes e endereços em português (com acentos), combinados pelo id: o texto é variado o
+# bastante para a busca textual e continua determinístico
+NOMES = ['João', 'Maria', 'José', 'Ana', 'Antônio', 'Francisca', 'Luís', 'Adriana', 'Sérgio', 'Márcia',
+         'Paulo', 'Juliana', 'Lúcio', 'Fernanda', 'André', 'Patrícia', 'Fábio', 'Letícia', 'Rogério', 'Cecília',
+         'Marcos', 'Aline', 'Vinícius', 'Camila', 'Otávio', 'Bárbara', 'Caio', 'Mônica', 'Ícaro', 'Débora',
+         'Rafael', 'Beatriz', 'Tomás', 'Luana', 'Gustavo', 'Vitória', 'Joaquim', 'Lígia', 'Inácio', 'Flávia']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Araújo', 'Pereira', 'Lima', 'Carvalho', 'Ribeiro', 'Gonçalves',
+              'Almeida', 'Conceição', 'Fernandes', 'Gomes', 'Martins', 'Rocha', 'Barbosa', 'Simões', 'Magalhães', 'Brandão',
+              'Nogueira', 'Assunção', 'Moreira', 'Cardoso', 'Teixeira', 'Cavalcanti', 'Peixoto', 'Falcão', 'Romão', 'Damásio',
+              'Mendonça', 'Bragança', 'Guimarães', 'Fagundes', 'Paixão', 'Galvão', 'Sampaio', 'Leão', 'Aragão', 'Medeiros']
+LOGRADOUROS = ['Rua das Acácias', 'Avenida Paulista', 'Rua São João', 'Travessa da Conceição', 'Avenida Brasil',
+               'Rua Tiradentes', 'Alameda Santos', 'Rua Dom Pedro II', 'Avenida Atlântica', 'Rua da Consolação',
+               'Praça da Sé', 'Rua Augusta', 'Avenida Getúlio Vargas', 'Rua XV de Novembro', 'Rua do Catete']
+# Cidade e coordenadas do centro; a localização de cada profissional é espalhada em torno dele
+CIDADES = [('São Paulo', -23.55, -46.63), ('Rio de Janeiro', -22.91, -43.17), ('Belo Horizonte', -19.92, -43.94),
+           ('Salvador', -12.97, -38.50), ('Recife', -8.05, -34.88), ('Fortaleza', -3.73, -38.52), ('Curitiba', -25.43, -49.27),
+           ('Porto Alegre', -30.03, -51.23), ('Belém', -1.46, -48.50), ('Goiânia', -16.68, -49.25), ('Manaus', -3.12, -60.02),
+           ('Florianópolis', -27.60, -48.55), ('Vitória', -20.32, -40.34), ('São Luís', -2.53, -44.30), ('Maceió', -9.67, -35.74)]
+
+# Um a cada N profissionais não informou a localização
+SEM_LOCALIZACAO_A_CADA = 10
+
+# Consultas começam aqui, em slots de 30 minutos das 8h às 18h
+INICIO_CONSULTAS = datetime.datetime(2024, 1, 1, 8)
+SLOTS_POR_DIA = 20
+
+# Um a cada N profissionais tem horários de atendimento cadastrados (segunda a sexta)
+HORARIOS_A_CADA = 10
+
+
+def _inserir(cursor, tabela, colunas, linhas, lote):
+    sql = f'INSERT INTO "{tabela}" ({", ".join(colunas)}) VALUES ({", ".join("?" * len(colunas))})'
+    bloco = []
+    total = 0
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= lote:
+            cursor.executemany(sql, bloco)
+            total += len(bloco)
+            bloco = []
+    if bloco:
+        cursor.executemany(sql, bloco)
+        total += len(bloco)
+    return total
+
+
+def _profissionais(total, agora, aleatorio):
+    from api_lacrei.geohash import codificar
+
+    for i in range(1, total + 1):
+        nome = NOMES[i % len(NOMES)]
+        sobrenomes = f'{SOBRENOMES[i // len(NOMES) % len(SOBRENOMES)]} {SOBRENOMES[i // 7 % len(SOBRENOMES)]}'
+        nome_social = NOMES[i * 7 % len(NOMES)] if i % 3 == 0 else ''
+        cidade, latitude, longitude = CIDADES[i // 11 % len(CIDADES)]
+        endereco = f'{LOGRADOUROS[i % len(LOGRADOUROS)]}, {i % 5000}, {cidade}'
+        if i % SEM_LOCALIZACAO_A_CADA == 0:
+            latitude = longitude = celula = None
+        else:
+            # ~10 km de desvio padrão em torno do centro da cidade
+            latitude, longitude = latitude + aleatorio.gauss(0, 0.09), longitude + aleatorio.gauss(0, 0.09)
+            celula = codificar(latitude, longitude)
+        yield (i, f'{nome} {sobrenomes}', nome_social, PROFISSOES[i % len(PROFISSOES)], endereco, 1, agora, latitude, longitude, celula)
+
+
+def _contatos(total, total_profissionais):
+    # Distribui os contatos em ordem de profissional, como o índice (profissional, contato)
+    por_profissional, resto = divmod(total, total_profissionais)
+    id_contato = 0
+    for id_profissional in range(1, total_profissionais + 1):
+        for j in range(por_profissional + (1 if id_profissional <= resto else 0)):
+            id_contato += 1
+            tipo = TIPOS_CONTATO[j % len(TIPOS_CONTATO)]
+            yield (id_contato, id_profissional, tipo, f'{tipo}{j}.p{id_profissional}@exemplo.com')
+
+
+def _consultas(total, total_profissionais, aleatorio):
+    por_profissional, resto = divmod(total, total_profissionais)
+    id_consulta = 0
+    for id_profissional in range(1, total_profissionais + 1):
+        quantidade = por_profissional + (1 if id_profissional <= resto else 0)
+        # Horários distintos por profissional, espalhados ao longo de ~2 anos
+        slots = sorted(aleatorio.sample(range(730 * SLOTS_POR_DIA), quantidade))
+        for slot in slots:
+            dia, posicao = divmod(slot, SLOTS_POR_DIA)
+            data = INICIO_CONSULTAS + datetime.timedelta(days=dia, minutes=30 * posicao)
+            id_consulta += 1
+            # Slots de 30 minutos: as consultas geradas nunca se sobrepõem
+            yield (id_consulta, id_profissional, data.isoformat(' '), 30, (data + datetime.timedelta(minutes=30)).isoformat(' '))
+
+
+def _horarios(total_profissionais):
+    id_horario = 0
+    for id_profissional in range(1, total_profissionais + 1, HORARIOS_A_CADA):
+        for dia in range(5):
+            id_horario += 1
+            yield (id_horario, id_profissional, dia, '08:00:00', '18:00:00')
+
+
+def gerar(profissionais=PROFISSIONAIS, contatos=CONTATOS, consultas=CONSULTAS, lote=50_000, semente=42, verbose=True):
+    """Preenche as tabelas (vazias) do banco `default`. Retorna a contagem de linhas por tabela."""
+    from django.db import connection, transaction
+    from api_lacrei.alteracoes import registro_suspenso
+    from api_lacrei.busca import indice_suspenso
+    from api_lacrei.models import Profissional, Contato, Consulta, HorarioAtendimento
+
+    aleatorio = random.Random(semente)
+    agora = datetime.datetime(2024, 1, 1).isoformat(' ')
+    tabelas = [
+        (Profissional, ('id_profissional', 'nome_completo', 'nome_social', 'profissao', 'endereco', 'versao', 'atualizado_em',
+                        'latitude', 'longitude', 'geohash'),
+         _profissionais(profissionais, agora, aleatorio)),
+        (Contato, ('id_contato', 'profissional_id', 'tipo', 'contato'), _contatos(contatos, profissionais)),
+        (Consulta, ('id_consulta', 'profissional_id', 'data_consulta', 'duracao', 'data_fim'), _consultas(consultas, profissionais, aleatorio)),
+        (HorarioAtendimento, ('id_horario', 'profissional_id', 'dia_semana', 'hora_inicio', 'hora_fim'), _horarios(profissionais)),
+    ]
+
+    connection.ensure_connection()
+    bruta = connection.connection
+    # Carga em massa: sem journal nem fsync (o arquivo é descartável se a carga falhar).
+    # Dentro de uma transação externa (ex.: testes) os PRAGMAs não podem mudar.
+    carga_rapida = not connection.in_atomic_block
+    if carga_rapida:
+        bruta.execute('PRAGMA synchronous = OFF')
+        journal_anterior = bruta.execute('PRAGMA journal_mode').fetchone()[0]
+        bruta.execute('PRAGMA journal_mode = OFF')
+
+    contagem = {}
+    try:
+        for model, colunas, linhas in tabelas:
+            inicio = time.perf_counter()
+            # Profissionais: o índice de busca é reconstruído de uma vez no fim da carga.
+            # Dados sintéticos não entram no feed de alterações: quem sincroniza parte da exportação
+            with transaction.atomic(), registro_suspenso(), (indice_suspenso() if model is Profissional else nullcontext()):
+                with connection.cursor() as cursor:
+                    total = _inserir(cursor, model._meta.db_table, colunas, linhas, lote)
+            segundos = time.perf_counter() - inicio
+            contagem[model.__name__] = total
+            if verbose:
+                print(f'{model.__name__:<20} {total:>10,} linhas em {segundos:6.1f}s ({total / max(segundos, 1e-9):,.0f}/s)')
+    finally:
+        if carga_rapida:
+            bruta.execute(f'PRAGMA journal_mode = {journal_anterior}')
+            bruta.execute('PRAGMA synchronous = FULL')
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='Arquivo SQLite de destino (temporário se omitido)')
+    parser.add_argument('--escala', type=float, default=1.0, help='Multiplica as quantidades padrão')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    db_path = setup_django(args.db)
+    gerar(
+        profissionais=max(1, int(PROFISSIONAIS * args.escala)),
+        contatos=int(CONTATOS * args.escala),
+        consultas=int(CONSULTAS * args.escala),
+        semente=args.semente,
+    )
+    print(f'Banco: {db_path}')
+
+
+if __name__ == '__main__':
+    main()